@@ -0,0 +1,114 @@
+"""
+Description compression benchmark: database size and read/write throughput.
+
+    python benchmarks/bench_compression.py            # 2 000 tickets
+    python benchmarks/bench_compression.py -n 500
+
+The corpus mimics real use: mostly short descriptions, some pasted logs of
+tens of kilobytes and a few multi-megabyte dumps. Each mode writes it through
+TicketRepository.add_many() into a fresh database, then reads every
+description back with get_description(). "none" stores everything as TEXT.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ticket_app import config  # noqa: E402
+from ticket_app.db import codec, database  # noqa: E402
+from ticket_app.db.models import Ticket  # noqa: E402
+from ticket_app.db.repositories import ticket_repository  # noqa: E402
+
+WORDS = ("serveur", "client", "erreur", "réseau", "base", "connexion", "délai", "utilisateur",
+         "export", "import", "lenteur", "écran", "impression", "mot de passe", "droits")
+LEVELS = ("DEBUG", "INFO", "INFO", "INFO", "WARN", "ERROR")
+
+
+def _prose(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _log(rng: random.Random, size: int) -> str:
+    lines, total, seq = [], 0, rng.randrange(10_000)
+    while total < size:
+        seq += rng.randrange(1, 50)
+        line = (f"2024-05-{rng.randrange(1, 29):02d} {rng.randrange(24):02d}:{rng.randrange(60):02d}:"
+                f"{rng.randrange(60):02d}.{rng.randrange(1000):03d} {rng.choice(LEVELS):5s} "
+                f"[worker-{rng.randrange(16)}] req={seq:08x} {_prose(rng, rng.randrange(3, 12))}")
+        if rng.random() < 0.02:
+            line += "\nTraceback (most recent call last):\n" + "".join(
+                f'  File "/srv/app/module_{rng.randrange(40)}.py", line {rng.randrange(900)}, in handler\n'
+                for _ in range(rng.randrange(3, 12))) + "ValueError: valeur inattendue"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def corpus(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.005:
+            description = _log(rng, rng.randrange(1_000_000, 3_000_000))
+        elif roll < 0.10:
+            description = _log(rng, rng.randrange(5_000, 60_000))
+        else:
+            description = _prose(rng, rng.randrange(5, 80))
+        yield Ticket(id=None, title=f"Ticket {i}", description=description,
+                     urgency="Normale", deadline=None, theme="Support")
+
+
+def _file_size(path: Path) -> int:
+    wal = path.with_name(path.name + "-wal")
+    return path.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+
+
+def run(tickets, mode: str, workdir: str) -> None:
+    path = Path(workdir) / f"{mode}.db"
+    database.DB_PATH = config.DB_PATH = path
+    database.init_db()
+    if mode == "none":
+        codec.COMPRESS_THRESHOLD = sys.maxsize
+    else:
+        codec.COMPRESS_THRESHOLD = 4096
+        codec.DEFAULT_METHOD = mode
+    raw_mb = sum(len(t.description.encode("utf-8")) for t in tickets) / 1e6
+
+    start = time.perf_counter()
+    for i in range(0, len(tickets), 500):
+        ticket_repository.add_many(tickets[i:i + 500])
+    write_s = time.perf_counter() - start
+    database.get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    size_mb = _file_size(path) / 1e6
+
+    ids = [row[0] for row in database.get_connection().execute("SELECT id FROM tickets")]
+    start = time.perf_counter()
+    read_mb = sum(len(ticket_repository.get_description(tid).encode("utf-8")) for tid in ids) / 1e6
+    read_s = time.perf_counter() - start
+    database.close_connections()
+
+    print(f"{mode:5s} {size_mb:9.1f} Mo  écriture {raw_mb / write_s:7.1f} Mo/s"
+          f"  lecture {read_mb / read_s:7.1f} Mo/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--count", type=int, default=2000)
+    args = parser.parse_args()
+
+    tickets = list(corpus(args.count))
+    raw = sum(len(t.description.encode("utf-8")) for t in tickets) / 1e6
+    print(f"Corpus : {len(tickets)} tickets, {raw:.1f} Mo de descriptions")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("none", "zlib", "lzma"):
+            run(tickets, mode, tmp)
+
+
+if __name__ == "__main__":
+    main()
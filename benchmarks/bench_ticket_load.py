@@ -0,0 +1,136 @@
+"""
+Ticket list load benchmark: legacy mapping vs slotted models + row factories.
+
+    python benchmarks/bench_ticket_load.py            # 1 000 000 tickets
+    python benchmarks/bench_ticket_load.py -n 200000
+
+"legacy" reproduces the former mapping (sqlite3.Row, eight key lookups per
+row, regular dataclass with a __dict__) and "slotted" the current one
+(positional ticket_row, slotted Ticket). Both read the same SELECT, description
+included: the difference is the mapping alone.
+
+"list" is TicketRepository.get_all(), the list projection without
+descriptions (user-017), reported on its own line for reference.
+Each mode runs in its own process so the RSS figures do not interfere.
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@dataclass
+class LegacyTicket:
+    id: Optional[int]
+    title: str
+    description: str
+    urgency: str
+    deadline: Optional[str]
+    theme: str
+    created_at: Optional[str] = None
+    archived: bool = False
+
+
+MODES = ("legacy", "slotted", "list")
+
+
+def _rss_mb() -> float:
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _use_db(path: str):
+    from ticket_app import config
+    from ticket_app.db import database
+    database.DB_PATH = config.DB_PATH = Path(path)
+    return database
+
+
+def build(path: str, count: int) -> None:
+    database = _use_db(path)
+    database.init_db()
+    themes = [f"Thème {i}" for i in range(20)]
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO themes (name, color) VALUES (?, '#cccccc')", [(t,) for t in themes])
+    batch = 50_000
+    for start in range(0, count, batch):
+        with database.transaction() as c:
+            c.executemany(
+                "INSERT INTO tickets (title, description, urgency, deadline, theme_id, archived)"
+                " VALUES (?, ?, 'Normale', '2030-01-01', ?, 0)",
+                [(f"Ticket {i}", f"Description du ticket {i}", i % 20 + 1)
+                 for i in range(start, min(start + batch, count))]
+            )
+    database.close_connections()
+
+
+# Requête commune aux deux mappings : colonnes de Ticket, dans l'ordre de ticket_row
+FULL_SELECT = """
+    SELECT t.id, t.title, t.description, t.urgency, t.deadline, th.name AS theme,
+           t.created_at, t.archived, t.theme_id, t.deadline_day
+    FROM tickets t LEFT JOIN themes th ON th.id = t.theme_id
+    WHERE t.archived = 0 ORDER BY t.created_at DESC, t.id DESC
+"""
+
+
+def run(path: str, mode: str) -> None:
+    database = _use_db(path)
+    base = _rss_mb()
+    start = time.perf_counter()
+    if mode == "legacy":
+        import sqlite3
+        conn = database.get_connection()
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(FULL_SELECT).fetchall()
+        tickets = [
+            LegacyTicket(
+                id=row["id"], title=row["title"], description=row["description"],
+                urgency=row["urgency"], deadline=row["deadline"], theme=row["theme"],
+                created_at=row["created_at"], archived=bool(row["archived"]),
+            )
+            for row in rows
+        ]
+        del rows
+    elif mode == "slotted":
+        from ticket_app.db.rows import ticket_row
+        cur = database.get_connection().cursor()
+        cur.row_factory = ticket_row
+        tickets = cur.execute(FULL_SELECT).fetchall()
+    else:
+        from ticket_app.db.repositories import ticket_repository
+        tickets = ticket_repository.get_all()
+    elapsed = time.perf_counter() - start
+    print(f"{mode:8s} {len(tickets):>9d} tickets  {elapsed:6.2f} s  RSS +{_rss_mb() - base:7.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--count", type=int, default=1_000_000)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.db, args.mode)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = str(Path(tmp) / "bench.db")
+        print(f"Création de {args.count} tickets...")
+        build(db, args.count)
+        for mode in MODES:
+            subprocess.run([sys.executable, __file__, "--db", db, "--mode", mode], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import sqlite3
+import threading
+import unittest
+from pathlib import Path
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db.backup import BackupCancelled, backup_to
+from ticket_app.db.repositories import ticket_repository
+
+
+class BackupTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(300):
+            self.add_ticket(f"Ticket {i}", description="x" * 2000)
+        self.target = Path(self._tmpdir.name) / "export.db"
+
+    def _count(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_export_is_a_standalone_copy(self):
+        steps = []
+        backup_to(self.target, progress=lambda copied, total: steps.append((copied, total)), pages=16)
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(steps[-1][0], steps[-1][1])
+        self.assertEqual(self._count(self.target), 300)
+        conn = sqlite3.connect(self.target)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+        self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+        conn.close()
+
+    def test_concurrent_writes_do_not_tear_the_snapshot(self):
+        def write_between_steps(copied, total):
+            # écriture par la connexion de l'application pendant la copie
+            self.add_ticket("pendant l'export")
+
+        backup_to(self.target, progress=write_between_steps, pages=16)
+        self.assertEqual(self._count(self.target), 300)
+        self.assertGreater(len(ticket_repository.get_all()), 300)
+
+    def test_cancel_leaves_no_file(self):
+        cancel = threading.Event()
+        with self.assertRaises(BackupCancelled):
+            backup_to(self.target, progress=lambda copied, total: cancel.set(), cancel=cancel, pages=16)
+        self.assertFalse(self.target.exists())
+        self.assertEqual(list(Path(self._tmpdir.name).glob("export.db*")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
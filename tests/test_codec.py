@@ -0,0 +1,127 @@
+import sqlite3
+import unittest
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db import codec, database, maintenance, migrations
+from ticket_app.db.repositories import note_repository, ticket_repository
+
+LOG = "".join(f"2024-05-01 12:00:{i % 60:02d} INFO worker-{i % 8} job {i} done in {i % 97} ms\n"
+              for i in range(2000))
+
+
+class CodecTests(unittest.TestCase):
+    def test_short_text_is_stored_as_is(self):
+        self.assertEqual(codec.encode("court"), "court")
+        self.assertIsNone(codec.encode(None))
+
+    def test_large_text_round_trips_with_each_method(self):
+        for method, marker in codec.METHODS.items():
+            with self.subTest(method=method):
+                stored = codec.encode(LOG, method=method)
+                self.assertIsInstance(stored, bytes)
+                self.assertEqual(stored[:1], marker)
+                self.assertLess(len(stored), len(LOG) // 4)
+                self.assertEqual(codec.decode(stored), LOG)
+
+    def test_text_that_does_not_shrink_stays_text(self):
+        # zlib ajoute ~10 octets d'en-tête : inutile sur un texte à peine au-dessus du seuil
+        self.assertEqual(codec.encode("abcdefghij", threshold=4), "abcdefghij")
+
+    def test_unknown_marker_is_rejected(self):
+        with self.assertRaises(ValueError):
+            codec.decode(b"?data")
+
+
+class CompressedStorageTests(DatabaseTestCase):
+    def _stored_type(self, table, column, row_id):
+        return database.get_connection().execute(
+            f"SELECT typeof({column}) FROM {table} WHERE id = ?", (row_id,)).fetchone()[0]
+
+    def _external_writer(self):
+        # sqlite3 en ligne de commande, script, copie exportée : pas de decompress_text()
+        return sqlite3.connect(database.DB_PATH)
+
+    def test_external_writes_are_indexed_and_can_be_deleted(self):
+        tid = self.add_ticket("Journal", description=LOG)
+        other = self._external_writer()
+        with other:
+            other.execute("UPDATE tickets SET title = 'Journal externe', description = ? WHERE id = ?",
+                          (LOG + "ajout", tid))
+            added = other.execute("INSERT INTO tickets (title) VALUES ('Ajout externe')").lastrowid
+        other.close()
+        self.assertEqual({t.title for t in ticket_repository.search("ajout")}, {"Journal externe", "Ajout externe"})
+
+        ticket = ticket_repository.get_by_id(tid)
+        ticket.title = "Rapport"
+        ticket_repository.update(ticket)
+        ticket_repository.delete(added)
+        self.assertEqual([t.id for t in ticket_repository.search("ajout")], [tid])
+        ticket_repository.delete(tid)
+        self.assertEqual(ticket_repository.search("ajout"), [])
+        self.assertEqual(maintenance.integrity_check(), [])
+
+    def test_external_compressed_description_waits_for_rebuild(self):
+        tid = self.add_ticket("Journal")
+        other = self._external_writer()
+        with other:
+            other.execute("UPDATE tickets SET description = ? WHERE id = ?",
+                          (codec.encode(LOG + "copie"), tid))
+        other.close()
+        self.assertEqual(ticket_repository.search("copie"), [])
+        self.assertEqual([t.id for t in ticket_repository.search("journal")], [tid])
+        maintenance.rebuild_search_index()
+        self.assertEqual([t.id for t in ticket_repository.search("copie")], [tid])
+        ticket_repository.delete(tid)
+        self.assertEqual(ticket_repository.search("journal"), [])
+
+    def test_large_description_is_compressed_and_searchable(self):
+        tid = self.add_ticket("Crash", description=LOG + "stacktrace")
+        self.assertEqual(self._stored_type("tickets", "description", tid), "blob")
+        self.assertEqual(ticket_repository.get_description(tid), LOG + "stacktrace")
+        self.assertEqual(ticket_repository.get_by_id(tid).description, LOG + "stacktrace")
+        self.assertEqual([t.id for t in ticket_repository.search("stacktrace")], [tid])
+
+    def test_index_follows_compressed_updates_moves_and_deletes(self):
+        tid = self.add_ticket("Crash", description=LOG + "ancien")
+        ticket = ticket_repository.get_by_id(tid)
+        ticket.description = LOG + "nouveau"
+        ticket_repository.update(ticket)
+        self.assertEqual(ticket_repository.search("ancien"), [])
+        ticket_repository.set_archived(tid, True)
+        self.assertEqual(self._stored_type("tickets_archive", "description", tid), "blob")
+        self.assertEqual([t.id for t in ticket_repository.search("nouveau", include_archived=True)], [tid])
+        ticket_repository.delete(tid)
+        self.assertEqual(ticket_repository.search("nouveau", include_archived=True), [])
+
+    def test_note_content_is_compressed(self):
+        note_repository.save_latest(LOG)
+        self.assertEqual(self._stored_type("notes", "content", 1), "blob")
+        self.assertEqual(note_repository.get_latest().content, LOG)
+
+    def test_migration_compresses_existing_rows_without_logging(self):
+        tid = self.add_ticket("Ancien")
+        conn = database.get_connection()
+        conn.execute("UPDATE tickets SET description = ? WHERE id = ?", (LOG + "historique", tid))
+        conn.execute("INSERT INTO notes (id, content) VALUES (1, ?)", (LOG,))
+        # état v8 : sans les compteurs de la migration 10
+        for name in ("ticket_stats_ai", "ticket_stats_ad", "ticket_stats_au_old", "ticket_stats_au_new"):
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute("DROP TABLE ticket_stats")
+        conn.execute("PRAGMA user_version = 8")
+        conn.commit()
+        self.assertEqual(self._stored_type("tickets", "description", tid), "text")
+        token = ticket_repository.current_change_token()
+
+        migrations.migrate(conn)
+
+        self.assertEqual(self._stored_type("tickets", "description", tid), "blob")
+        self.assertEqual(self._stored_type("notes", "content", 1), "blob")
+        self.assertEqual(ticket_repository.current_change_token(), token)
+        self.assertEqual([t.id for t in ticket_repository.search("historique")], [tid])
+        ticket_repository.delete(tid)
+        self.assertEqual(ticket_repository.search("historique"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
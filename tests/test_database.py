@@ -0,0 +1,264 @@
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from ticket_app import config
+from ticket_app.db import database, migrations
+from ticket_app.db.models import Ticket
+from ticket_app.db.repositories import ticket_repository
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Points the app at a throw-away database for each test."""
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._db_path = Path(self._tmpdir.name) / "ticket_app.db"
+        self._orig_db_path = database.DB_PATH
+        self._orig_config_db_path = config.DB_PATH
+        database.DB_PATH = self._db_path
+        config.DB_PATH = self._db_path
+        database.init_db()
+
+    def tearDown(self):
+        database.close_connections()
+        database.DB_PATH = self._orig_db_path
+        config.DB_PATH = self._orig_config_db_path
+        self._tmpdir.cleanup()
+
+    def add_ticket(self, title="T", **kwargs):
+        values = dict(description="", urgency="Basse", deadline=None, theme="")
+        values.update(kwargs)
+        return ticket_repository.add(Ticket(id=None, title=title, **values))
+
+
+class ConnectionManagerTests(DatabaseTestCase):
+
+    def test_connection_is_reused_within_a_thread(self):
+        self.assertIs(database.get_connection(), database.get_connection())
+
+    def test_each_thread_gets_its_own_connection(self):
+        other = []
+        t = threading.Thread(target=lambda: other.append(database.get_connection()))
+        t.start()
+        t.join()
+        self.assertIsNot(other[0], database.get_connection())
+
+    def test_pragma_profile_applied(self):
+        conn = database.get_connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+
+    def test_repositories_survive_close_connections(self):
+        self.add_ticket("before")
+        database.close_connections()
+        self.add_ticket("after")
+        titles = {t.title for t in ticket_repository.get_all()}
+        self.assertEqual(titles, {"before", "after"})
+
+
+class TransactionTests(DatabaseTestCase):
+
+    def _titles(self):
+        return {t.title for t in ticket_repository.get_all()}
+
+    def test_nested_repository_calls_commit_once(self):
+        statements = []
+        conn = database.get_connection()
+        conn.set_trace_callback(statements.append)
+        try:
+            with database.transaction():
+                self.add_ticket("a")
+                self.add_ticket("b")
+        finally:
+            conn.set_trace_callback(None)
+        self.assertEqual(sum(1 for s in statements if s.strip().upper() == "COMMIT"), 1)
+        self.assertEqual(self._titles(), {"a", "b"})
+
+    def test_failure_rolls_back_every_step(self):
+        with self.assertRaises(RuntimeError):
+            with database.transaction():
+                self.add_ticket("a")
+                raise RuntimeError("boom")
+        self.assertEqual(self._titles(), set())
+        self.assertFalse(database.get_connection().in_transaction)
+
+    def test_failed_commit_is_rolled_back(self):
+        conn = database.get_connection()
+        conn.execute("CREATE TABLE parent (id INTEGER PRIMARY KEY)")
+        conn.execute("CREATE TABLE child (parent_id REFERENCES parent(id) DEFERRABLE INITIALLY DEFERRED)")
+        conn.commit()
+        # la clé étrangère différée n'est vérifiée qu'au COMMIT
+        with self.assertRaises(sqlite3.IntegrityError):
+            with database.transaction():
+                self.add_ticket("a")
+                conn.execute("INSERT INTO child VALUES (1)")
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(self._titles(), set())
+        self.add_ticket("b")
+        self.assertEqual(self._titles(), {"b"})
+
+    def test_caught_inner_failure_keeps_outer_work(self):
+        with database.transaction():
+            self.add_ticket("kept")
+            try:
+                with database.transaction():
+                    self.add_ticket("dropped")
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+        self.assertEqual(self._titles(), {"kept"})
+
+
+class WriteContentionTests(DatabaseTestCase):
+    """Another process's writer is simulated by a second, unpooled connection."""
+
+    def setUp(self):
+        super().setUp()
+        database.reset_write_stats()
+        # Sans attente interne de SQLite : chaque BEGIN refusé passe par le recul
+        database.get_connection().execute("PRAGMA busy_timeout = 0")
+        self.other = database.connect(self._db_path)
+        patcher = mock.patch.multiple(database, WRITE_BACKOFF=0.02, WRITE_BACKOFF_MAX=0.1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.other.close()
+        super().tearDown()
+
+    def _hold_lock(self, seconds):
+        self.other.execute("BEGIN IMMEDIATE")
+        timer = threading.Timer(seconds, self.other.rollback)
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_busy_database_is_retried_with_backoff(self):
+        self._hold_lock(0.1)
+        with mock.patch.object(database, "WRITE_RETRIES", 10):
+            self.add_ticket("patient")
+        stats = database.write_stats()
+        self.assertGreater(stats.busy_retries, 0)
+        self.assertEqual(stats.failures, 0)
+        self.assertGreaterEqual(stats.wait_max, 0.05)
+        self.assertEqual([t.title for t in ticket_repository.get_all()], ["patient"])
+
+    def test_gives_up_after_the_retry_budget(self):
+        self.other.execute("BEGIN IMMEDIATE")
+        with self.assertRaises(database.DatabaseBusyError):
+            self.add_ticket("refused")
+        stats = database.write_stats()
+        self.assertEqual((stats.busy_retries, stats.failures), (database.WRITE_RETRIES, 1))
+        self.other.rollback()
+        # Le verrou interne est rendu : l'écriture suivante passe
+        self.add_ticket("later")
+        self.assertEqual([t.title for t in ticket_repository.get_all()], ["later"])
+
+    def test_threads_write_one_at_a_time(self):
+        def write(i):
+            self.add_ticket(f"T{i}")
+            database.release_connection()
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(ticket_repository.get_all()), 8)
+        stats = database.write_stats()
+        self.assertEqual((stats.transactions, stats.busy_retries, stats.failures), (8, 0, 0))
+
+    def test_gate_serves_writers_in_arrival_order(self):
+        gate = database.WriteGate()
+        order = []
+        gate.acquire()
+
+        def writer(i):
+            with gate:
+                order.append(i)
+
+        threads = []
+        for i in range(5):
+            threads.append(threading.Thread(target=writer, args=(i,)))
+            threads[-1].start()
+            time.sleep(0.02)  # arrivées ordonnées dans la file
+        gate.release()
+        for t in threads:
+            t.join()
+        self.assertEqual(order, list(range(5)))
+
+
+class MigrationTests(DatabaseTestCase):
+
+    def test_fresh_database_is_at_latest_version(self):
+        conn = database.get_connection()
+        self.assertEqual(migrations.get_version(conn), migrations.latest_version())
+
+    def test_current_schema_is_a_noop(self):
+        conn = database.get_connection()
+        changes = conn.total_changes
+        before, after = migrations.migrate(conn)
+        self.assertEqual(before, after)
+        self.assertEqual(conn.total_changes, changes)
+        self.assertFalse(conn.in_transaction)
+
+    def _legacy_database(self):
+        conn = database.connect(Path(self._tmpdir.name) / "legacy.db")
+        conn.execute("CREATE TABLE tickets (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                     "description TEXT, urgency TEXT, deadline TEXT, theme TEXT, "
+                     "created_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("CREATE TABLE postits (id INTEGER PRIMARY KEY AUTOINCREMENT, content TEXT, "
+                     "x INTEGER, y INTEGER, width INTEGER, height INTEGER, color TEXT, "
+                     "created_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO tickets (title) VALUES ('old')")
+        conn.commit()
+        return conn
+
+    def test_legacy_database_is_upgraded(self):
+        conn = self._legacy_database()
+        migrations.migrate(conn)
+
+        self.assertIn("archived", migrations._columns(conn, "tickets"))
+        self.assertIn("order_index", migrations._columns(conn, "postits"))
+        self.assertEqual(conn.execute("SELECT title FROM tickets").fetchone()[0], "old")
+        self.assertEqual(migrations.get_version(conn), migrations.latest_version())
+        # auto_vacuum n'est appliqué que par le VACUUM qui suit la migration
+        self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        conn.close()
+
+    def test_large_database_defers_the_migration_vacuum(self):
+        conn = self._legacy_database()
+        with mock.patch.object(migrations, "STARTUP_VACUUM_MAX_BYTES", 0):
+            migrations.migrate(conn)
+        # laissé à maintenance.compact() (voir test_maintenance)
+        self.assertEqual(migrations.get_version(conn), migrations.latest_version())
+        self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+        conn.close()
+
+    def test_failed_step_rolls_back(self):
+        conn = database.connect(Path(self._tmpdir.name) / "broken.db")
+
+        def boom(c):
+            c.execute("CREATE TABLE half_done (id INTEGER)")
+            raise RuntimeError("boom")
+
+        migrations.MIGRATIONS.append((migrations.latest_version() + 1, boom))
+        try:
+            with self.assertRaises(RuntimeError):
+                migrations.migrate(conn)
+        finally:
+            migrations.MIGRATIONS.pop()
+        self.assertEqual(migrations.get_version(conn), 0)
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+        self.assertNotIn("half_done", tables)
+        self.assertNotIn("tickets", tables)
+        conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import threading
+import unittest
+from concurrent.futures import CancelledError
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db import database
+from ticket_app.services.db_worker import DbWorker, Superseded
+from ticket_app.services.ticket_service import ticket_service
+
+
+class DbWorkerTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.worker = DbWorker()
+
+    def tearDown(self):
+        self.worker.shutdown()
+        super().tearDown()
+
+    def test_runs_service_calls_on_its_own_connection(self):
+        self.add_ticket("Alpha")
+        future = self.worker.submit(lambda: (threading.get_ident(), database.get_connection(),
+                                             ticket_service.get_all_tickets()))
+        thread_id, conn, tickets = future.result(timeout=5)
+        self.assertNotEqual(thread_id, threading.get_ident())
+        self.assertIsNot(conn, database.get_connection())
+        self.assertEqual([t.title for t in tickets], ["Alpha"])
+
+    def test_errors_are_reported_through_the_future(self):
+        future = self.worker.submit(lambda: database.get_connection().execute("SELECT * FROM missing"))
+        with self.assertRaises(database.sqlite3.OperationalError):
+            future.result(timeout=5)
+
+    def test_newer_request_supersedes_queued_and_running_ones(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return "slow"
+
+        running = self.worker.submit(slow, key="page")
+        started.wait(5)
+        queued = self.worker.submit(lambda: "queued", key="page")
+        latest = self.worker.submit(lambda: "latest", key="page")
+        other = self.worker.submit(lambda: "other", key="alerts")
+        release.set()
+
+        self.assertEqual(latest.result(timeout=5), "latest")
+        self.assertEqual(other.result(timeout=5), "other")
+        self.assertTrue(queued.cancelled())
+        with self.assertRaises(Superseded):
+            running.result(timeout=5)
+        self.assertIsInstance(running.exception(), CancelledError)
+
+    def test_drain_waits_for_pending_requests(self):
+        done = []
+        for i in range(5):
+            self.worker.submit(done.append, i)
+        self.worker.drain(timeout=5)
+        self.assertEqual(done, [0, 1, 2, 3, 4])
+
+    def test_shutdown_then_reuse(self):
+        self.worker.submit(lambda: None).result(timeout=5)
+        self.worker.shutdown()
+        self.assertEqual(self.worker.submit(lambda: 42).result(timeout=5), 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
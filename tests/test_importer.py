@@ -0,0 +1,160 @@
+import sqlite3
+import unittest
+from pathlib import Path
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db import database, migrations
+from ticket_app.db.importer import ImportSourceError, import_database
+from ticket_app.db.models import PostIt
+from ticket_app.db.repositories import (
+    note_repository, postit_repository, theme_repository, ticket_repository
+)
+
+
+class ImportTests(DatabaseTestCase):
+    """The source is built through the app itself, pointed at another file."""
+
+    def setUp(self):
+        super().setUp()
+        self.source = Path(self._tmpdir.name) / "source.db"
+        self._live = database.DB_PATH
+        self._use(self.source)
+        database.init_db()
+        self.add_ticket("Leur ticket", theme="Réseau", description="switch")
+        self.add_ticket("Leur second", theme="Infra")
+        note_repository.save_latest("leur note")
+        postit_repository.add(PostIt(None, "leur post-it", 0, 0, 1, 1, "y", order_index=0))
+        self._use(self._live)
+        self.add_ticket("Notre ticket", theme="Infra")
+        postit_repository.add(PostIt(None, "notre post-it", 0, 0, 1, 1, "y", order_index=5))
+
+    def _use(self, path):
+        database.close_connections()
+        database.DB_PATH = path
+
+    def test_renumber_keeps_everything(self):
+        stages = []
+        report = import_database(self.source, "renumber",
+                                 progress=lambda stage, done, total: stages.append((stage, done, total)))
+        self.assertEqual(stages[-1], ("postits", 4, 4))
+        self.assertEqual((report.themes, report.tickets, report.postits), (1, 2, 1))
+
+        tickets = {t.title: t for t in ticket_repository.get_all()}
+        self.assertEqual(set(tickets), {"Notre ticket", "Leur ticket", "Leur second"})
+        # thèmes fusionnés par nom
+        self.assertEqual(tickets["Leur second"].theme_id, tickets["Notre ticket"].theme_id)
+        self.assertEqual(tickets["Leur ticket"].theme, "Réseau")
+        self.assertEqual([t.name for t in theme_repository.get_all()].count("Infra"), 1)
+        # index plein texte tenu par les triggers de ticket_search (migration 14)
+        self.assertEqual([t.title for t in ticket_repository.search("switch")], ["Leur ticket"])
+        self.assertEqual([p.content for p in postit_repository.get_all()],
+                         ["notre post-it", "leur post-it"])
+
+    def test_note_is_imported_with_its_latest_delta(self):
+        base = "".join(f"ligne {i} de leur note\n" for i in range(500))
+        self._use(self.source)
+        note_repository.save_latest(base)
+        head, text = note_repository.get_head()
+        edited = note_repository.save_revision(text + "LATEST EDIT", head, text)
+        # la modification n'est qu'un delta : notes.content garde le point de reprise
+        self.assertFalse(note_repository.get_revisions(1)[0].checkpoint)
+        self.assertEqual(note_repository.get_head()[0], edited)
+        self._use(self._live)
+
+        self.assertEqual(import_database(self.source, "skip").notes, 1)  # pas de note chez nous
+        self.assertEqual(note_repository.get_latest().content, base + "LATEST EDIT")
+
+        note_repository.save_latest("notre note")
+        self.assertEqual(import_database(self.source, "skip").notes, 0)
+        self.assertEqual(note_repository.get_latest().content, "notre note")
+        import_database(self.source, "renumber")
+        self.assertEqual(note_repository.get_latest().content, "notre note\n\n" + base + "LATEST EDIT")
+        import_database(self.source, "replace")
+        self.assertEqual(note_repository.get_latest().content, base + "LATEST EDIT")
+        # le texte remplacé reste dans l'historique
+        self.assertEqual(note_repository.get_revision_text(note_repository.get_revisions(2)[1].id),
+                         "notre note\n\n" + base + "LATEST EDIT")
+
+    def test_skip_and_replace_on_id_conflicts(self):
+        report = import_database(self.source, "skip")
+        self.assertEqual(report.tickets, 1)  # id 1 existe déjà
+        titles = {t.id: t.title for t in ticket_repository.get_all()}
+        self.assertEqual(titles, {1: "Notre ticket", 2: "Leur second"})
+
+        import_database(self.source, "replace")
+        titles = {t.id: t.title for t in ticket_repository.get_all()}
+        self.assertEqual(titles, {1: "Leur ticket", 2: "Leur second"})
+        self.assertEqual([t.title for t in ticket_repository.search("switch")], ["Leur ticket"])
+        self.assertEqual(ticket_repository.search("notre"), [])
+
+    def test_archived_tickets_land_in_the_archive(self):
+        self._use(self.source)
+        ticket_repository.set_archived(2, True)  # "Leur second"
+        self._use(self._live)
+        archived_here = self.add_ticket("Notre archive")
+        ticket_repository.set_archived(archived_here, True)  # id 2 aussi chez nous
+
+        report = import_database(self.source, "skip")
+        self.assertEqual(report.tickets, 0)  # ids 1 et 2 existent déjà (actif et archivé)
+
+        import_database(self.source, "replace")
+        tickets = {t.id: t for t in ticket_repository.get_all(include_archived=True)}
+        self.assertEqual({tid: (t.title, t.archived) for tid, t in tickets.items()},
+                         {1: ("Leur ticket", False), 2: ("Leur second", True)})
+        self.assertEqual(ticket_repository.get_all()[0].title, "Leur ticket")
+
+        import_database(self.source, "renumber")
+        archived = [t for t in ticket_repository.get_all(include_archived=True) if t.archived]
+        self.assertEqual([t.title for t in archived], ["Leur second", "Leur second"])
+
+    def test_older_source_is_upgraded_on_a_copy(self):
+        legacy = Path(self._tmpdir.name) / "legacy.db"
+        conn = sqlite3.connect(legacy)
+        conn.execute("CREATE TABLE tickets (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                     "description TEXT, urgency TEXT, deadline TEXT, theme TEXT, "
+                     "created_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO tickets (title, theme) VALUES ('ancien', 'Infra')")
+        conn.commit()
+        conn.close()
+
+        report = import_database(legacy)
+        self.assertEqual(report.tickets, 1)
+        ancien = next(t for t in ticket_repository.get_all() if t.title == "ancien")
+        self.assertEqual(ancien.theme, "Infra")
+        conn = sqlite3.connect(legacy)
+        self.assertEqual(migrations.get_version(conn), 0)  # source intacte
+        conn.close()
+
+    def test_invalid_sources_are_rejected_without_changes(self):
+        garbage = Path(self._tmpdir.name) / "garbage.db"
+        garbage.write_bytes(b"not a database" * 100)
+        other = Path(self._tmpdir.name) / "other.db"
+        sqlite3.connect(other).execute("CREATE TABLE x (y)").connection.close()
+        newer = Path(self._tmpdir.name) / "newer.db"
+        conn = sqlite3.connect(newer)
+        conn.execute("CREATE TABLE tickets (id INTEGER PRIMARY KEY)")
+        conn.execute(f"PRAGMA user_version = {migrations.latest_version() + 1}")
+        conn.close()
+
+        for path in (garbage, other, newer, self._live, Path(self._tmpdir.name) / "missing.db"):
+            with self.subTest(path=path.name), self.assertRaises(ImportSourceError):
+                import_database(path)
+        with self.assertRaises(ValueError):
+            import_database(self.source, "merge")
+        self.assertEqual([t.title for t in ticket_repository.get_all()], ["Notre ticket"])
+
+    def test_failure_rolls_back_the_whole_import(self):
+        database.get_connection().execute("""
+            CREATE TRIGGER fail_notes BEFORE INSERT ON notes BEGIN SELECT RAISE(ABORT, 'boom'); END
+        """)
+        with self.assertRaises(sqlite3.IntegrityError):
+            import_database(self.source)
+        self.assertEqual([t.title for t in ticket_repository.get_all()], ["Notre ticket"])
+        # la source est bien détachée
+        names = [row[1] for row in database.get_connection().execute("PRAGMA database_list")]
+        self.assertNotIn("src", names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db import database, maintenance
+from ticket_app.db.repositories import ticket_repository
+
+
+class MaintenanceTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ids = [self.add_ticket(f"Ticket {i}", description="x" * 4000) for i in range(200)]
+        ticket_repository.delete_many(ids)
+
+    def test_fresh_database_uses_incremental_vacuum(self):
+        stats = maintenance.storage_stats(fragmentation=False)
+        self.assertEqual(stats.auto_vacuum, "incremental")
+        self.assertIsNone(stats.fragmentation)
+
+    def test_deleted_rows_stay_on_the_freelist(self):
+        stats = maintenance.storage_stats()
+        self.assertGreater(stats.freelist_count, 100)
+        self.assertGreater(stats.free_ratio, 0.5)
+        self.assertEqual(stats.free_bytes, stats.freelist_count * stats.page_size)
+
+    def test_incremental_vacuum_is_bounded(self):
+        before = maintenance.storage_stats(fragmentation=False)
+        self.assertEqual(maintenance.incremental_vacuum(pages=10), 10)
+        after = maintenance.storage_stats(fragmentation=False)
+        self.assertEqual(after.freelist_count, before.freelist_count - 10)
+        self.assertEqual(after.page_count, before.page_count - 10)
+
+    def test_idle_maintenance_skips_a_small_freelist(self):
+        free = maintenance.storage_stats(fragmentation=False).freelist_count
+        self.assertEqual(maintenance.idle_maintenance(min_pages=free + 1), 0)
+        self.assertEqual(maintenance.idle_maintenance(min_pages=1, pages=free), free)
+        self.assertEqual(maintenance.storage_stats(fragmentation=False).freelist_count, 0)
+
+    def test_idle_maintenance_applies_a_deferred_migration_vacuum(self):
+        conn = database.get_connection()
+        conn.execute("PRAGMA auto_vacuum = NONE")
+        conn.execute("VACUUM")
+        self.assertEqual(maintenance.storage_stats(fragmentation=False).auto_vacuum, "none")
+        maintenance.idle_maintenance()
+        self.assertEqual(maintenance.storage_stats(fragmentation=False).auto_vacuum, "incremental")
+
+    def test_compact_empties_the_freelist_and_analyzes(self):
+        self.add_ticket("reste")
+        stats = maintenance.compact()
+        self.assertEqual(stats.freelist_count, 0)
+        conn = database.get_connection()
+        analyzed = {row[0] for row in conn.execute("SELECT tbl FROM sqlite_stat1")}
+        self.assertIn("tickets", analyzed)
+
+    def test_integrity_check_reports_nothing_on_a_sound_database(self):
+        self.assertEqual(maintenance.integrity_check(), [])
+
+    def test_close_connections_can_optimize(self):
+        ticket_repository.get_all()
+        database.close_connections(optimize=True)
+        self.assertEqual(maintenance.integrity_check(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import random
+import string
+import unittest
+from unittest import mock
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db import database, migrations, repositories
+from ticket_app.db.delta import diff, patch
+from ticket_app.db.repositories import note_repository
+from ticket_app.services.note_service import note_service
+
+
+def _text(size, seed=0):
+    rng = random.Random(seed)
+    return "".join(rng.choices(string.ascii_letters + " \n", k=size))
+
+
+class DeltaTests(unittest.TestCase):
+
+    def test_round_trip(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            old = "".join(rng.choices("ab", k=rng.randint(0, 10)))
+            new = "".join(rng.choices("ab", k=rng.randint(0, 10)))
+            self.assertEqual(patch(old, diff(old, new)), new, (old, new))
+
+    def test_single_edit_gives_a_small_delta(self):
+        old = _text(100_000)
+        new = old[:5000] + "inséré" + old[5010:]
+        self.assertEqual(diff(old, new), (5000, 10, "inséré"))
+
+
+class NoteHistoryTests(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        note_service.clear_caches()
+
+    def tearDown(self):
+        note_service.clear_caches()
+        super().tearDown()
+
+    def _reread(self):
+        note_service.clear_caches()
+        return note_service.get_current_content()
+
+    def test_autosave_of_a_large_note_writes_the_edit_only(self):
+        text = _text(2_000_000)
+        note_service.save_content(text)
+        text = text[:1_000_000] + "une ligne de plus\n" + text[1_000_000:]
+        note_service.save_content(text)
+
+        latest = note_service.get_history()[0]
+        self.assertFalse(latest.checkpoint)
+        self.assertLess(latest.size, 100)
+        self.assertEqual(self._reread(), text)
+
+    def test_unchanged_content_writes_nothing(self):
+        note_service.save_content("note")
+        conn = database.get_connection()
+        before = conn.total_changes
+        note_service.save_content("note")
+        self.assertEqual(conn.total_changes, before)
+
+    def test_periodic_checkpoints_and_pruning(self):
+        text = _text(10_000)
+        versions = []
+        with mock.patch.multiple(repositories, NOTE_CHECKPOINT_EVERY=3, NOTE_HISTORY_CHECKPOINTS=2):
+            for i in range(10):
+                text = text[:100 * i] + f"<{i}>" + text[100 * i:]
+                note_service.save_content(text)
+                versions.append(note_service.get_history(1)[0].id)
+        history = note_service.get_history()
+        self.assertEqual(sum(r.checkpoint for r in history), 2)
+        self.assertLessEqual(len(history), 6)
+        self.assertIsNone(note_service.get_revision_content(versions[0]))
+        self.assertEqual(self._reread(), text)
+
+    def test_restore_adds_a_revision(self):
+        note_service.save_content("première version")
+        first = note_service.get_history()[0].id
+        note_service.save_content("seconde version")
+        self.assertEqual(note_service.restore_revision(first), "première version")
+        self.assertEqual(self._reread(), "première version")
+        self.assertEqual(len(note_service.get_history()), 3)
+        with self.assertRaises(ValueError):
+            note_service.restore_revision(9999)
+
+    def test_write_from_elsewhere_is_not_overwritten_by_a_stale_base(self):
+        text = _text(50_000)
+        note_service.save_content(text)
+        note_repository.save_latest("écrit par une autre instance")
+        note_service.save_content("écrit par une autre instance + suite")
+        self.assertEqual(self._reread(), "écrit par une autre instance + suite")
+
+    def test_migration_seeds_history_from_existing_note(self):
+        conn = database.get_connection()
+        conn.execute("INSERT INTO notes (id, content) VALUES (1, 'ancienne note')")
+        conn.execute("DELETE FROM note_revisions")
+        conn.execute("PRAGMA user_version = 11")
+        conn.commit()
+        migrations.migrate(conn)
+        self.assertEqual(len(note_service.get_history()), 1)
+        self.assertEqual(note_service.get_current_content(), "ancienne note")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import re
+import unittest
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db import database
+from ticket_app.db.models import PostIt, Theme, Ticket, TicketFilters
+from ticket_app.db.repositories import (
+    note_repository, postit_repository, theme_repository, ticket_repository,
+)
+
+# Tables small by nature (a handful of themes, a single note row) for which
+# reading the whole table is the intended plan.
+FULL_SCAN_ALLOWED = {"themes", "notes"}
+
+_BARE_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+class QueryPlanTests(DatabaseTestCase):
+    """Runs EXPLAIN QUERY PLAN on every statement issued by the repositories."""
+
+    def _capture(self, calls):
+        statements = []
+        conn = database.get_connection()
+        conn.set_trace_callback(statements.append)
+        try:
+            for call in calls:
+                call()
+        finally:
+            conn.set_trace_callback(None)
+        return [s for s in statements if s.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))]
+
+    def _plan(self, sql):
+        conn = database.get_connection()
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+    def _assert_no_full_scan(self, statements, allow_sort=False):
+        self.assertTrue(statements)
+        for sql in statements:
+            plan = self._plan(sql)
+            scanned = {m.group(1) for m in map(_BARE_SCAN.match, plan) if m}
+            if scanned and scanned <= FULL_SCAN_ALLOWED:
+                continue
+            for detail in plan:
+                self.assertIsNone(_BARE_SCAN.match(detail), f"full table scan in: {sql}\n{detail}")
+                if not allow_sort:
+                    self.assertNotIn("TEMP B-TREE", detail, f"sort without index in: {sql}")
+
+    def test_ticket_queries_use_indexes(self):
+        tid = self.add_ticket("plan", theme="A", deadline="2030-01-01")
+        ticket = Ticket(id=tid, title="plan", description="", urgency="Basse",
+                        deadline="2030-01-01", theme="A")
+        self._assert_no_full_scan(self._capture([
+            lambda: ticket_repository.get_all(),
+            lambda: ticket_repository.get_all(include_archived=True),
+            lambda: ticket_repository.search("plan"),
+            lambda: ticket_repository.search("plan", include_archived=True),
+            lambda: ticket_repository.search("plan", filters=TicketFilters(include_archived=True, urgency="Basse")),
+            lambda: ticket_repository.get_page(),
+            lambda: ticket_repository.get_page("2030-01-01", tid),
+            lambda: ticket_repository.get_page(filters=TicketFilters(include_archived=True)),
+            lambda: ticket_repository.get_page(filters=TicketFilters(include_archived=True, theme_id=1)),
+            lambda: ticket_repository.get_many_by_ids([tid]),
+            lambda: ticket_repository.get_by_id(tid),
+            lambda: ticket_repository.get_description(tid),
+            lambda: ticket_repository.changes_since(0),
+            lambda: ticket_repository.update(ticket),
+            lambda: ticket_repository.set_archived(tid, True),
+            lambda: ticket_repository.delete(tid),
+        ]))
+
+    def test_deadline_queries_use_day_index(self):
+        self.add_ticket("plan", deadline="2030-01-01")
+        statements = self._capture([
+            lambda: ticket_repository.get_page(filters=TicketFilters(deadline="week")),
+            lambda: ticket_repository.get_page(filters=TicketFilters(deadline="overdue")),
+        ])
+        # Le planificateur peut préférer la plage sur deadline_day puis trier
+        # les quelques lignes retenues : on n'exige que l'absence de scan complet.
+        self._assert_no_full_scan(statements, allow_sort=True)
+        for sql in statements:
+            self.assertTrue(any("deadline_day" in d for d in self._plan(sql)), sql)
+
+    def test_stats_read_counters_by_key(self):
+        self.add_ticket("plan", theme="A", deadline="2030-01-01")
+        statements = self._capture([lambda: ticket_repository.stats()])
+        self._assert_no_full_scan(statements)
+        for sql in statements:
+            self.assertTrue(any("ticket_stats USING PRIMARY KEY" in d for d in self._plan(sql)), sql)
+
+    def test_postit_queries_use_indexes(self):
+        pid = postit_repository.add(PostIt(id=None, content="p", x=0, y=0, width=1, height=1, color="y"))
+        other = postit_repository.add(PostIt(id=None, content="q", x=0, y=0, width=1, height=1, color="y",
+                                             order_index=2048))
+        postit = PostIt(id=pid, content="p2", x=0, y=0, width=1, height=1, color="y")
+        self._assert_no_full_scan(self._capture([
+            lambda: postit_repository.get_all(),
+            lambda: postit_repository.get_max_order_index(),
+            lambda: postit_repository.move(pid, other),
+            lambda: postit_repository.move(pid),
+            lambda: postit_repository.update(postit),
+            lambda: postit_repository.update_order_indexes([pid]),
+            lambda: postit_repository.delete(pid),
+        ]))
+
+    def test_theme_and_note_queries_use_indexes(self):
+        theme = Theme(id=None, name="A", color="#fff")
+        theme.id = theme_repository.add(theme)
+        self._assert_no_full_scan(self._capture([
+            lambda: theme_repository.get_all(),
+            lambda: theme_repository.update(theme),
+            lambda: theme_repository.count_tickets(theme.id),
+            lambda: theme_repository.rename_in_tickets("A", "B"),
+            lambda: theme_repository.delete(theme.id),
+            lambda: note_repository.save_latest("hello"),
+            lambda: note_repository.get_latest(),
+            lambda: note_repository.save_revision("hello world" * 10, note_repository.get_head_id(), "hello"),
+            lambda: note_repository.get_head(),
+            lambda: note_repository.get_revisions(),
+            lambda: note_repository.get_revision_text(1),
+        ]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import contextlib
+import io
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+from test_database import DatabaseTestCase
+
+from ticket_app.api.client import ApiClient, ApiError
+from ticket_app.api.server import ENDPOINTS, ApiServer, Endpoint, main
+from ticket_app.services.theme_service import theme_service
+from ticket_app.services.ticket_service import ticket_service
+
+
+class ServerTests(DatabaseTestCase):
+    """Runs the API server on an ephemeral localhost port, in its own event loop."""
+
+    def setUp(self):
+        super().setUp()
+        ticket_service.clear_caches()
+        theme_service.refresh_cache()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server = ApiServer("127.0.0.1", 0)
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result(5)
+        self.client = ApiClient(f"http://127.0.0.1:{self.server.port}")
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        ticket_service.clear_caches()
+        super().tearDown()
+
+    def _create(self, title, **kwargs):
+        values = dict(title=title, description="", urgency="Basse", deadline=None, theme="")
+        values.update(kwargs)
+        return self.client.call("tickets", "create_ticket", **values)
+
+    def test_services_round_trip_as_json(self):
+        created = self._create("Imprimante", theme="Matériel", description="bourrage")
+        tickets = self.client.call("tickets", "get_all_tickets")
+        self.assertEqual([(t["id"], t["title"], t["theme"]) for t in tickets],
+                         [(created["id"], "Imprimante", "Matériel")])
+        ticket = tickets[0]
+        ticket["urgency"] = "Haute"
+        self.client.call("tickets", "update_ticket", ticket=ticket)
+        page = self.client.call("tickets", "get_ticket_page", filters={"urgency": "Haute"})
+        self.assertEqual([t["id"] for t in page], [created["id"]])
+        self.assertEqual(self.client.call("tickets", "get_description", ticket_id=created["id"]), "bourrage")
+        self.assertEqual([t["name"] for t in self.client.call("themes", "get_all")], ["Matériel"])
+
+        self.client.call("notes", "save_content", content="partagé")
+        self.assertEqual(self.client.call("notes", "get_current_content"), "partagé")
+        postit = self.client.call("postits", "create_postit", content="memo")
+        self.assertEqual([p["id"] for p in self.client.call("postits", "get_all_postits")], [postit["id"]])
+
+    def test_errors_are_reported_with_status(self):
+        with self.assertRaises(ApiError) as ctx:
+            self.client.call("tickets", "drop_database")
+        self.assertEqual(ctx.exception.status, 404)
+        with self.assertRaises(ApiError) as ctx:
+            self.client.call("tickets", "get_ticket", unknown=1)
+        self.assertEqual(ctx.exception.status, 400)
+
+    def test_service_errors_are_server_errors(self):
+        def broken(**kwargs):
+            raise TypeError("bogue du dépôt")
+        with mock.patch.dict(ENDPOINTS["tickets"], {"stats": Endpoint(broken)}), \
+                self.assertLogs("ticket_app.api.server", "ERROR"):
+            with self.assertRaises(ApiError) as ctx:
+                self.client.call("tickets", "stats")
+        self.assertEqual(ctx.exception.status, 500)
+
+    def test_stats_take_today_as_iso_date(self):
+        self._create("Échu", deadline="2024-03-01")
+        self._create("Demain", deadline="2024-03-11")
+        stats = self.client.call("tickets", "stats", today="2024-03-10")
+        self.assertEqual(stats["by_deadline"]["overdue"], 1)
+        with self.assertRaises(ApiError) as ctx:
+            self.client.call("tickets", "stats", today="10/03/2024")
+        self.assertEqual(ctx.exception.status, 400)
+
+    def test_token_is_required_when_configured(self):
+        server = ApiServer("127.0.0.1", 0, token="secret")
+        asyncio.run_coroutine_threadsafe(server.start(), self.loop).result(5)
+        try:
+            url = f"http://127.0.0.1:{server.port}"
+            for client in (ApiClient(url), ApiClient(url, token="autre")):
+                with self.assertRaises(ApiError) as ctx:
+                    client.call("tickets", "create_ticket", title="x", description="",
+                                urgency="Basse", deadline=None, theme="")
+                self.assertEqual(ctx.exception.status, 401)
+            self.assertEqual(ApiClient(url, token="secret").call("tickets", "get_all_tickets"), [])
+            # corps annoncé jamais envoyé : le 401 part sans l'attendre ni le lire
+            with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+                sock.sendall(b"POST /api/tickets/get_all_tickets HTTP/1.1\r\n"
+                             b"Content-Length: 50000000\r\n\r\n")
+                self.assertTrue(sock.recv(64).startswith(b"HTTP/1.1 401"))
+        finally:
+            asyncio.run_coroutine_threadsafe(server.close(), self.loop).result(5)
+
+    def test_lan_listening_needs_a_token(self):
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            main(["--host", "0.0.0.0", "--token", ""])
+
+    def test_long_poll_wakes_up_on_write(self):
+        token = self.client.call("tickets", "current_change_token")
+        revision = self.client.health()["revision"]
+        with ThreadPoolExecutor(1) as pool:
+            start = time.perf_counter()
+            waiting = pool.submit(self.client.wait_changes, token, revision, 20)
+            time.sleep(0.2)
+            created = self._create("Nouveau")
+            update = waiting.result(10)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual([t["id"] for t in update["changes"]["upserted"]], [created["id"]])
+        self.assertGreater(update["revision"], revision)
+
+    def test_long_poll_times_out_without_changes(self):
+        token = self.client.call("tickets", "current_change_token")
+        revision = self.client.health()["revision"]
+        update = self.client.wait_changes(token, revision, timeout=0.3)
+        self.assertEqual(update["changes"]["upserted"], [])
+        self.assertEqual(update["revision"], revision)
+
+    def test_concurrent_clients_write_without_lock_errors(self):
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda i: self._create(f"T{i}"), range(40)))
+        self.assertEqual(len(self.client.call("tickets", "get_all_tickets")), 40)
+        self.assertEqual(self.client.health()["writes"]["failures"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 import json
+import os
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from ticket_app import config
 from ticket_app.db import database
@@ -51,6 +53,54 @@ class SettingsStoreTests(unittest.TestCase):
         # DEFAULT_SETTINGS should remain intact
         self.assertTrue(settings_store.DEFAULT_SETTINGS["alerts"]["overdue"])
 
+    def _write(self, data):
+        with open(settings_store.SETTINGS_PATH, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def test_view_is_cached_and_read_only(self):
+        self._write({"language": "en"})
+        with mock.patch.object(settings_store, "_read", wraps=settings_store._read) as read:
+            first = settings_store.get_settings()
+            for _ in range(10):
+                self.assertIs(settings_store.get_settings(), first)
+                settings_store.get_alert_settings()
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual(first["language"], "en")
+        with self.assertRaises(TypeError):
+            first["alerts"]["day_of"] = False
+        # load_settings reste une copie modifiable
+        editable = settings_store.load_settings()
+        editable["alerts"]["day_of"] = False
+        self.assertTrue(settings_store.get_settings()["alerts"]["day_of"])
+
+    def test_external_edit_is_noticed_and_notified(self):
+        self._write({"language": "en"})
+        settings_store.get_settings()
+        received = []
+        settings_store.subscribe(received.append)
+        self.addCleanup(settings_store.unsubscribe, received.append)
+
+        self._write({"language": "fr", "alerts": {"overdue": False}})
+        st = os.stat(settings_store.SETTINGS_PATH)
+        # même taille et mtime inchangé à la résolution du système de fichiers : on le décale
+        os.utime(settings_store.SETTINGS_PATH, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        settings = settings_store.get_settings()
+        self.assertFalse(settings["alerts"]["overdue"])
+        self.assertEqual(received, [settings])
+        self.assertIs(received[0], settings)
+
+    def test_save_notifies_only_on_change(self):
+        received = []
+        settings_store.subscribe(received.append)
+        self.addCleanup(settings_store.unsubscribe, received.append)
+        settings = settings_store.load_settings()
+        settings["shortcuts"]["new"] = "Ctrl+Alt+N"
+        settings_store.save_settings(settings)
+        settings_store.save_settings(settings)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["shortcuts"]["new"], "Ctrl+Alt+N")
+        self.assertIs(settings_store.get_settings(), received[0])
+
 
 class ThemeRenameTests(unittest.TestCase):
 
@@ -65,6 +115,7 @@ class ThemeRenameTests(unittest.TestCase):
         self.theme_service = ThemeService()
 
     def tearDown(self):
+        database.close_connections()
         database.DB_PATH = self._orig_db_path
         config.DB_PATH = self._orig_config_db_path
         from ticket_app.services.theme_service import theme_service as global_theme_service
@@ -0,0 +1,564 @@
+import unittest
+from datetime import date, timedelta
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db import database, migrations
+from ticket_app.db.models import PostIt, Theme, Ticket, TicketFilters
+from ticket_app.db.migrations import POSTIT_ORDER_GAP
+from ticket_app.db.repositories import postit_repository, theme_repository, ticket_repository
+from ticket_app.services.postit_service import postit_service
+from ticket_app.utils.datetime_utils import epoch_day
+
+
+class TicketSearchTests(DatabaseTestCase):
+
+    def _titles(self, query, **kwargs):
+        return [t.title for t in ticket_repository.search(query, **kwargs)]
+
+    def test_prefix_match_on_title_theme_and_description(self):
+        self.add_ticket("Imprimante bloquée")
+        self.add_ticket("Autre", theme="Réseau")
+        self.add_ticket("Encore", description="journal de l'imprimante")
+        self.assertEqual(set(self._titles("impr")), {"Imprimante bloquée", "Encore"})
+        self.assertEqual(self._titles("reseau"), ["Autre"])
+
+    def test_all_words_must_match(self):
+        self.add_ticket("Serveur mail", theme="Infra")
+        self.add_ticket("Serveur web", theme="Web")
+        self.assertEqual(self._titles("serv infra"), ["Serveur mail"])
+
+    def test_index_follows_updates_and_deletes(self):
+        tid = self.add_ticket("Ancien titre")
+        ticket = ticket_repository.get_all()[0]
+        ticket.title = "Nouveau titre"
+        ticket_repository.update(ticket)
+        self.assertEqual(self._titles("ancien"), [])
+        self.assertEqual(self._titles("nouveau"), ["Nouveau titre"])
+        ticket_repository.delete(tid)
+        self.assertEqual(self._titles("nouveau"), [])
+
+    def test_archived_excluded_by_default(self):
+        tid = self.add_ticket("Archivé")
+        ticket_repository.set_archived(tid, True)
+        self.assertEqual(self._titles("archiv"), [])
+        self.assertEqual(self._titles("archiv", include_archived=True), ["Archivé"])
+
+    def test_punctuation_only_query_returns_nothing(self):
+        self.add_ticket("Quelque chose")
+        self.assertEqual(self._titles('" * -'), [])
+
+    def test_filter_bar_narrows_ranked_matches(self):
+        self.add_ticket("Serveur web", urgency="Haute", theme="A")
+        self.add_ticket("Serveur serveur serveur", urgency="Haute")
+        self.add_ticket("Serveur mail", urgency="Basse")
+        self.assertEqual(self._titles("serveur", filters=TicketFilters(urgency="Haute")),
+                         ["Serveur serveur serveur", "Serveur web"])
+        theme_a = next(t.id for t in theme_repository.get_all() if t.name == "A")
+        self.assertEqual(self._titles("serveur", filters=TicketFilters(theme_id=theme_a)), ["Serveur web"])
+        self.assertEqual(self._titles("serveur", filters=TicketFilters(ids=[])), [])
+
+
+class TicketPageTests(DatabaseTestCase):
+
+    def _walk(self, limit, filters=None):
+        pages, last = [], None
+        while True:
+            page = ticket_repository.get_page(
+                last.created_at if last else None, last.id if last else None,
+                limit=limit, filters=filters,
+            )
+            if not page:
+                return pages
+            pages.append([t.id for t in page])
+            last = page[-1]
+
+    def test_pages_cover_all_rows_in_list_order(self):
+        ids = [self.add_ticket(f"T{i}") for i in range(7)]
+        # même created_at pour la moitié : l'id départage
+        database.get_connection().execute(
+            "UPDATE tickets SET created_at = '2024-01-01 00:00:00' WHERE id <= 4"
+        )
+        database.get_connection().commit()
+        pages = self._walk(limit=3)
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        flat = [i for p in pages for i in p]
+        self.assertEqual(flat, sorted(ids[4:], reverse=True) + [4, 3, 2, 1])
+
+    def test_filters_are_applied_in_sql(self):
+        today = date.today()
+        self.add_ticket("urgent", urgency="Haute", theme="A", deadline=today.isoformat())
+        self.add_ticket("late", urgency="Basse", theme="A",
+                        deadline=(today - timedelta(days=3)).isoformat())
+        self.add_ticket("none", urgency="Basse", theme="B")
+        archived = self.add_ticket("archived urgent", urgency="Haute")
+        ticket_repository.set_archived(archived, True)
+
+        theme_a = next(t.id for t in theme_repository.get_all() if t.name == "A")
+
+        def titles(**kwargs):
+            return {t.title for t in ticket_repository.get_page(filters=TicketFilters(**kwargs))}
+
+        self.assertEqual(titles(urgency="Haute"), {"urgent"})
+        self.assertEqual(titles(urgency="Haute", include_archived=True), {"urgent", "archived urgent"})
+        self.assertEqual(titles(theme_id=theme_a), {"urgent", "late"})
+        self.assertEqual(titles(deadline="today"), {"urgent"})
+        self.assertEqual(titles(deadline="overdue"), {"late"})
+        self.assertEqual(titles(search="lat"), {"late"})
+
+
+class BulkOperationTests(DatabaseTestCase):
+
+    def _tickets(self, n):
+        return [Ticket(id=None, title=f"T{i}", description="", urgency="Basse",
+                       deadline=None, theme="") for i in range(n)]
+
+    def _commits_during(self, func):
+        statements = []
+        conn = database.get_connection()
+        conn.set_trace_callback(statements.append)
+        try:
+            func()
+        finally:
+            conn.set_trace_callback(None)
+        return sum(1 for s in statements if s.strip().upper() == "COMMIT")
+
+    def test_add_many_returns_ids_in_order(self):
+        self.add_ticket("existing")
+        tickets = self._tickets(5)
+        ids = ticket_repository.add_many(tickets)
+        by_id = {t.id: t.title for t in ticket_repository.get_all()}
+        self.assertEqual([by_id[i] for i in ids], [t.title for t in tickets])
+
+    def test_bulk_writes_commit_once(self):
+        ids = ticket_repository.add_many(self._tickets(50))
+        self.assertEqual(self._commits_during(lambda: ticket_repository.set_archived_many(ids, True)), 1)
+        self.assertEqual(ticket_repository.get_all(), [])
+        self.assertEqual(self._commits_during(lambda: ticket_repository.delete_many(ids)), 1)
+        self.assertEqual(ticket_repository.get_all(include_archived=True), [])
+
+    def test_kanban_move_leaves_the_search_index_alone(self):
+        ids = ticket_repository.add_many(self._tickets(20))
+        tickets = ticket_repository.get_all()
+        for t in tickets:
+            t.urgency = "Haute"
+        old_title, tickets[0].title = tickets[0].title, "Renommé"
+        conn = database.get_connection()
+        conn.execute("CREATE TEMP TABLE reindexed (id INTEGER)")
+        conn.execute("""
+            CREATE TEMP TRIGGER log_reindex AFTER UPDATE ON main.ticket_search BEGIN
+                INSERT INTO reindexed VALUES (new.id);
+            END
+        """)
+        ticket_repository.update_many(tickets)
+        # un seul ticket réindexé : celui dont le titre a changé
+        self.assertEqual(conn.execute("SELECT id FROM reindexed").fetchall(), [(tickets[0].id,)])
+        self.assertEqual([t.title for t in ticket_repository.search("renomme")], ["Renommé"])
+        self.assertEqual(ticket_repository.search(old_title), [])
+        self.assertEqual([t.id for t in ticket_repository.search("t3")], [ids[3]])
+
+    def test_failed_batch_is_rolled_back(self):
+        tickets = self._tickets(3)
+        tickets[2].title = None  # NOT NULL
+        with self.assertRaises(Exception):
+            ticket_repository.add_many(tickets)
+        self.assertEqual(ticket_repository.get_all(), [])
+
+    def test_postit_reorder_single_transaction(self):
+        ids = postit_repository.add_many([
+            PostIt(id=None, content=str(i), x=0, y=0, width=1, height=1, color="y")
+            for i in range(4)
+        ])
+        commits = self._commits_during(lambda: postit_repository.update_order_indexes(ids[::-1]))
+        self.assertEqual(commits, 1)
+        self.assertEqual([p.id for p in postit_repository.get_all()], ids[::-1])
+
+
+class PostItOrderTests(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [postit_service.create_postit(str(i)).id for i in range(50)]
+
+    def _order(self):
+        return [p.id for p in postit_repository.get_all()]
+
+    def test_move_writes_only_the_moved_postit(self):
+        conn = database.get_connection()
+        before = conn.total_changes
+        postit_repository.move(self.ids[40], after_id=self.ids[2])
+        self.assertEqual(conn.total_changes - before, 1)
+        expected = self.ids[:3] + [self.ids[40]] + self.ids[3:40] + self.ids[41:]
+        self.assertEqual(self._order(), expected)
+        postit_repository.move(self.ids[0], after_id=self.ids[-1])
+        postit_repository.move(self.ids[-2])
+        self.assertEqual(self._order()[0], self.ids[-2])
+        self.assertEqual(self._order()[-1], self.ids[0])
+
+    def test_exhausted_gap_triggers_rebalance(self):
+        # Toujours juste après le premier : l'écart est divisé par deux à chaque fois
+        expected = list(self.ids)
+        for pid in self.ids[-15:]:
+            postit_repository.move(pid, after_id=self.ids[0])
+            expected.remove(pid)
+            expected.insert(1, pid)
+        self.assertEqual(self._order(), expected)
+        keys = [p.order_index for p in postit_repository.get_all()]
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_new_postits_are_appended_with_a_gap(self):
+        last = postit_repository.get_all()[-1].order_index
+        self.assertEqual(postit_service.create_postit("fin").order_index, last + POSTIT_ORDER_GAP)
+
+    def test_migration_spreads_existing_keys(self):
+        conn = database.get_connection()
+        conn.execute("UPDATE postits SET order_index = 0")
+        conn.execute("UPDATE postits SET order_index = 1 WHERE id = ?", (self.ids[0],))
+        conn.execute("PRAGMA user_version = 10")
+        conn.commit()
+        migrations.migrate(conn)
+        self.assertEqual([p.order_index for p in postit_repository.get_all()],
+                         [(i + 1) * POSTIT_ORDER_GAP for i in range(50)])
+        self.assertEqual(self._order()[-1], self.ids[0])
+
+
+class ChangeFeedTests(DatabaseTestCase):
+
+    def test_idle_feed_is_empty(self):
+        self.add_ticket("a")
+        token = ticket_repository.current_change_token()
+        changes = ticket_repository.changes_since(token)
+        self.assertFalse(changes)
+        self.assertEqual(changes.token, token)
+
+    def test_reports_inserts_updates_and_deletes(self):
+        kept = self.add_ticket("kept")
+        gone = self.add_ticket("gone")
+        token = ticket_repository.current_change_token()
+
+        new = self.add_ticket("new")
+        ticket_repository.set_archived(kept, True)
+        ticket_repository.delete(gone)
+
+        changes = ticket_repository.changes_since(token)
+        self.assertEqual({t.id for t in changes.upserted}, {new, kept})
+        self.assertEqual(changes.deleted_ids, [gone])
+        self.assertTrue(next(t for t in changes.upserted if t.id == kept).archived)
+        self.assertFalse(ticket_repository.changes_since(changes.token))
+
+    def test_insert_then_delete_is_reported_as_delete(self):
+        token = ticket_repository.current_change_token()
+        tid = self.add_ticket("flash")
+        ticket_repository.delete(tid)
+        changes = ticket_repository.changes_since(token)
+        self.assertEqual(changes.upserted, [])
+        self.assertEqual(changes.deleted_ids, [tid])
+
+    def test_pruned_log_requests_full_reload(self):
+        token = ticket_repository.current_change_token()
+        self.add_ticket("a")
+        conn = database.get_connection()
+        conn.execute("DELETE FROM ticket_changes")
+        conn.execute("INSERT INTO ticket_changes (seq, ticket_id, op) VALUES (?, 1, 'U')", (token + 50,))
+        conn.commit()
+        self.assertTrue(ticket_repository.changes_since(token).full_reload)
+
+    def test_updated_at_is_maintained(self):
+        tid = self.add_ticket("a")
+        conn = database.get_connection()
+        conn.execute("UPDATE tickets SET updated_at = '2000-01-01 00:00:00' WHERE id = ?", (tid,))
+        conn.commit()
+        ticket_repository.set_archived(tid, True)
+        # archivé : la ligne vit désormais dans tickets_archive
+        updated_at = conn.execute("SELECT updated_at FROM tickets_archive WHERE id = ?", (tid,)).fetchone()[0]
+        self.assertGreater(updated_at, "2000-01-01 00:00:00")
+
+
+class ThemeReferenceTests(DatabaseTestCase):
+
+    def test_unknown_theme_is_created_and_referenced(self):
+        tid = self.add_ticket("t", theme="Nouveau")
+        theme = next(t for t in theme_repository.get_all() if t.name == "Nouveau")
+        ticket = ticket_repository.get_many_by_ids([tid])[0]
+        self.assertEqual((ticket.theme, ticket.theme_id), ("Nouveau", theme.id))
+
+    def test_rename_is_a_single_row_update(self):
+        theme = Theme(id=None, name="Old", color="#111111")
+        theme.id = theme_repository.add(theme)
+        for i in range(20):
+            self.add_ticket(f"T{i}", theme="Old")
+        conn = database.get_connection()
+        before = conn.total_changes
+        theme.name = "New"
+        theme_repository.update(theme)
+        self.assertEqual(conn.total_changes - before, 1)
+        self.assertEqual({t.theme for t in ticket_repository.get_all()}, {"New"})
+
+    def test_search_follows_theme_rename(self):
+        theme = Theme(id=None, name="Infrastructure", color="#111111")
+        theme.id = theme_repository.add(theme)
+        self.add_ticket("Serveur mail", theme="Infrastructure")
+        theme.name = "Réseau"
+        theme_repository.update(theme)
+        self.assertEqual([t.title for t in ticket_repository.search("reseau serv")], ["Serveur mail"])
+        self.assertEqual(ticket_repository.search("infra"), [])
+
+    def test_deleting_theme_clears_ticket_theme(self):
+        tid = self.add_ticket("t", theme="Temp")
+        theme = next(t for t in theme_repository.get_all() if t.name == "Temp")
+        ticket_repository.set_archived(self.add_ticket("vieux", theme="Temp"), True)
+        self.assertEqual(theme_repository.count_tickets(theme.id), 2)
+        theme_repository.delete(theme.id)
+        ticket = ticket_repository.get_many_by_ids([tid])[0]
+        self.assertEqual((ticket.theme, ticket.theme_id), (None, None))
+
+    def test_legacy_text_themes_are_migrated(self):
+        from pathlib import Path
+        from ticket_app.db import migrations
+        conn = database.connect(Path(self._tmpdir.name) / "v4.db")
+        for version, step in migrations.MIGRATIONS:
+            if version <= 4:
+                step(conn)
+        conn.execute("INSERT INTO themes (name, color) VALUES ('Known', '#123456')")
+        conn.execute("INSERT INTO tickets (title, theme) VALUES ('a', 'Known'), ('b', 'Free text'), ('c', NULL)")
+        conn.execute("PRAGMA user_version = 4")
+        conn.commit()
+        migrations.migrate(conn)
+        rows = conn.execute(
+            "SELECT t.title, th.name, th.color FROM tickets t LEFT JOIN themes th ON th.id = t.theme_id ORDER BY t.title"
+        ).fetchall()
+        self.assertEqual([tuple(r) for r in rows],
+                         [("a", "Known", "#123456"), ("b", "Free text", "#cccccc"), ("c", None, None)])
+        free_id = conn.execute("SELECT id FROM themes WHERE name = 'Free text'").fetchone()[0]
+        hits = conn.execute("SELECT rowid FROM tickets_fts WHERE tickets_fts MATCH ?",
+                            (f'theme_ref : "t{free_id}"',)).fetchall()
+        self.assertEqual(len(hits), 1)
+        conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class RowFactoryTests(DatabaseTestCase):
+    def test_readers_return_slotted_models(self):
+        self.add_ticket("Alpha", theme="Infra")
+        postit_repository.add(PostIt(None, "memo", 0, 0, 200, 150, "#ffff88", tags=None))
+        ticket = ticket_repository.get_all()[0]
+        self.assertFalse(hasattr(ticket, "__dict__"))
+        self.assertEqual((ticket.title, ticket.theme, ticket.archived), ("Alpha", "Infra", False))
+        self.assertIsInstance(theme_repository.get_all()[0], Theme)
+        postit = postit_repository.get_all()[0]
+        self.assertEqual((postit.content, postit.tags), ("memo", ""))
+
+
+class DeadlineDayTests(DatabaseTestCase):
+    def test_deadline_day_follows_text(self):
+        tid = self.add_ticket("a", deadline="1970-01-11")
+        self.add_ticket("none")
+        self.add_ticket("bad", deadline="n/a")
+        days = {t.title: t.deadline_day for t in ticket_repository.get_all()}
+        self.assertEqual(days, {"a": 10, "none": None, "bad": None})
+
+        ticket = ticket_repository.get_many_by_ids([tid])[0]
+        ticket.deadline = "2024-02-29"
+        ticket_repository.update(ticket)
+        updated = ticket_repository.get_many_by_ids([tid])[0]
+        self.assertEqual(updated.deadline_day, epoch_day(date(2024, 2, 29)))
+
+    def test_week_filter_bounds(self):
+        today = date.today()
+        monday = today - timedelta(days=today.weekday())
+        self.add_ticket("monday", deadline=monday.isoformat())
+        self.add_ticket("sunday", deadline=(monday + timedelta(days=6)).isoformat())
+        self.add_ticket("next", deadline=(monday + timedelta(days=7)).isoformat())
+        titles = {t.title for t in ticket_repository.get_page(filters=TicketFilters(deadline="week"))}
+        self.assertEqual(titles, {"monday", "sunday"})
+
+    def test_alert_counts(self):
+        today = date.today()
+        for i, delta in enumerate((-5, -1, 0, 0, 1, 2)):
+            self.add_ticket(f"t{i}", deadline=(today + timedelta(days=delta)).isoformat())
+        self.add_ticket("no deadline")
+        archived = self.add_ticket("archived", deadline=today.isoformat())
+        ticket_repository.set_archived(archived, True)
+        self.assertEqual(ticket_repository.deadline_alert_counts(),
+                         {"overdue": 2, "day_of": 2, "one_day_before": 1})
+
+
+class StatsTests(DatabaseTestCase):
+    """ticket_stats must always equal a recount of the active tickets."""
+
+    def _recount(self):
+        conn = database.get_connection()
+        rows = conn.execute("SELECT theme_id, urgency, deadline_day FROM tickets WHERE archived = 0").fetchall()
+        by_theme, by_urgency = {}, {}
+        for theme_id, urgency, _ in rows:
+            by_theme[theme_id] = by_theme.get(theme_id, 0) + 1
+            by_urgency[urgency] = by_urgency.get(urgency, 0) + 1
+        return len(rows), by_theme, by_urgency
+
+    def _assert_consistent(self):
+        stats = ticket_repository.stats()
+        total, by_theme, by_urgency = self._recount()
+        self.assertEqual(stats.total, total)
+        self.assertEqual({k: v for k, v in stats.by_theme.items() if v}, by_theme)
+        self.assertEqual({k: v for k, v in stats.by_urgency.items() if v}, by_urgency)
+        return stats
+
+    def test_counters_follow_every_write(self):
+        today = date.today()
+        a = self.add_ticket("a", theme="Infra", urgency="Haute", deadline=today.isoformat())
+        b = self.add_ticket("b", theme="Infra")
+        c = self.add_ticket("c", theme="Réseau", deadline=(today - timedelta(days=3)).isoformat())
+        self._assert_consistent()
+
+        ticket = ticket_repository.get_by_id(b)
+        ticket.theme, ticket.urgency, ticket.deadline = "Réseau", "Critique", today.isoformat()
+        ticket_repository.update(ticket)
+        stats = self._assert_consistent()
+        self.assertEqual(stats.by_deadline["today"], 2)
+
+        ticket_repository.set_archived(a, True)
+        self._assert_consistent()
+        ticket_repository.set_archived(a, False)
+        self._assert_consistent()
+        ticket_repository.delete(c)
+        stats = self._assert_consistent()
+        self.assertEqual((stats.total, stats.by_deadline["overdue"]), (2, 0))
+
+        infra = next(t for t in theme_repository.get_all() if t.name == "Infra")
+        theme_repository.delete(infra.id)  # ON DELETE SET NULL
+        self.assertEqual(self._assert_consistent().by_theme[None], 1)
+
+    def test_deadline_buckets_roll_over_with_the_day(self):
+        monday = date(2030, 1, 7)
+        self.add_ticket("lundi", deadline=monday.isoformat())
+        self.add_ticket("mardi", deadline=(monday + timedelta(days=1)).isoformat())
+        self.add_ticket("sans échéance")
+        stats = ticket_repository.stats(today=monday)
+        self.assertEqual(stats.by_deadline, {"today": 1, "week": 2, "overdue": 0, "tomorrow": 1})
+        stats = ticket_repository.stats(today=monday + timedelta(days=2))
+        self.assertEqual(stats.by_deadline, {"today": 0, "week": 2, "overdue": 2, "tomorrow": 0})
+
+    def test_empty_days_are_pruned(self):
+        tid = self.add_ticket("t", deadline="2030-01-01")
+        ticket_repository.delete(tid)
+        conn = database.get_connection()
+        self.assertEqual(conn.execute(
+            "SELECT COUNT(*) FROM ticket_stats WHERE dimension = 'deadline'").fetchone()[0], 0)
+
+
+class ArchivePartitionTests(DatabaseTestCase):
+    def _table_of(self, ticket_id):
+        conn = database.get_connection()
+        return [table for table in ("tickets", "tickets_archive")
+                if conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (ticket_id,)).fetchone()]
+
+    def test_archiving_moves_rows_between_tables(self):
+        keep = self.add_ticket("actif", theme="Infra", description="serveur")
+        old = self.add_ticket("ancien", theme="Infra", description="serveur")
+        ticket_repository.set_archived(old, True)
+        self.assertEqual(self._table_of(old), ["tickets_archive"])
+        self.assertEqual([t.title for t in ticket_repository.get_all()], ["actif"])
+        self.assertEqual({t.title for t in ticket_repository.get_all(include_archived=True)},
+                         {"actif", "ancien"})
+        # l'index plein texte suit la ligne déplacée
+        self.assertEqual([t.title for t in ticket_repository.search("serveur")], ["actif"])
+        self.assertEqual({t.title for t in ticket_repository.search("serveur", include_archived=True)},
+                         {"actif", "ancien"})
+
+        archived = ticket_repository.get_many_by_ids([old])[0]
+        self.assertTrue(archived.archived)
+        archived.title = "ancien modifié"
+        ticket_repository.update(archived)
+        self.assertEqual(ticket_repository.search("modifie", include_archived=True)[0].id, old)
+
+        ticket_repository.set_archived(old, False)
+        self.assertEqual(self._table_of(old), ["tickets"])
+        self.assertEqual({t.id for t in ticket_repository.get_all()}, {keep, old})
+        self.assertEqual(len(ticket_repository.search("serveur")), 2)
+
+    def test_pages_merge_both_tables_in_order(self):
+        ids = [self.add_ticket(f"t{i}") for i in range(7)]
+        ticket_repository.set_archived_many(ids[1::2], True)
+        seen, last = [], None
+        while True:
+            page = ticket_repository.get_page(
+                last.created_at if last else None, last.id if last else None,
+                limit=2, filters=TicketFilters(include_archived=True))
+            if not page:
+                break
+            seen += [t.id for t in page]
+            last = page[-1]
+        self.assertEqual(seen, sorted(ids, reverse=True))
+
+    def test_moves_are_updates_in_the_change_feed(self):
+        tid = self.add_ticket("a")
+        token = ticket_repository.current_change_token()
+        ticket_repository.set_archived(tid, True)
+        changes = ticket_repository.changes_since(token)
+        self.assertEqual(([t.id for t in changes.upserted], changes.deleted_ids), ([tid], []))
+        self.assertTrue(changes.upserted[0].archived)
+
+        token = changes.token
+        ticket_repository.delete(tid)
+        changes = ticket_repository.changes_since(token)
+        self.assertEqual(changes.deleted_ids, [tid])
+        self.assertEqual(ticket_repository.search("a", include_archived=True), [])
+
+    def test_migration_moves_existing_archived_tickets(self):
+        conn = database.get_connection()
+        tid = self.add_ticket("vieux", description="historique")
+        # état v6 : ticket archivé resté dans tickets
+        conn.execute("DROP TRIGGER ticket_changes_ad")
+        conn.execute("DELETE FROM tickets_archive")
+        for name in ("ticket_archive_changes_ai", "ticket_archive_changes_au", "ticket_archive_changes_ad",
+                     "ticket_stats_ai", "ticket_stats_ad", "ticket_stats_au_old", "ticket_stats_au_new"):
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute("DROP TABLE tickets_archive")
+        conn.execute("DROP TABLE ticket_stats")
+        conn.execute("UPDATE tickets SET archived = 1 WHERE id = ?", (tid,))
+        conn.execute("PRAGMA user_version = 6")
+        conn.commit()
+
+        migrations.migrate(conn)
+        self.assertEqual(self._table_of(tid), ["tickets_archive"])
+        self.assertEqual([t.id for t in ticket_repository.search("historique", include_archived=True)], [tid])
+        self.assertEqual(ticket_repository.stats().total, 0)
+
+
+class ProjectionTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tid = self.add_ticket("Log", description="trace " * 1000)
+
+    def test_lists_do_not_load_descriptions(self):
+        ticket_repository.set_archived(self.add_ticket("Vieux", description="x"), True)
+        readers = [
+            ticket_repository.get_all(include_archived=True),
+            ticket_repository.get_page(filters=TicketFilters(include_archived=True)),
+            ticket_repository.search("trace"),
+            ticket_repository.get_many_by_ids([self.tid]),
+        ]
+        for tickets in readers:
+            self.assertTrue(tickets)
+            self.assertTrue(all(t.description is None for t in tickets))
+
+    def test_description_is_read_by_id(self):
+        self.assertEqual(ticket_repository.get_description(self.tid), "trace " * 1000)
+        self.assertEqual(ticket_repository.get_by_id(self.tid).description, "trace " * 1000)
+        ticket_repository.set_archived(self.tid, True)
+        self.assertEqual(ticket_repository.get_description(self.tid), "trace " * 1000)
+        self.assertIsNone(ticket_repository.get_description(self.tid + 1))
+        self.assertIsNone(ticket_repository.get_by_id(self.tid + 1))
+
+    def test_updating_a_list_ticket_keeps_its_description(self):
+        ticket = ticket_repository.get_all()[0]
+        ticket.title = "Log renommé"
+        ticket_repository.update(ticket)
+        self.assertEqual(ticket_repository.get_description(self.tid), "trace " * 1000)
+        ticket.description = ""
+        ticket_repository.update(ticket)
+        self.assertEqual(ticket_repository.get_description(self.tid), "")
+
@@ -0,0 +1,108 @@
+import unittest
+
+from test_database import DatabaseTestCase
+
+from ticket_app.db.repositories import ticket_repository
+from ticket_app.services import ticket_service as service_module
+from ticket_app.services.ticket_service import ticket_service
+
+
+class DescriptionCacheTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ticket_service.clear_caches()
+        self.tid = self.add_ticket("Log", description="avant")
+
+    def tearDown(self):
+        ticket_service.clear_caches()
+        super().tearDown()
+
+    def test_description_is_cached_after_first_read(self):
+        self.assertIsNone(ticket_service.cached_description(self.tid))
+        self.assertEqual(ticket_service.get_description(self.tid), "avant")
+        self.assertEqual(ticket_service.cached_description(self.tid), "avant")
+
+    def test_service_writes_invalidate(self):
+        ticket_service.get_description(self.tid)
+        ticket = ticket_repository.get_by_id(self.tid)
+        ticket.description = "après"
+        ticket_service.update_ticket(ticket)
+        self.assertIsNone(ticket_service.cached_description(self.tid))
+        self.assertEqual(ticket_service.get_description(self.tid), "après")
+
+    def test_change_feed_invalidates_foreign_writes(self):
+        token = ticket_service.current_change_token()
+        ticket_service.get_description(self.tid)
+        # écriture hors service (autre instance de l'application)
+        ticket = ticket_repository.get_by_id(self.tid)
+        ticket.description = "ailleurs"
+        ticket_repository.update(ticket)
+        ticket_service.changes_since(token)
+        self.assertEqual(ticket_service.get_description(self.tid), "ailleurs")
+
+    def test_cache_is_bounded(self):
+        ids = [self.add_ticket(f"T{i}", description=str(i))
+               for i in range(service_module.DESCRIPTION_CACHE_SIZE + 1)]
+        for tid in ids:
+            ticket_service.get_description(tid)
+        self.assertIsNone(ticket_service.cached_description(ids[0]))
+        self.assertEqual(ticket_service.cached_description(ids[-1]), str(len(ids) - 1))
+
+
+
+class IdentityMapTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ticket_service.clear_caches()
+        self.tid = self.add_ticket("Partagé", theme="Infra")
+
+    def tearDown(self):
+        ticket_service.clear_caches()
+        super().tearDown()
+
+    def test_views_share_one_object_per_id(self):
+        listed = ticket_service.get_all_tickets()[0]
+        self.assertIs(ticket_service.get_ticket_page()[0], listed)
+        self.assertIs(ticket_service.get_ticket(self.tid), listed)
+        self.assertIs(ticket_service.search_tickets("partagé")[0], listed)
+
+    def test_reads_refresh_the_shared_object_in_place(self):
+        shared = ticket_service.get_ticket(self.tid)
+        shared.description = "chargée"
+        ticket = ticket_repository.get_by_id(self.tid)
+        ticket.title = "Renommé"
+        ticket_repository.update(ticket)  # hors service : pas d'éviction
+        self.assertIs(ticket_service.get_all_tickets()[0], shared)
+        self.assertEqual(shared.title, "Renommé")
+        self.assertEqual(shared.description, "chargée")
+
+    def test_service_writes_evict(self):
+        shared = ticket_service.get_ticket(self.tid)
+        ticket_service.archive_ticket(self.tid)
+        fresh = ticket_service.get_ticket(self.tid)
+        self.assertIsNot(fresh, shared)
+        self.assertTrue(fresh.archived)
+        ticket_service.delete_ticket(self.tid)
+        self.assertIsNone(ticket_service.get_ticket(self.tid))
+
+    def test_get_tickets_keeps_order_and_fetches_misses_once(self):
+        other = self.add_ticket("Autre")
+        ticket_service.get_ticket(self.tid)
+        tickets = ticket_service.get_tickets([other, self.tid, other + 100])
+        self.assertEqual([t.id for t in tickets], [other, self.tid])
+        self.assertIs(ticket_service.get_ticket(other), tickets[0])
+
+    def test_map_is_bounded(self):
+        ids = [self.add_ticket(f"T{i}") for i in range(5)]
+        original = service_module.TICKET_CACHE_SIZE
+        service_module.TICKET_CACHE_SIZE = 3
+        try:
+            first = ticket_service.get_ticket(ids[0])
+            ticket_service.get_tickets(ids[1:])
+            self.assertIsNot(ticket_service.get_ticket(ids[0]), first)
+        finally:
+            service_module.TICKET_CACHE_SIZE = original
+
+
+if __name__ == "__main__":
+    unittest.main()
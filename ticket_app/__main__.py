@@ -10,7 +10,16 @@ if __package__ in (None, ""):
             sys.path.insert(0, p_str)
     __package__ = "ticket_app"
 
-from .main import main
+
+def run():
+    # "serve" : serveur API sans interface (PySide6 n'est alors pas importé)
+    if sys.argv[1:2] == ["serve"]:
+        from .api.server import main as serve
+        serve(sys.argv[2:])
+    else:
+        from .main import main
+        main()
+
 
 if __name__ == "__main__":
-    main()
+    run()
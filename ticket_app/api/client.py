@@ -0,0 +1,57 @@
+"""
+Minimal client for the local API server (api/server.py), standard library only.
+
+    client = ApiClient("http://192.168.1.10:8765", token="...")
+    tickets = client.call("tickets", "get_all_tickets")
+    update = client.wait_changes(token, revision, timeout=30)
+
+Results are the JSON values returned by the server: models arrive as dicts.
+"""
+
+import json
+import urllib.error
+import urllib.request
+from typing import Any, Dict, Optional
+
+
+class ApiError(Exception):
+    """The server answered with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class ApiClient:
+
+    def __init__(self, base_url: str, timeout: float = 10.0, token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = token
+
+    def _request(self, path: str, body: Optional[bytes] = None, timeout: Optional[float] = None) -> Any:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ApiError(e.code, message) from None
+
+    def call(self, service: str, method: str, **kwargs) -> Any:
+        body = json.dumps(kwargs, ensure_ascii=False).encode("utf-8")
+        return self._request(f"/api/{service}/{method}", body)["result"]
+
+    def wait_changes(self, token: int, revision: int, timeout: float = 30.0) -> Dict[str, Any]:
+        """Long poll: {"revision": int, "changes": {token, upserted, deleted_ids, full_reload}}."""
+        return self._request(f"/api/changes?token={token}&revision={revision}&timeout={timeout}",
+                             timeout=timeout + self.timeout)
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("/api/health")
@@ -0,0 +1,382 @@
+"""
+Local HTTP/JSON server exposing the services to several desktop clients.
+
+    python -m ticket_app serve [--host 0.0.0.0] [--port 8765] [--db path] [--token T]
+
+One process owns the SQLite file; clients on the LAN talk to it instead of
+sharing the file. The clients are scripts and tools using api/client.py: the
+desktop app still opens its own database file and has no remote mode.
+
+With a token (``--token`` or the TICKET_APP_API_TOKEN variable, required to
+listen beyond localhost), every request must carry
+``Authorization: Bearer <token>``; otherwise it is answered with 401. Routes:
+
+- ``POST /api/<service>/<method>``: call a whitelisted service method. The body
+  is a JSON object of keyword arguments, the response ``{"result": ...}``.
+- ``GET /api/changes?token=T&revision=R&timeout=S``: long poll. Answers as soon
+  as a ticket changed after token T or any write happened since revision R,
+  at the latest after S seconds.
+- ``GET /api/health``: revision and write lock metrics (database.write_stats).
+
+Reads run on a small thread pool, each thread with its pooled connection.
+Writes all go through a single writer thread: one connection writes, so
+clients never contend for the database lock.
+"""
+
+import argparse
+import asyncio
+import hmac
+import inspect
+import ipaddress
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, is_dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .. import config
+from ..db import database
+from ..db.models import PostIt, Theme, Ticket, TicketFilters
+from ..services.note_service import note_service
+from ..services.postit_service import postit_service
+from ..services.theme_service import theme_service
+from ..services.ticket_service import ticket_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+READ_THREADS = 4
+# Borne d'une requête de changements (s) ; revérification même sans écriture
+# locale, pour les écritures faites hors serveur.
+MAX_POLL_TIMEOUT = 60.0
+POLL_RECHECK = 1.0
+MAX_BODY = 64 * 1024 * 1024
+# Corps lu (et jeté) avant un 401, pour que le client reçoive la réponse ; au-delà on coupe
+MAX_UNAUTHENTICATED_BODY = 64 * 1024
+TOKEN_ENV = "TICKET_APP_API_TOKEN"
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+@dataclass(slots=True)
+class Endpoint:
+    fn: Callable[..., Any]
+    write: bool = False
+    # paramètre -> modèle reconstruit depuis le JSON (objet ou liste d'objets,
+    # date au format ISO)
+    models: Dict[str, type] = field(default_factory=dict)
+
+
+def _read(fn, **models) -> Endpoint:
+    return Endpoint(fn, False, models)
+
+
+def _write(fn, **models) -> Endpoint:
+    return Endpoint(fn, True, models)
+
+
+def _themes():
+    # Créer un ticket peut créer son thème : le cache est relu comme dans l'interface
+    theme_service.refresh_cache()
+    return theme_service.get_all()
+
+
+def _theme_colors():
+    theme_service.refresh_cache()
+    return theme_service.get_theme_colors()
+
+
+ENDPOINTS: Dict[str, Dict[str, Endpoint]] = {
+    "tickets": {
+        "get_all_tickets": _read(ticket_service.get_all_tickets),
+        "get_ticket_page": _read(ticket_service.get_ticket_page, filters=TicketFilters),
+        "get_ticket": _read(ticket_service.get_ticket),
+        "get_tickets": _read(ticket_service.get_tickets),
+        "get_description": _read(ticket_service.get_description),
+        "search_tickets": _read(ticket_service.search_tickets, filters=TicketFilters),
+        "current_change_token": _read(ticket_service.current_change_token),
+        "changes_since": _read(ticket_service.changes_since),
+        "poll_changes": _read(ticket_service.poll_changes, filters=TicketFilters),
+        "stats": _read(ticket_service.stats, today=date),
+        "deadline_alert_counts": _read(ticket_service.deadline_alert_counts),
+        "create_ticket": _write(ticket_service.create_ticket),
+        "update_ticket": _write(ticket_service.update_ticket, ticket=Ticket),
+        "archive_ticket": _write(ticket_service.archive_ticket),
+        "unarchive_ticket": _write(ticket_service.unarchive_ticket),
+        "delete_ticket": _write(ticket_service.delete_ticket),
+        "create_tickets": _write(ticket_service.create_tickets, tickets=Ticket),
+        "update_tickets": _write(ticket_service.update_tickets, tickets=Ticket),
+        "archive_tickets": _write(ticket_service.archive_tickets),
+        "unarchive_tickets": _write(ticket_service.unarchive_tickets),
+        "delete_tickets": _write(ticket_service.delete_tickets),
+    },
+    "themes": {
+        "get_all": _read(_themes),
+        "get_theme_colors": _read(_theme_colors),
+        "count_tickets": _read(theme_service.count_tickets),
+        "create": _write(theme_service.create),
+        "update": _write(theme_service.update, theme=Theme),
+        "delete": _write(theme_service.delete),
+    },
+    "postits": {
+        "get_all_postits": _read(postit_service.get_all_postits),
+        "create_postit": _write(postit_service.create_postit),
+        "update_postit": _write(postit_service.update_postit, postit=PostIt),
+        "delete_postit": _write(postit_service.delete_postit),
+        "reorder_postits": _write(postit_service.reorder_postits),
+        "move_postit": _write(postit_service.move_postit),
+        "create_postits": _write(postit_service.create_postits, postits=PostIt),
+        "update_postits": _write(postit_service.update_postits, postits=PostIt),
+        "delete_postits": _write(postit_service.delete_postits),
+    },
+    "notes": {
+        "get_current_content": _read(note_service.get_current_content),
+        "save_content": _write(note_service.save_content),
+        "get_history": _read(note_service.get_history),
+        "get_revision_content": _read(note_service.get_revision_content),
+        "restore_revision": _write(note_service.restore_revision),
+    },
+}
+
+
+class RequestError(Exception):
+    """Client error, answered with its status and message."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Non sérialisable : {type(value).__name__}")
+
+
+def encode_json(value: Any) -> bytes:
+    return json.dumps(value, default=_json_default, ensure_ascii=False).encode("utf-8")
+
+
+def _build_kwargs(endpoint: Endpoint, body: bytes) -> Dict[str, Any]:
+    try:
+        kwargs = json.loads(body) if body else {}
+    except ValueError as e:
+        raise RequestError(400, f"JSON invalide : {e}") from e
+    if not isinstance(kwargs, dict):
+        raise RequestError(400, "Le corps doit être un objet JSON")
+    try:
+        for name, model in endpoint.models.items():
+            value = kwargs.get(name)
+            if isinstance(value, list):
+                kwargs[name] = [model(**item) for item in value]
+            elif isinstance(value, dict):
+                kwargs[name] = model(**value)
+            elif isinstance(value, str) and model is date:
+                kwargs[name] = date.fromisoformat(value)
+        # arguments vérifiés ici : une TypeError levée par le service est une erreur serveur
+        inspect.signature(endpoint.fn).bind(**kwargs)
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, str(e)) from e
+    return kwargs
+
+
+class ApiServer:
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 read_threads: int = READ_THREADS, token: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self._authorization = f"Bearer {token}".encode("utf-8") if token else None
+        self._readers = ThreadPoolExecutor(read_threads, thread_name_prefix="api-reader")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="api-writer")
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Compteur d'écritures servies ; l'événement est remplacé à chaque écriture
+        self.revision = 0
+        self._changed: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        self._changed = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("API en écoute sur http://%s:%d", self.host, self.port)
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._readers.shutdown(wait=True, cancel_futures=True)
+        self._writer.shutdown(wait=True)
+
+    # -- Exécution --
+
+    async def _run(self, endpoint: Endpoint, kwargs: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        pool = self._writer if endpoint.write else self._readers
+        # sérialisé dans le thread : les objets partagés (identity map) n'y bougent pas
+        result = await loop.run_in_executor(pool, lambda: encode_json({"result": endpoint.fn(**kwargs)}))
+        if endpoint.write:
+            self.revision += 1
+            changed, self._changed = self._changed, asyncio.Event()
+            changed.set()
+        return result
+
+    async def _wait_changes(self, token: int, revision: int, timeout: float) -> bytes:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(max(timeout, 0.0), MAX_POLL_TIMEOUT)
+        while True:
+            changes = await loop.run_in_executor(self._readers, ticket_service.changes_since, token)
+            remaining = deadline - loop.time()
+            if changes or self.revision != revision or remaining <= 0:
+                return encode_json({"revision": self.revision, "changes": changes})
+            try:
+                await asyncio.wait_for(self._changed.wait(), min(POLL_RECHECK, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> bytes:
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        if parts[:1] != ["api"]:
+            raise RequestError(404, f"Route inconnue : {url.path}")
+        if parts[1:] == ["health"]:
+            return encode_json({"status": "ok", "revision": self.revision,
+                                "writes": asdict(database.write_stats())})
+        if parts[1:] == ["changes"]:
+            if method != "GET":
+                raise RequestError(405, "GET attendu")
+            query = parse_qs(url.query)
+            try:
+                token = int(query.get("token", ["0"])[0])
+                revision = int(query.get("revision", [str(self.revision)])[0])
+                timeout = float(query.get("timeout", ["30"])[0])
+            except ValueError as e:
+                raise RequestError(400, str(e)) from e
+            return await self._wait_changes(token, revision, timeout)
+        if len(parts) != 3:
+            raise RequestError(404, f"Route inconnue : {url.path}")
+        endpoint = ENDPOINTS.get(parts[1], {}).get(parts[2])
+        if endpoint is None:
+            raise RequestError(404, f"Méthode inconnue : {parts[1]}.{parts[2]}")
+        if method != "POST":
+            raise RequestError(405, "POST attendu")
+        return await self._run(endpoint, _build_kwargs(endpoint, body))
+
+    # -- HTTP --
+
+    def _check_token(self, headers: Dict[str, str]) -> None:
+        if self._authorization is None:
+            return
+        # comparaison à temps constant : le jeton ne se devine pas octet par octet
+        given = headers.get("authorization", "").encode("latin-1")
+        if not hmac.compare_digest(given, self._authorization):
+            raise RequestError(401, "Jeton d'accès manquant ou invalide")
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        request_line = await reader.readline()
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError as e:
+            raise RequestError(400, "Requête HTTP invalide") from e
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError as e:
+            raise RequestError(400, "Content-Length invalide") from e
+        try:
+            self._check_token(headers)
+        except RequestError:
+            # jamais plus que cette borne en mémoire pour un client non authentifié
+            if 0 < length <= MAX_UNAUTHENTICATED_BODY:
+                await reader.readexactly(length)
+            raise
+        if length > MAX_BODY:
+            raise RequestError(413, "Corps de requête trop volumineux")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        status = 200
+        try:
+            method, target, body = await self._read_request(reader)
+            payload = await self._dispatch(method, target, body)
+        except RequestError as e:
+            status, payload = e.status, encode_json({"error": str(e)})
+        except asyncio.IncompleteReadError:
+            writer.close()
+            return
+        except Exception as e:
+            logger.exception("Erreur pendant une requête API")
+            status, payload = 500, encode_json({"error": str(e)})
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n")
+        try:
+            writer.write(head.encode("latin-1") + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def _serve(host: str, port: int, token: Optional[str]) -> None:
+    server = ApiServer(host, port, token=token)
+    await server.start()
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m ticket_app serve",
+                                     description="Serveur HTTP/JSON partageant une base ticket_app.")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="adresse d'écoute (0.0.0.0 pour le réseau local)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", type=Path, help="fichier de base (défaut : celui de l'application)")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                        help=f"jeton exigé des clients (défaut : variable {TOKEN_ENV})")
+    args = parser.parse_args(argv)
+    if not args.token and not _is_loopback(args.host):
+        parser.error(f"--token (ou {TOKEN_ENV}) est requis pour écouter hors de localhost")
+
+    from ..utils.logging_utils import setup_logging
+    setup_logging()
+    if args.db is not None:
+        database.DB_PATH = config.DB_PATH = args.db
+    database.init_db()
+    theme_service.refresh_cache()
+    try:
+        asyncio.run(_serve(args.host, args.port, args.token))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        database.close_connections(optimize=True)
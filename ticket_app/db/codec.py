@@ -0,0 +1,64 @@
+"""
+Transparent compression of large text values (ticket descriptions, notes).
+
+Short values are stored as TEXT, unchanged. From COMPRESS_THRESHOLD bytes on,
+encode() returns a BLOB: one format byte followed by the compressed UTF-8
+payload. A column can therefore hold both kinds of value, and decode() tells
+them apart by their type.
+
+The decoder is also registered as the SQL function decompress_text() on every
+connection (see database.connect), for the repositories' reads. No trigger or
+other schema object calls it: a connection without it can still write.
+"""
+
+import lzma
+import sqlite3
+import zlib
+from typing import Optional, Union
+
+# En dessous (octets UTF-8), le texte tient dans la page de sa ligne : stocké tel quel
+COMPRESS_THRESHOLD = 4096
+
+# Octet de format en tête du BLOB
+ZLIB = b"z"
+LZMA = b"x"
+METHODS = {"zlib": ZLIB, "lzma": LZMA}
+DEFAULT_METHOD = "zlib"
+
+StoredText = Union[str, bytes, None]
+
+
+def encode(text: Optional[str], method: Optional[str] = None,
+           threshold: Optional[int] = None) -> StoredText:
+    """
+    Value to store for text: the text itself, or a marked compressed BLOB.
+    method and threshold default to DEFAULT_METHOD and COMPRESS_THRESHOLD.
+    """
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if len(data) < (COMPRESS_THRESHOLD if threshold is None else threshold):
+        return text
+    marker = METHODS[method or DEFAULT_METHOD]
+    payload = zlib.compress(data, 6) if marker == ZLIB else lzma.compress(data, preset=1)
+    # Texte incompressible (déjà compressé, base64…) : on garde le TEXT lisible
+    if len(payload) + 1 >= len(data):
+        return text
+    return marker + payload
+
+
+def decode(value: StoredText) -> Optional[str]:
+    """Inverse of encode(); TEXT values pass through."""
+    if not isinstance(value, bytes):
+        return value
+    marker, payload = value[:1], value[1:]
+    if marker == ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == LZMA:
+        return lzma.decompress(payload).decode("utf-8")
+    raise ValueError(f"Format de texte compressé inconnu : {marker!r}")
+
+
+def register(conn: sqlite3.Connection) -> None:
+    """Make decompress_text() available to SQL on conn (readers)."""
+    conn.create_function("decompress_text", 1, decode, deterministic=True)
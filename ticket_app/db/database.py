@@ -1,78 +1,308 @@
+import atexit
+import logging
+import random
 import sqlite3
-from . import models  # pour les dataclasses si besoin
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from . import codec
 from ..config import DB_PATH
+from .migrations import migrate
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+logger = logging.getLogger(__name__)
+
+# Profil PRAGMA appliqué à chaque connexion ouverte par l'application.
+# journal_mode=WAL est persistant dans le fichier, les autres sont par connexion.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),       # ~16 Mo de cache de pages
+    ("mmap_size", 268435456),     # 256 Mo mappés en mémoire
+    ("busy_timeout", 5000),       # ms
+    ("temp_store", "MEMORY"),
+    ("foreign_keys", "ON"),       # tickets.theme_id -> themes.id
+    ("analysis_limit", 400),      # ANALYZE par échantillon (PRAGMA optimize à la fermeture)
+)
+
+
+def connect(path=None) -> sqlite3.Connection:
+    """Open a new tuned connection (not pooled). The caller owns it."""
+    # Lignes en tuples : les repositories installent leurs fabriques (db/rows.py).
+    conn = sqlite3.connect(path or DB_PATH, check_same_thread=False)
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    codec.register(conn)  # decompress_text(), utilisée par les lectures des repositories
     return conn
 
-def init_db():
+
+class ConnectionManager:
+    """
+    Hands out one long-lived connection per thread and per database path.
+    Connections are reused across repository calls and closed together
+    by close_all() (app exit, DB reset/import).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: list[sqlite3.Connection] = []
+
+    def get(self) -> sqlite3.Connection:
+        # DB_PATH est relu à chaque appel : les tests le remplacent à chaud.
+        key = str(DB_PATH)
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get(key)
+        if conn is None:
+            conn = connect(key)
+            conns[key] = conn
+            with self._lock:
+                self._all.append(conn)
+        return conn
+
+    def release(self) -> None:
+        """Close the current thread's connection (threads that end before close_all)."""
+        conn = getattr(self._local, "conns", {}).pop(str(DB_PATH), None)
+        if conn is None:
+            return
+        with self._lock:
+            if conn in self._all:
+                self._all.remove(conn)
+        conn.close()
+
+    def close_all(self, optimize: bool = False) -> None:
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                if optimize:
+                    # Chaque connexion connaît les requêtes qu'elle a servies :
+                    # optimize n'analyse que les tables qui en profiteraient.
+                    conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error:
+                pass
+        # Les dictionnaires par thread référencent des connexions fermées :
+        # on repart d'un état vide (les autres threads recréeront à la demande).
+        self._local = threading.local()
+
+
+connection_manager = ConnectionManager()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Return the pooled connection of the current thread. Do not close it."""
+    return connection_manager.get()
+
+
+def close_connections(optimize: bool = False) -> None:
+    """Close every pooled connection; optimize=True refreshes planner statistics first (exit)."""
+    connection_manager.close_all(optimize)
+
+
+def release_connection() -> None:
+    """Close the calling thread's pooled connection, e.g. at the end of a one-off thread."""
+    connection_manager.release()
+
+
+atexit.register(close_connections, optimize=True)
+
+
+# Contention en écriture. Dans le processus, les écrivains passent un par un,
+# dans leur ordre d'arrivée (write_gate). Entre processus (deuxième instance,
+# script), BEGIN IMMEDIATE attend busy_timeout puis est retenté avec un recul
+# exponentiel borné avant d'abandonner sur DatabaseBusyError.
+WRITE_RETRIES = 3
+WRITE_BACKOFF = 0.05          # s, doublé à chaque nouvelle tentative
+WRITE_BACKOFF_MAX = 1.0       # s
+WRITE_GATE_TIMEOUT = 60.0     # s d'attente au plus derrière un écrivain du processus
+SLOW_WRITE_WAIT = 1.0         # s : au-delà, l'attente est journalisée
+
+
+class DatabaseBusyError(sqlite3.OperationalError):
+    """The write lock could not be obtained within the retry budget."""
+
+
+class WriteGate:
+    """
+    FIFO lock serializing the process's writers: the head of the queue holds
+    it. Unlike threading.Lock, a burst of writes is served in arrival order.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._queue)
+
+    def acquire(self, timeout: float = None) -> bool:
+        waiter = object()
+        with self._cond:
+            self._queue.append(waiter)
+            if self._cond.wait_for(lambda: self._queue[0] is waiter, timeout):
+                return True
+            self._queue.remove(waiter)
+            self._cond.notify_all()
+            return False
+
+    def release(self) -> None:
+        with self._cond:
+            self._queue.popleft()
+            self._cond.notify_all()
+
+    def __enter__(self):
+        if not self.acquire(WRITE_GATE_TIMEOUT):
+            raise DatabaseBusyError("Écriture en attente depuis trop longtemps")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+write_gate = WriteGate()
+
+
+@dataclass(slots=True)
+class WriteStats:
+    """Write transactions since start (or reset_write_stats()) and their lock waits."""
+    transactions: int = 0
+    contended: int = 0            # ont attendu un autre écrivain
+    busy_retries: int = 0         # BEGIN IMMEDIATE refusés (SQLITE_BUSY) puis retentés
+    failures: int = 0             # abandonnées sur DatabaseBusyError
+    wait_total: float = 0.0       # s
+    wait_max: float = 0.0         # s
+
+    @property
+    def wait_mean(self) -> float:
+        return self.wait_total / self.transactions if self.transactions else 0.0
+
+
+_write_stats = WriteStats()
+_write_stats_lock = threading.Lock()
+
+
+def write_stats() -> WriteStats:
+    """Snapshot of the write path metrics."""
+    with _write_stats_lock:
+        return replace(_write_stats)
+
+
+def reset_write_stats() -> None:
+    global _write_stats
+    with _write_stats_lock:
+        _write_stats = WriteStats()
+
+
+def _record_write(wait: float, contended: bool, retries: int, failed: bool = False) -> None:
+    with _write_stats_lock:
+        stats = _write_stats
+        stats.transactions += 1
+        stats.contended += contended
+        stats.busy_retries += retries
+        stats.failures += failed
+        stats.wait_total += wait
+        stats.wait_max = max(stats.wait_max, wait)
+    if wait >= SLOW_WRITE_WAIT:
+        logger.warning("Verrou d'écriture obtenu après %.2f s (%d nouvelle(s) tentative(s))", wait, retries)
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is None:
+        return "locked" in str(error) or "busy" in str(error)
+    return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+def _begin_write(conn: sqlite3.Connection) -> None:
+    """Take the write gate, then the database write lock (BEGIN IMMEDIATE)."""
+    start = time.perf_counter()
+    queued = write_gate.busy
+    if not write_gate.acquire(WRITE_GATE_TIMEOUT):
+        _record_write(time.perf_counter() - start, True, 0, failed=True)
+        raise DatabaseBusyError("Écriture en attente depuis trop longtemps")
+    retries = 0
+    delay = WRITE_BACKOFF
+    while True:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            break
+        except sqlite3.OperationalError as e:
+            busy = _is_busy(e)
+            if busy and retries < WRITE_RETRIES:
+                retries += 1
+                # Gigue : deux processus en recul ne se retrouvent pas au même instant
+                time.sleep(min(delay, WRITE_BACKOFF_MAX) * random.uniform(0.5, 1.0))
+                delay *= 2
+                continue
+            write_gate.release()
+            _record_write(time.perf_counter() - start, True, retries, failed=busy)
+            if busy:
+                raise DatabaseBusyError(str(e)) from e
+            raise
+    _record_write(time.perf_counter() - start, queued or retries > 0, retries)
+
+
+_tx_state = threading.local()
+
+
+@contextmanager
+def transaction():
+    """
+    Unit of work on the current thread's pooled connection.
+
+    The outermost scope opens a write transaction and commits once on exit
+    (rollback on exception). Nested scopes - repositories called from a
+    service that already opened one - join it through a SAVEPOINT, so an
+    inner failure can be caught without losing the outer work.
+
+    Outermost scopes are serialized through write_gate and retry a busy
+    database (another process writing) with bounded backoff; see write_stats().
+    """
     conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS tickets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            urgency TEXT,
-            deadline TEXT,
-            theme TEXT,
-            archived INTEGER DEFAULT 0,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    try:
-        cur.execute("ALTER TABLE tickets ADD COLUMN archived INTEGER DEFAULT 0")
-    except sqlite3.OperationalError:
-        # colonne déjà présente
-        pass
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS notes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            content TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS postits (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            content TEXT,
-            x INTEGER,
-            y INTEGER,
-            width INTEGER,
-            height INTEGER,
-            color TEXT,
-            tags TEXT DEFAULT '',
-            order_index INTEGER DEFAULT 0,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    try:
-        cur.execute("ALTER TABLE postits ADD COLUMN tags TEXT DEFAULT ''")
-    except sqlite3.OperationalError:
-        # colonne déjà présente
-        pass
+    depth = getattr(_tx_state, "depth", 0)
+    savepoint = f"sp_{depth}"
+    if depth == 0:
+        _begin_write(conn)
+    else:
+        conn.execute(f"SAVEPOINT {savepoint}")
+    _tx_state.depth = depth + 1
     try:
-        cur.execute("ALTER TABLE postits ADD COLUMN order_index INTEGER DEFAULT 0")
-    except sqlite3.OperationalError:
-        # colonne déjà présente
-        pass
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS themes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE,
-            color TEXT,
-            x INTEGER DEFAULT 0,
-            y INTEGER DEFAULT 0,
-            width INTEGER DEFAULT 0,
-            height INTEGER DEFAULT 0
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+        yield conn
+    except BaseException:
+        if depth == 0:
+            conn.rollback()
+        else:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        raise
+    else:
+        if depth == 0:
+            try:
+                conn.commit()
+            except BaseException:
+                # COMMIT refusé (SQLITE_BUSY, clé étrangère différée) : la transaction
+                # reste ouverte, et tout BEGIN suivant de ce thread échouerait
+                conn.rollback()
+                raise
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+    finally:
+        _tx_state.depth = depth
+        if depth == 0:
+            write_gate.release()
+
+
+def init_db():
+    """Bring the schema up to date. A no-op read when already current."""
+    start = time.perf_counter()
+    before, after = migrate(get_connection())
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if before == after:
+        logger.info("Schéma à jour (v%d), vérifié en %.1f ms", after, elapsed_ms)
+    else:
+        logger.info("Schéma migré v%d -> v%d en %.1f ms", before, after, elapsed_ms)
@@ -0,0 +1,53 @@
+"""
+Single-span text deltas for the note history (note_revisions, migration 12).
+
+Between two autosaves the user usually edits one place: the delta keeps the
+common prefix and suffix and records only what lies between them,
+``text[pos:pos + cut]`` replaced by ``inserted``. Several distant edits give
+one wider span, never a wrong result.
+"""
+
+from typing import NamedTuple
+
+
+class Delta(NamedTuple):
+    pos: int
+    cut: int
+    inserted: str
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # Dichotomie sur des comparaisons de tranches (memcmp) : pas de boucle Python
+    # caractère par caractère sur un texte de plusieurs Mo.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:len(a) - lo] == b[len(b) - mid:len(b) - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def diff(old: str, new: str) -> Delta:
+    """Delta turning old into new."""
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, min(len(old), len(new)) - prefix)
+    return Delta(prefix, len(old) - prefix - suffix, new[prefix:len(new) - suffix])
+
+
+def patch(text: str, delta: Delta) -> str:
+    """Inverse of diff(): apply delta to the text it was computed against."""
+    pos, cut, inserted = delta
+    return text[:pos] + inserted + text[pos + cut:]
@@ -0,0 +1,241 @@
+"""
+Merge another ticket_app database into the live one.
+
+The source is ATTACHed read-only and copied table by table with set-based
+``INSERT ... SELECT`` inside a single transaction, so a failed import leaves
+the live database untouched. Sources with an older schema are first upgraded
+on a temporary copy; the source file itself is never modified.
+
+Themes are merged by name (tickets follow them). For tickets and post-its,
+``policy`` decides what happens to a row whose id already exists:
+
+- "skip": keep ours, ignore theirs;
+- "replace": overwrite ours with theirs;
+- "renumber": import every row under a new id (nothing is lost).
+
+The notebook is a single note whose current text is a checkpoint plus deltas
+(note_revisions): its rebuilt text is imported, not notes.content. "skip"
+keeps ours when we have one, "replace" makes theirs current and "renumber"
+appends theirs to ours. Either way the previous text stays in the history.
+"""
+
+import shutil
+import sqlite3
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from . import database
+from .database import get_connection, transaction
+from .migrations import fill_search_descriptions, get_version, latest_version, migrate
+from .repositories import NoteRepository, rehome_archived
+
+POLICIES = ("skip", "replace", "renumber")
+
+# progress(stage, done, total) : stage = table qui vient d'être importée
+ProgressCallback = Callable[[str, int, int], None]
+
+_STAGES = ("themes", "tickets", "notes", "postits")
+
+
+class ImportSourceError(Exception):
+    """The file is not a ticket_app database this version can import."""
+
+
+@dataclass(slots=True)
+class ImportReport:
+    themes: int = 0
+    tickets: int = 0
+    notes: int = 0
+    postits: int = 0
+
+
+def _source_uri(path: Path) -> str:
+    return path.resolve().as_uri() + "?mode=ro"
+
+
+def _check_source(path: Path) -> int:
+    """Return the source schema version, or raise ImportSourceError."""
+    if not path.is_file():
+        raise ImportSourceError(f"Fichier introuvable : {path}")
+    live = Path(database.DB_PATH)
+    if live.exists() and path.resolve() == live.resolve():
+        raise ImportSourceError("La source est la base ouverte")
+    try:
+        conn = sqlite3.connect(_source_uri(path), uri=True)
+        try:
+            has_tickets = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickets'"
+            ).fetchone()
+            version = get_version(conn)
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise ImportSourceError(f"Base illisible : {e}") from e
+    if not has_tickets:
+        raise ImportSourceError("Ce fichier n'est pas une base ticket_app")
+    if version > latest_version():
+        raise ImportSourceError(
+            f"Base créée par une version plus récente (schéma v{version} > v{latest_version()})"
+        )
+    return version
+
+
+def _upgraded_copy(path: Path, workdir: str) -> Path:
+    """Snapshot the source with the backup API and migrate the copy."""
+    copy = Path(workdir) / "source.db"
+    src = sqlite3.connect(_source_uri(path), uri=True)
+    dst = sqlite3.connect(copy)
+    try:
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode = DELETE")
+        migrate(dst)
+    finally:
+        dst.close()
+        src.close()
+    return copy
+
+
+def _conflict(policy: str, columns) -> str:
+    if policy == "skip":
+        return "ON CONFLICT(id) DO NOTHING"
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in columns)
+    return f"ON CONFLICT(id) DO UPDATE SET {assignments}"
+
+
+def _copy_rows(cur, table: str, columns, select: str, policy: str, params=()) -> int:
+    """INSERT ... SELECT one table; select lists columns in the same order (id first)."""
+    if policy == "renumber":
+        # nouvel id : on ne recopie pas la première colonne (l'id source)
+        cur.execute(f"""
+            INSERT INTO main.{table} ({", ".join(columns)})
+            SELECT {", ".join(f"c{i}" for i in range(1, len(columns) + 1))}
+            FROM ({select})
+        """, params)
+    else:
+        # WHERE true : lève l'ambiguïté entre ON de jointure et ON CONFLICT
+        cur.execute(f"""
+            INSERT INTO main.{table} (id, {", ".join(columns)})
+            SELECT * FROM ({select}) WHERE true
+            {_conflict(policy, columns)}
+        """, params)
+    return cur.rowcount
+
+
+_TICKET_COLUMNS = ("title", "description", "urgency", "deadline", "theme_id",
+                   "archived", "created_at", "updated_at")
+# Tickets actifs et archivés de la source ; {where} : filtre selon la politique
+_SOURCE_TICKETS = """
+    SELECT id, title, description, urgency, deadline, theme_id, archived, created_at FROM src.tickets
+    UNION ALL
+    SELECT id, title, description, urgency, deadline, theme_id, archived, created_at FROM src.tickets_archive
+"""
+_TICKET_SELECT = f"""
+    SELECT s.id AS c0, s.title AS c1, s.description AS c2, s.urgency AS c3, s.deadline AS c4,
+           mt.id AS c5, s.archived AS c6, s.created_at AS c7, CURRENT_TIMESTAMP AS c8
+    FROM ({_SOURCE_TICKETS}) s
+    LEFT JOIN src.themes st ON st.id = s.theme_id
+    LEFT JOIN main.themes mt ON mt.name = st.name
+    {{where}}
+    ORDER BY s.id
+"""
+
+# Séparation entre notre texte et le leur quand "renumber" les met bout à bout
+NOTE_MERGE_SEPARATOR = "\n\n"
+
+_POSTIT_COLUMNS = ("content", "x", "y", "width", "height", "color", "tags",
+                   "order_index", "created_at")
+_POSTIT_SELECT = """
+    SELECT id AS c0, content AS c1, x AS c2, y AS c3, width AS c4, height AS c5,
+           color AS c6, tags AS c7, order_index + ? AS c8, created_at AS c9
+    FROM src.postits ORDER BY id
+"""
+
+
+def _import_note(conn, policy: str) -> int:
+    """Merge the source's notebook text into ours; returns 1 if ours changed."""
+    theirs = NoteRepository.head_text(conn, "src")
+    ours = NoteRepository.head_text(conn)
+    if not theirs or theirs == ours:
+        return 0
+    if not ours or policy == "replace":
+        text = theirs
+    elif policy == "renumber":
+        text = ours + NOTE_MERGE_SEPARATOR + theirs
+    else:
+        return 0
+    NoteRepository.checkpoint(conn, text)
+    return 1
+
+
+def import_database(path, policy: str = "renumber",
+                    progress: Optional[ProgressCallback] = None) -> ImportReport:
+    """Merge the database at path into the live one. All or nothing."""
+    if policy not in POLICIES:
+        raise ValueError(f"Politique d'import inconnue : {policy}")
+    path = Path(path)
+    version = _check_source(path)
+    report = ImportReport()
+
+    def step(stage: str) -> None:
+        if progress is not None:
+            progress(stage, _STAGES.index(stage) + 1, len(_STAGES))
+
+    workdir = tempfile.mkdtemp(prefix="ticket_app_import_")
+    try:
+        source = path if version == latest_version() else _upgraded_copy(path, workdir)
+        conn = get_connection()
+        # ATTACH est interdit dans une transaction : avant transaction()
+        conn.execute("ATTACH DATABASE ? AS src", (_source_uri(source),))
+        try:
+            with transaction() as conn:
+                cur = conn.cursor()
+                theme_conflict = "DO NOTHING" if policy != "replace" else """
+                    DO UPDATE SET color = excluded.color, x = excluded.x, y = excluded.y,
+                                  width = excluded.width, height = excluded.height
+                """
+                cur.execute(f"""
+                    INSERT INTO main.themes (name, color, x, y, width, height)
+                    SELECT name, color, x, y, width, height FROM src.themes
+                    WHERE name IS NOT NULL AND name != ''
+                    ON CONFLICT(name) {theme_conflict}
+                """)
+                report.themes = cur.rowcount
+                step("themes")
+
+                # Les tickets entrent dans tickets, rehome_archived() range ensuite les
+                # archivés. ON CONFLICT ne voit que tickets : l'archive est traitée à part.
+                where = ""
+                if policy == "skip":
+                    where = "WHERE s.id NOT IN (SELECT id FROM main.tickets_archive)"
+                elif policy == "replace":
+                    cur.execute(f"""
+                        DELETE FROM main.tickets_archive
+                        WHERE id IN (SELECT id FROM ({_SOURCE_TICKETS}))
+                    """)
+                report.tickets = _copy_rows(cur, "tickets", _TICKET_COLUMNS,
+                                            _TICKET_SELECT.format(where=where), policy)
+                rehome_archived(cur)
+                # les triggers indexent le texte clair, reste les descriptions compressées
+                fill_search_descriptions(conn)
+                step("tickets")
+
+                report.notes = _import_note(conn, policy)
+                step("notes")
+
+                # renuméroter = ajouter à la fin du mur, dans l'ordre de la source
+                # (source migrée : ses clés commencent à POSTIT_ORDER_GAP, l'écart est gardé)
+                offset = 0
+                if policy == "renumber":
+                    offset = cur.execute(
+                        "SELECT COALESCE(MAX(order_index), 0) FROM main.postits"
+                    ).fetchone()[0]
+                report.postits = _copy_rows(cur, "postits", _POSTIT_COLUMNS, _POSTIT_SELECT,
+                                            policy, (offset,))
+                step("postits")
+        finally:
+            conn.execute("DETACH DATABASE src")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
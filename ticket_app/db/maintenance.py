@@ -0,0 +1,150 @@
+"""
+Storage maintenance: freelist reclaim, planner statistics, integrity checks.
+
+The database runs with ``auto_vacuum = INCREMENTAL`` (migration 8): deleted
+rows leave their pages on the freelist and the file does not shrink by itself.
+The main window calls idle_maintenance() on the database worker from time to
+time, which returns a bounded batch of free pages to the file system; compact()
+is the full VACUUM behind the "compact now" button. On a file too large for
+the migration's own VACUUM, the first idle pass runs compact() instead. Planner statistics are
+kept fresh by ``PRAGMA optimize``, run on every pooled connection at shutdown
+(close_connections(optimize=True)).
+"""
+
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .database import get_connection, transaction, write_gate
+from .migrations import rebuild_ticket_search
+
+logger = logging.getLogger(__name__)
+
+# Pages rendues par passe d'entretien (4 Ko par page : ~4 Mo, quelques ms de verrou)
+INCREMENTAL_VACUUM_PAGES = 1024
+# En dessous, une passe ne vaut pas le verrou d'écriture qu'elle prend
+IDLE_VACUUM_MIN_PAGES = 256
+# Erreurs remontées au plus par integrity_check()
+INTEGRITY_MAX_ERRORS = 100
+
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+@dataclass(slots=True)
+class StorageStats:
+    page_size: int
+    page_count: int
+    freelist_count: int
+    auto_vacuum: str
+    # Part des pages feuilles non contiguës à la précédente de leur arbre ;
+    # None si SQLite est compilé sans la table virtuelle dbstat.
+    fragmentation: Optional[float] = None
+
+    @property
+    def file_bytes(self) -> int:
+        return self.page_size * self.page_count
+
+    @property
+    def free_bytes(self) -> int:
+        return self.page_size * self.freelist_count
+
+    @property
+    def free_ratio(self) -> float:
+        return self.freelist_count / self.page_count if self.page_count else 0.0
+
+
+def _pragma(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def _fragmentation(conn: sqlite3.Connection) -> Optional[float]:
+    # Les chemins dbstat ("/000/01a/") se trient dans l'ordre de parcours de l'arbre
+    try:
+        pairs, jumps = conn.execute("""
+            SELECT COUNT(*), TOTAL(pageno != prev + 1) FROM (
+                SELECT pageno, LAG(pageno) OVER (PARTITION BY name ORDER BY path) AS prev
+                FROM dbstat WHERE pagetype = 'leaf'
+            ) WHERE prev IS NOT NULL
+        """).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return jumps / pairs if pairs else 0.0
+
+
+def storage_stats(fragmentation: bool = True) -> StorageStats:
+    """
+    Size and freelist of the live database. With fragmentation, also walk
+    every leaf page through dbstat - proportional to the file size.
+    """
+    conn = get_connection()
+    return StorageStats(
+        page_size=_pragma(conn, "page_size"),
+        page_count=_pragma(conn, "page_count"),
+        freelist_count=_pragma(conn, "freelist_count"),
+        auto_vacuum=_AUTO_VACUUM_MODES.get(_pragma(conn, "auto_vacuum"), "?"),
+        fragmentation=_fragmentation(conn) if fragmentation else None,
+    )
+
+
+def incremental_vacuum(pages: int = INCREMENTAL_VACUUM_PAGES) -> int:
+    """Return up to pages free pages to the file system. Returns the count freed."""
+    conn = get_connection()
+    before = _pragma(conn, "freelist_count")
+    # execute() n'avance le pragma que d'une page : executescript() va jusqu'au bout
+    with write_gate:
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+    return before - _pragma(conn, "freelist_count")
+
+
+def idle_maintenance(min_pages: int = IDLE_VACUUM_MIN_PAGES,
+                     pages: int = INCREMENTAL_VACUUM_PAGES) -> int:
+    """One bounded reclaim pass, skipped while the freelist is small."""
+    conn = get_connection()
+    if _AUTO_VACUUM_MODES.get(_pragma(conn, "auto_vacuum")) != "incremental":
+        # VACUUM de la migration 8 reporté (grosse base) : une fois, ici plutôt qu'au démarrage
+        logger.info("Compactage différé de la base en cours")
+        before = _pragma(conn, "page_count")
+        # les pages de pointeurs de l'auto_vacuum peuvent faire grossir un fichier déjà dense
+        return max(before - compact().page_count, 0)
+    if _pragma(conn, "freelist_count") < min_pages:
+        return 0
+    return incremental_vacuum(pages)
+
+
+def compact() -> StorageStats:
+    """
+    Rebuild the file (VACUUM), refresh every statistic (ANALYZE) and truncate
+    the WAL. Blocks writers for the duration: run it off the GUI thread.
+    """
+    conn = get_connection()
+    with write_gate:
+        # réglage de la migration 8, appliqué par ce VACUUM s'il a été reporté
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return storage_stats()
+
+
+def rebuild_search_index() -> None:
+    """
+    Rebuild the full-text index and realign its content table with the
+    tickets. Triggers keep it current; only compressed descriptions written
+    by another tool (sqlite3 shell, script) wait for this to be searchable.
+    """
+    with transaction() as conn:
+        rebuild_ticket_search(conn)
+
+
+def integrity_check(max_errors: int = INTEGRITY_MAX_ERRORS) -> List[str]:
+    """Problems reported by SQLite (structure and foreign keys); empty when sound."""
+    conn = get_connection()
+    problems = [row[0] for row in conn.execute(f"PRAGMA integrity_check({int(max_errors)})")]
+    if problems == ["ok"]:
+        problems = []
+    problems += [
+        f"{table} #{rowid} -> {parent}"
+        for table, rowid, parent, _ in conn.execute("PRAGMA foreign_key_check")
+    ]
+    return problems
@@ -0,0 +1,740 @@
+"""
+Versioned schema migrations keyed on ``PRAGMA user_version``.
+
+Each step is registered with ``@migration(version)`` and receives the open
+connection. Pending steps run in a single transaction; when the database is
+already current, ``migrate()`` costs a single PRAGMA read. Steps registered
+with ``vacuum=True`` change a file-level setting that only a VACUUM applies:
+it runs once, after the commit, on files up to STARTUP_VACUUM_MAX_BYTES. A
+larger file keeps its old layout until maintenance.compact(), which the idle
+maintenance runs once on the database worker.
+"""
+
+import logging
+import sqlite3
+from typing import Callable, List, Tuple
+
+from . import codec
+
+logger = logging.getLogger(__name__)
+
+MigrationStep = Callable[[sqlite3.Connection], None]
+
+MIGRATIONS: List[Tuple[int, MigrationStep]] = []
+
+# Versions dont l'effet n'est appliqué que par un VACUUM (interdit en transaction)
+_VACUUM_AFTER: set[int] = set()
+# Au-delà, le VACUUM (plusieurs secondes par centaine de Mo) figerait le
+# démarrage : il est laissé à maintenance.compact()
+STARTUP_VACUUM_MAX_BYTES = 32 * 1024 * 1024
+
+
+def migration(version: int, vacuum: bool = False):
+    def register(step: MigrationStep) -> MigrationStep:
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"Migration {version} déclarée hors ordre")
+        MIGRATIONS.append((version, step))
+        if vacuum:
+            _VACUUM_AFTER.add(version)
+        return step
+    return register
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    # table_xinfo liste aussi les colonnes générées
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, ddl: str) -> None:
+    # Les bases créées avant le versionnage peuvent déjà avoir la colonne.
+    if column not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def migrate(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Apply pending migrations. Returns (version_before, version_after)."""
+    current = get_version(conn)
+    target = latest_version()
+    if current >= target:
+        return current, current
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for version, step in MIGRATIONS:
+            if version > current:
+                step(conn)
+        conn.execute(f"PRAGMA user_version = {target}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    if any(current < version <= target for version in _VACUUM_AFTER):
+        size = (conn.execute("PRAGMA page_count").fetchone()[0]
+                * conn.execute("PRAGMA page_size").fetchone()[0])
+        if size <= STARTUP_VACUUM_MAX_BYTES:
+            conn.execute("VACUUM")
+        else:
+            logger.info("VACUUM de migration reporté (%.0f Mo) : fait par l'entretien en arrière-plan",
+                        size / (1024 * 1024))
+    return current, target
+
+
+# -------- Steps --------
+
+@migration(1)
+def _initial_schema(conn: sqlite3.Connection) -> None:
+    # Idempotent : reprend les bases antérieures au versionnage (user_version = 0).
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            urgency TEXT,
+            deadline TEXT,
+            theme TEXT,
+            archived INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    _add_column(conn, "tickets", "archived", "INTEGER DEFAULT 0")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS postits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT,
+            x INTEGER,
+            y INTEGER,
+            width INTEGER,
+            height INTEGER,
+            color TEXT,
+            tags TEXT DEFAULT '',
+            order_index INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    _add_column(conn, "postits", "tags", "TEXT DEFAULT ''")
+    _add_column(conn, "postits", "order_index", "INTEGER DEFAULT 0")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS themes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            color TEXT,
+            x INTEGER DEFAULT 0,
+            y INTEGER DEFAULT 0,
+            width INTEGER DEFAULT 0,
+            height INTEGER DEFAULT 0
+        )
+    """)
+
+
+@migration(2)
+def _ticket_indexes(conn: sqlite3.Connection) -> None:
+    # Vue par défaut : WHERE archived = 0 ORDER BY created_at DESC
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_archived_created ON tickets(archived, created_at)")
+    # "Afficher archivés" : ORDER BY created_at DESC sans filtre
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets(created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_theme ON tickets(theme)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_deadline ON tickets(archived, deadline)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_postits_order ON postits(order_index, created_at)")
+
+
+@migration(3)
+def _ticket_fulltext(conn: sqlite3.Connection) -> None:
+    # Index plein texte externe : le contenu reste dans tickets, FTS5 ne
+    # stocke que l'index, maintenu par triggers.
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+            title, theme, description,
+            content='tickets', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN
+            INSERT INTO tickets_fts(rowid, title, theme, description)
+            VALUES (new.id, new.title, new.theme, new.description);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, title, theme, description)
+            VALUES ('delete', old.id, old.title, old.theme, old.description);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF title, theme, description ON tickets BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, title, theme, description)
+            VALUES ('delete', old.id, old.title, old.theme, old.description);
+            INSERT INTO tickets_fts(rowid, title, theme, description)
+            VALUES (new.id, new.title, new.theme, new.description);
+        END
+    """)
+    conn.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+
+
+CHANGE_LOG_RETENTION = 10000
+
+
+@migration(4)
+def _ticket_change_feed(conn: sqlite3.Connection) -> None:
+    # ADD COLUMN n'accepte pas de défaut non constant : les repositories
+    # renseignent updated_at à chaque écriture.
+    _add_column(conn, "tickets", "updated_at", "TEXT")
+    conn.execute("UPDATE tickets SET updated_at = created_at WHERE updated_at IS NULL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ticket_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id INTEGER NOT NULL,
+            op TEXT NOT NULL
+        )
+    """)
+    for name, event, op, ref in (
+        ("ticket_changes_ai", "INSERT", "I", "new"),
+        ("ticket_changes_au", "UPDATE", "U", "new"),
+        ("ticket_changes_ad", "DELETE", "D", "old"),
+    ):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON tickets BEGIN
+                INSERT INTO ticket_changes (ticket_id, op) VALUES ({ref}.id, '{op}');
+            END
+        """)
+    # Journal borné : les clients trop en retard rechargent tout.
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS ticket_changes_prune AFTER INSERT ON ticket_changes BEGIN
+            DELETE FROM ticket_changes WHERE seq <= new.seq - {CHANGE_LOG_RETENTION};
+        END
+    """)
+
+
+@migration(5)
+def _ticket_theme_fk(conn: sqlite3.Connection) -> None:
+    # Thèmes libres -> lignes de themes, tickets.theme (texte) -> theme_id.
+    conn.execute("""
+        INSERT OR IGNORE INTO themes (name, color)
+        SELECT DISTINCT theme, '#cccccc' FROM tickets
+        WHERE theme IS NOT NULL AND theme != ''
+    """)
+    _add_column(conn, "tickets", "theme_id", "INTEGER REFERENCES themes(id) ON DELETE SET NULL")
+    conn.execute("""
+        UPDATE tickets SET theme_id = (SELECT id FROM themes WHERE name = tickets.theme)
+        WHERE theme IS NOT NULL AND theme != ''
+    """)
+
+    # L'index plein texte référence la colonne texte : on le reconstruit
+    # sur theme_ref, un jeton "t<id>" qui ne change pas quand le thème est renommé.
+    for trigger in ("tickets_fts_ai", "tickets_fts_ad", "tickets_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS tickets_fts")
+    conn.execute("DROP INDEX IF EXISTS idx_tickets_theme")
+    conn.execute("ALTER TABLE tickets DROP COLUMN theme")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_theme_id ON tickets(theme_id, archived, created_at)")
+
+    conn.execute("""
+        CREATE VIRTUAL TABLE tickets_fts USING fts5(
+            title, description, theme_ref,
+            content='',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER tickets_fts_ai AFTER INSERT ON tickets BEGIN
+            INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+            VALUES (new.id, new.title, new.description, 't' || new.theme_id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER tickets_fts_ad AFTER DELETE ON tickets BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, title, description, theme_ref)
+            VALUES ('delete', old.id, old.title, old.description, 't' || old.theme_id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER tickets_fts_au AFTER UPDATE OF title, description, theme_id ON tickets BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, title, description, theme_ref)
+            VALUES ('delete', old.id, old.title, old.description, 't' || old.theme_id);
+            INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+            VALUES (new.id, new.title, new.description, 't' || new.theme_id);
+        END
+    """)
+    conn.execute("""
+        INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+        SELECT id, title, description, 't' || theme_id FROM tickets
+    """)
+
+
+@migration(6)
+def _ticket_deadline_day(conn: sqlite3.Connection) -> None:
+    # Échéance en jours depuis 1970-01-01 (NULL si vide ou invalide).
+    # Colonne virtuelle : toujours synchronisée avec le texte, matérialisée par l'index.
+    _add_column(
+        conn, "tickets", "deadline_day",
+        "INTEGER GENERATED ALWAYS AS (CAST(julianday(deadline) - 2440587.5 AS INTEGER)) VIRTUAL"
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_tickets_deadline")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_deadline_day ON tickets(archived, deadline_day)")
+
+
+# Colonnes recopiées quand un ticket change de table (deadline_day est générée)
+TICKET_MOVE_COLUMNS = "id, title, description, urgency, deadline, archived, created_at, updated_at, theme_id"
+
+
+@migration(7)
+def _ticket_archive(conn: sqlite3.Connection) -> None:
+    # Partition chaud/froid : les tickets archivés vivent dans tickets_archive,
+    # la vue par défaut ne lit plus que les tickets actifs.
+    # Les identifiants restent alloués par tickets (AUTOINCREMENT) : uniques sur les deux tables.
+    conn.execute("""
+        CREATE TABLE tickets_archive (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            urgency TEXT,
+            deadline TEXT,
+            archived INTEGER DEFAULT 1,
+            created_at TEXT,
+            updated_at TEXT,
+            theme_id INTEGER REFERENCES themes(id) ON DELETE SET NULL,
+            deadline_day INTEGER GENERATED ALWAYS AS (CAST(julianday(deadline) - 2440587.5 AS INTEGER)) VIRTUAL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_archive_created ON tickets_archive(created_at)")
+    conn.execute("CREATE INDEX idx_archive_theme_id ON tickets_archive(theme_id, created_at)")
+    conn.execute("CREATE INDEX idx_archive_deadline_day ON tickets_archive(deadline_day)")
+    # tickets désarchivés en attente de retour dans tickets (vide hors transaction)
+    conn.execute("CREATE INDEX idx_archive_restored ON tickets_archive(archived) WHERE archived = 0")
+
+    # Un déplacement = INSERT dans une table puis DELETE dans l'autre. Tant que la
+    # ligne existe des deux côtés, ni l'index plein texte ni le journal n'y touchent.
+    for trigger in ("tickets_fts_ai", "tickets_fts_ad", "ticket_changes_ad"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table, other in (("tickets", "tickets_archive"), ("tickets_archive", "tickets")):
+        prefix = "tickets_fts" if table == "tickets" else "tickets_archive_fts"
+        conn.execute(f"""
+            CREATE TRIGGER {prefix}_ai AFTER INSERT ON {table}
+            WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE id = new.id) BEGIN
+                INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+                VALUES (new.id, new.title, new.description, 't' || new.theme_id);
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {prefix}_ad AFTER DELETE ON {table}
+            WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE id = old.id) BEGIN
+                INSERT INTO tickets_fts(tickets_fts, rowid, title, description, theme_ref)
+                VALUES ('delete', old.id, old.title, old.description, 't' || old.theme_id);
+            END
+        """)
+    conn.execute("""
+        CREATE TRIGGER tickets_archive_fts_au AFTER UPDATE OF title, description, theme_id
+        ON tickets_archive BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, title, description, theme_ref)
+            VALUES ('delete', old.id, old.title, old.description, 't' || old.theme_id);
+            INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+            VALUES (new.id, new.title, new.description, 't' || new.theme_id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER ticket_changes_ad AFTER DELETE ON tickets
+        WHEN NOT EXISTS (SELECT 1 FROM tickets_archive WHERE id = old.id) BEGIN
+            INSERT INTO ticket_changes (ticket_id, op) VALUES (old.id, 'D');
+        END
+    """)
+
+    # Reprise de l'historique, avant les triggers de journal de l'archive :
+    # les clients rechargent tout au démarrage, inutile de journaliser.
+    conn.execute(f"""
+        INSERT INTO tickets_archive ({TICKET_MOVE_COLUMNS})
+        SELECT {TICKET_MOVE_COLUMNS} FROM tickets WHERE archived = 1
+    """)
+    conn.execute("DELETE FROM tickets WHERE archived = 1")
+
+    # Pour le journal, archiver ou restaurer est une mise à jour du ticket.
+    for name, event, op, ref, when in (
+        ("ticket_archive_changes_ai", "INSERT", "U", "new", ""),
+        ("ticket_archive_changes_au", "UPDATE", "U", "new", ""),
+        ("ticket_archive_changes_ad", "DELETE", "D", "old",
+         "WHEN NOT EXISTS (SELECT 1 FROM tickets WHERE id = old.id)"),
+    ):
+        conn.execute(f"""
+            CREATE TRIGGER {name} AFTER {event} ON tickets_archive {when} BEGIN
+                INSERT INTO ticket_changes (ticket_id, op) VALUES ({ref}.id, '{op}');
+            END
+        """)
+
+
+@migration(8, vacuum=True)
+def _incremental_vacuum(conn: sqlite3.Connection) -> None:
+    # Les pages libérées restent dans le fichier jusqu'à PRAGMA incremental_vacuum
+    # (voir db/maintenance.py) ; le VACUUM qui suit la migration restructure la base.
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+
+# Lignes recompressées par lot (migration 9) : borne la mémoire sur les gros textes
+COMPRESS_BATCH = 200
+
+
+def _compress_column(conn: sqlite3.Connection, table: str, column: str) -> None:
+    last_id = 0
+    while True:
+        rows = conn.execute(f"""
+            SELECT id, {column} FROM {table}
+            WHERE id > ? AND typeof({column}) = 'text' AND length(CAST({column} AS BLOB)) >= ?
+            ORDER BY id LIMIT ?
+        """, (last_id, codec.COMPRESS_THRESHOLD, COMPRESS_BATCH)).fetchall()
+        if not rows:
+            return
+        conn.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?",
+                         [(codec.encode(text), row_id) for row_id, text in rows])
+        last_id = rows[-1][0]
+
+
+@migration(9)
+def _compressed_text(conn: sqlite3.Connection) -> None:
+    # Descriptions et bloc-notes volumineux stockés compressés (db/codec.py).
+    # Les triggers plein texte indexent le texte clair via decompress_text().
+    codec.register(conn)
+
+    # Recompresser ne change pas le texte : ni réindexation, ni entrée de journal.
+    change_triggers = [row[0] for row in conn.execute("""
+        SELECT sql FROM sqlite_master
+        WHERE type = 'trigger' AND name IN ('ticket_changes_au', 'ticket_archive_changes_au')
+    """)]
+    for trigger in ("tickets_fts_ai", "tickets_fts_ad", "tickets_fts_au",
+                    "tickets_archive_fts_ai", "tickets_archive_fts_ad", "tickets_archive_fts_au",
+                    "ticket_changes_au", "ticket_archive_changes_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    for table in ("tickets", "tickets_archive"):
+        _compress_column(conn, table, "description")
+    _compress_column(conn, "notes", "content")
+
+    for sql in change_triggers:
+        conn.execute(sql)
+    for table, other in (("tickets", "tickets_archive"), ("tickets_archive", "tickets")):
+        prefix = "tickets_fts" if table == "tickets" else "tickets_archive_fts"
+        conn.execute(f"""
+            CREATE TRIGGER {prefix}_ai AFTER INSERT ON {table}
+            WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE id = new.id) BEGIN
+                INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+                VALUES (new.id, new.title, decompress_text(new.description), 't' || new.theme_id);
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {prefix}_ad AFTER DELETE ON {table}
+            WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE id = old.id) BEGIN
+                INSERT INTO tickets_fts(tickets_fts, rowid, title, description, theme_ref)
+                VALUES ('delete', old.id, old.title, decompress_text(old.description), 't' || old.theme_id);
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {prefix}_au AFTER UPDATE OF title, description, theme_id ON {table} BEGIN
+                INSERT INTO tickets_fts(tickets_fts, rowid, title, description, theme_ref)
+                VALUES ('delete', old.id, old.title, decompress_text(old.description), 't' || old.theme_id);
+                INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+                VALUES (new.id, new.title, decompress_text(new.description), 't' || new.theme_id);
+            END
+        """)
+
+
+# Colonnes qui déplacent un ticket actif d'un compteur à l'autre (migration 10)
+STATS_COLUMNS = "theme_id, urgency, deadline, archived"
+
+
+def _stats_delta(row: str, delta: int) -> str:
+    """Upsert adding delta to every counter of ticket row (new/old)."""
+    return f"""
+        INSERT INTO ticket_stats (dimension, key, count) VALUES
+            ('total', '', {delta}),
+            ('theme', IFNULL({row}.theme_id, ''), {delta}),
+            ('urgency', IFNULL({row}.urgency, ''), {delta}),
+            ('deadline', IFNULL({row}.deadline_day, ''), {delta})
+        ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count;
+    """
+
+
+def _stats_prune(row: str) -> str:
+    # Les compteurs à zéro disparaissent : un jour d'échéance passé ne reste pas en table
+    return f"""
+        DELETE FROM ticket_stats WHERE count = 0 AND (dimension, key) IN (VALUES
+            ('theme', IFNULL({row}.theme_id, '')), ('deadline', IFNULL({row}.deadline_day, '')));
+    """
+
+
+@migration(10)
+def _ticket_stats(conn: sqlite3.Connection) -> None:
+    # Compteurs des tickets actifs, tenus par triggers : total, par thème, par
+    # urgence et par jour d'échéance. Les tranches d'échéance (en retard,
+    # aujourd'hui, semaine) sont sommées à la lecture autour du jour courant :
+    # elles basculent à minuit sans rien réécrire. Clé '' : sans thème / sans échéance.
+    conn.execute("""
+        CREATE TABLE ticket_stats (
+            dimension TEXT NOT NULL,
+            key NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (dimension, key)
+        ) WITHOUT ROWID
+    """)
+    # Seule la table tickets compte : les archivés vivent dans tickets_archive,
+    # et un ticket marqué archivé avant son déplacement est déjà décompté.
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in STATS_COLUMNS.split(", "))
+    for name, event, when, body in (
+        ("ticket_stats_ai", "INSERT", "new.archived = 0", _stats_delta("new", 1)),
+        ("ticket_stats_ad", "DELETE", "old.archived = 0",
+         _stats_delta("old", -1) + _stats_prune("old")),
+        ("ticket_stats_au_old", f"UPDATE OF {STATS_COLUMNS}", f"old.archived = 0 AND ({changed})",
+         _stats_delta("old", -1) + _stats_prune("old")),
+        ("ticket_stats_au_new", f"UPDATE OF {STATS_COLUMNS}", f"new.archived = 0 AND ({changed})",
+         _stats_delta("new", 1)),
+    ):
+        conn.execute(f"CREATE TRIGGER {name} AFTER {event} ON tickets WHEN {when} BEGIN {body} END")
+    conn.execute("""
+        INSERT INTO ticket_stats (dimension, key, count)
+        SELECT 'total', '', COUNT(*) FROM tickets WHERE archived = 0
+        UNION ALL
+        SELECT 'theme', IFNULL(theme_id, ''), COUNT(*) FROM tickets WHERE archived = 0 GROUP BY 2
+        UNION ALL
+        SELECT 'urgency', IFNULL(urgency, ''), COUNT(*) FROM tickets WHERE archived = 0 GROUP BY 2
+        UNION ALL
+        SELECT 'deadline', IFNULL(deadline_day, ''), COUNT(*) FROM tickets WHERE archived = 0 GROUP BY 2
+    """)
+
+
+# Écart entre les clés d'ordre de deux post-its voisins : un déplacement prend
+# le milieu de l'intervalle, ~10 insertions au même endroit avant renumérotation.
+POSTIT_ORDER_GAP = 1024
+# Renumérotation du mur dans l'ordre affiché (seules les lignes dont la clé change)
+POSTIT_REBALANCE = f"""
+    UPDATE postits SET order_index = r.rank * {POSTIT_ORDER_GAP}
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY order_index, created_at, id) AS rank FROM postits
+    ) r
+    WHERE postits.id = r.id AND postits.order_index IS NOT r.rank * {POSTIT_ORDER_GAP}
+"""
+
+
+@migration(11)
+def _postit_order_gaps(conn: sqlite3.Connection) -> None:
+    # Clés 0, 1, 2… → 1024, 2048… : déplacer un post-it n'écrit plus que sa ligne
+    conn.execute(POSTIT_REBALANCE)
+
+
+@migration(12)
+def _note_revisions(conn: sqlite3.Connection) -> None:
+    # Historique du bloc-notes. Une révision est soit un point de reprise (texte
+    # complet), soit un delta sur la révision précédente : text[pos:pos + cut]
+    # remplacé par content (db/delta.py). Le texte courant = dernier point de
+    # reprise + deltas suivants. content est stocké via codec.encode().
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS note_revisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            note_id INTEGER NOT NULL,
+            checkpoint INTEGER NOT NULL,
+            pos INTEGER,
+            cut INTEGER,
+            content,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_note_revisions_note ON note_revisions(note_id)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_note_revisions_checkpoint ON note_revisions(note_id) WHERE checkpoint = 1
+    """)
+    # notes garde le dernier point de reprise : toute écriture du texte complet,
+    # y compris d'un autre outil (import, ancienne version), en devient un.
+    for name, event in (("note_checkpoint_ai", "INSERT"), ("note_checkpoint_au", "UPDATE OF content")):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON notes BEGIN
+                INSERT INTO note_revisions (note_id, checkpoint, content) VALUES (new.id, 1, new.content);
+            END
+        """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS note_revisions_ad AFTER DELETE ON notes BEGIN
+            DELETE FROM note_revisions WHERE note_id = old.id;
+        END
+    """)
+    conn.execute("""
+        INSERT INTO note_revisions (note_id, checkpoint, content, created_at)
+        SELECT id, 1, content, created_at FROM notes
+        WHERE id NOT IN (SELECT note_id FROM note_revisions)
+    """)
+
+
+@migration(13)
+def _search_index_without_triggers(conn: sqlite3.Connection) -> None:
+    # Les triggers de la migration 9 appelaient decompress_text(), fonction
+    # propre aux connexions de l'application : tout autre écrivain (CLI sqlite3,
+    # script, copie exportée ouverte ailleurs) échouait sur "no such function".
+    # La migration 14 reconstruit l'index sur une table de contenu.
+    for prefix in ("tickets_fts", "tickets_archive_fts"):
+        for event in ("ai", "ad", "au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {prefix}_{event}")
+
+
+# Texte cherchable, tenu par triggers sur les colonnes brutes (migration 14).
+# Une description compressée (BLOB) n'est pas lisible en SQL : le trigger la
+# laisse à NULL et fill_search_descriptions() la décompresse en Python.
+_SEARCH_DESCRIPTION = "CASE WHEN typeof(new.description) = 'blob' THEN NULL ELSE new.description END"
+_SEARCH_TRIGGERS = ("ticket_search_ai", "ticket_search_ad", "ticket_search_au",
+                    "ticket_archive_search_ai", "ticket_archive_search_ad", "ticket_archive_search_au",
+                    "ticket_search_fts_ai", "ticket_search_fts_ad", "ticket_search_fts_au")
+
+
+def fill_search_descriptions(conn: sqlite3.Connection, ticket_ids=None) -> None:
+    """
+    Index the compressed descriptions the triggers left empty, for these
+    tickets or (None) all of them, by batches of COMPRESS_BATCH rows.
+    """
+    query = """
+        SELECT s.id, t.description FROM ticket_search s
+        JOIN (SELECT id, description FROM tickets
+              UNION ALL SELECT id, description FROM tickets_archive) t ON t.id = s.id
+        WHERE s.description IS NULL AND typeof(t.description) = 'blob' AND s.id > ? {only}
+        ORDER BY s.id LIMIT ?
+    """
+    if ticket_ids is not None:
+        ids = sorted(set(ticket_ids))
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = conn.execute(query.format(only=f"AND s.id IN ({','.join('?' * len(chunk))})"),
+                                (0, *chunk, len(chunk))).fetchall()
+            conn.executemany("UPDATE ticket_search SET description = ? WHERE id = ?",
+                             [(codec.decode(blob), row_id) for row_id, blob in rows])
+        return
+    last_id = 0
+    while True:
+        rows = conn.execute(query.format(only=""), (last_id, COMPRESS_BATCH)).fetchall()
+        if not rows:
+            return
+        conn.executemany("UPDATE ticket_search SET description = ? WHERE id = ?",
+                         [(codec.decode(blob), row_id) for row_id, blob in rows])
+        last_id = rows[-1][0]
+
+
+def rebuild_ticket_search(conn: sqlite3.Connection) -> None:
+    """
+    Rebuild tickets_fts from ticket_search, then realign ticket_search with the
+    tickets (compressed descriptions written by another tool, rows written
+    while the triggers were missing); its triggers carry the changes over.
+    """
+    conn.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+    conn.execute("""
+        DELETE FROM ticket_search
+        WHERE id NOT IN (SELECT id FROM tickets) AND id NOT IN (SELECT id FROM tickets_archive)
+    """)
+    conn.execute("""
+        INSERT INTO ticket_search (id, title, description, theme_ref)
+        SELECT id, title, CASE WHEN typeof(description) = 'blob' THEN NULL ELSE description END,
+               't' || theme_id
+        FROM (SELECT id, title, description, theme_id FROM tickets
+              UNION ALL SELECT id, title, description, theme_id FROM tickets_archive)
+        WHERE true
+        ON CONFLICT(id) DO UPDATE SET
+            title = excluded.title, description = excluded.description, theme_ref = excluded.theme_ref
+        WHERE title IS NOT excluded.title OR description IS NOT excluded.description
+           OR theme_ref IS NOT excluded.theme_ref
+    """)
+    fill_search_descriptions(conn)
+
+
+@migration(14)
+def _search_content_table(conn: sqlite3.Connection) -> None:
+    # tickets_fts sans contenu dépendait des repositories pour redonner à l'octet
+    # près les valeurs indexées ; une ligne écrite par un autre outil rendait la
+    # suppression suivante "malformed". L'index lit désormais ticket_search (texte
+    # en clair) : ses triggers suppriment ce qui a réellement été indexé.
+    for trigger in _SEARCH_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS tickets_fts")
+    conn.execute("DROP TABLE IF EXISTS ticket_search")
+    conn.execute("""
+        CREATE TABLE ticket_search (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            description TEXT,
+            theme_ref TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO ticket_search (id, title, description, theme_ref)
+        SELECT id, title, CASE WHEN typeof(description) = 'blob' THEN NULL ELSE description END,
+               't' || theme_id
+        FROM (SELECT id, title, description, theme_id FROM tickets
+              UNION ALL SELECT id, title, description, theme_id FROM tickets_archive)
+    """)
+    fill_search_descriptions(conn)
+    conn.execute("""
+        CREATE VIRTUAL TABLE tickets_fts USING fts5(
+            title, description, theme_ref,
+            content='ticket_search', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+
+    conn.execute("""
+        CREATE TRIGGER ticket_search_fts_ai AFTER INSERT ON ticket_search BEGIN
+            INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+            VALUES (new.id, new.title, new.description, new.theme_ref);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER ticket_search_fts_ad AFTER DELETE ON ticket_search BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, title, description, theme_ref)
+            VALUES ('delete', old.id, old.title, old.description, old.theme_ref);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER ticket_search_fts_au AFTER UPDATE ON ticket_search
+        WHEN old.title IS NOT new.title OR old.description IS NOT new.description
+          OR old.theme_ref IS NOT new.theme_ref BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, title, description, theme_ref)
+            VALUES ('delete', old.id, old.title, old.description, old.theme_ref);
+            INSERT INTO tickets_fts(rowid, title, description, theme_ref)
+            VALUES (new.id, new.title, new.description, new.theme_ref);
+        END
+    """)
+
+    # Un déplacement entre tickets et tickets_archive (ligne présente des deux
+    # côtés le temps de la copie) ne touche pas ticket_search. Sur une mise à
+    # jour, un BLOB inchangé garde son texte décompressé.
+    for table, other in (("tickets", "tickets_archive"), ("tickets_archive", "tickets")):
+        prefix = "ticket_search" if table == "tickets" else "ticket_archive_search"
+        conn.execute(f"""
+            CREATE TRIGGER {prefix}_ai AFTER INSERT ON {table}
+            WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE id = new.id) BEGIN
+                INSERT INTO ticket_search (id, title, description, theme_ref)
+                VALUES (new.id, new.title, {_SEARCH_DESCRIPTION}, 't' || new.theme_id);
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {prefix}_ad AFTER DELETE ON {table}
+            WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE id = old.id) BEGIN
+                DELETE FROM ticket_search WHERE id = old.id;
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {prefix}_au AFTER UPDATE OF title, description, theme_id ON {table}
+            WHEN old.title IS NOT new.title OR old.description IS NOT new.description
+              OR old.theme_id IS NOT new.theme_id BEGIN
+                UPDATE ticket_search
+                SET title = new.title, theme_ref = 't' || new.theme_id,
+                    description = CASE WHEN new.description IS old.description THEN description
+                                       ELSE {_SEARCH_DESCRIPTION} END
+                WHERE id = new.id;
+            END
+        """)
@@ -1,24 +1,69 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
 
-@dataclass
+@dataclass(slots=True)
 class Ticket:
     id: Optional[int]
     title: str
-    description: str
+    description: Optional[str]  # None : non chargée (projection de liste, cf. get_description)
     urgency: str
     deadline: Optional[str]
     theme: str
     created_at: Optional[str] = None
     archived: bool = False
+    theme_id: Optional[int] = None  # rempli à la lecture ; à l'écriture, seul le nom compte
+    deadline_day: Optional[int] = None  # lecture seule : jours depuis 1970-01-01 (colonne générée)
 
-@dataclass
+@dataclass(slots=True)
+class TicketFilters:
+    """Criteria applied in SQL by TicketRepository.get_page()."""
+    include_archived: bool = False
+    search: Optional[str] = None
+    urgency: Optional[str] = None
+    theme_id: Optional[int] = None
+    deadline: str = "all"  # "all" | "today" | "week" | "overdue"
+    ids: Optional[Iterable[int]] = None  # restreint à ces tickets
+
+@dataclass(slots=True)
+class TicketChanges:
+    """Result of TicketRepository.changes_since()."""
+    token: int
+    upserted: List[Ticket] = field(default_factory=list)
+    deleted_ids: List[int] = field(default_factory=list)
+    full_reload: bool = False  # token trop ancien : le journal a été purgé
+
+    @property
+    def changed_ids(self) -> set[int]:
+        return {t.id for t in self.upserted} | set(self.deleted_ids)
+
+    def __bool__(self) -> bool:
+        return self.full_reload or bool(self.upserted or self.deleted_ids)
+
+@dataclass(slots=True)
+class TicketStats:
+    """Active ticket counts, read from the trigger-maintained ticket_stats table."""
+    day: int  # jour de référence (jours depuis 1970-01-01) des tranches d'échéance
+    total: int = 0
+    by_theme: Dict[Optional[int], int] = field(default_factory=dict)  # None : sans thème
+    by_urgency: Dict[str, int] = field(default_factory=dict)
+    # "today" | "week" | "overdue" (bornes de TicketFilters.deadline) | "tomorrow"
+    by_deadline: Dict[str, int] = field(default_factory=dict)
+
+@dataclass(slots=True)
 class Note:
     id: Optional[int]
     content: str
     created_at: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
+class NoteRevision:
+    """An entry of the note history (content via NoteRepository.get_revision_text)."""
+    id: int
+    checkpoint: bool  # texte complet ; sinon delta sur la révision précédente
+    size: int  # octets stockés
+    created_at: Optional[str] = None
+
+@dataclass(slots=True)
 class PostIt:
     id: Optional[int]
     content: str
@@ -31,7 +76,7 @@ class PostIt:
     order_index: int = 0
     created_at: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class Theme:
     id: Optional[int]
     name: str
@@ -1,119 +1,563 @@
-from typing import List, Optional
-from .database import get_connection
-from .models import Ticket, Note, PostIt, Theme
+import re
+import unicodedata
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..utils.datetime_utils import deadline_day_range, epoch_day
+from .codec import encode
+from .delta import Delta, diff, patch
+from .database import get_connection, transaction
+from .migrations import (
+    POSTIT_ORDER_GAP, POSTIT_REBALANCE, TICKET_MOVE_COLUMNS, fill_search_descriptions,
+)
+from .models import Ticket, TicketChanges, TicketFilters, TicketStats, Note, NoteRevision, PostIt, Theme
+from .rows import note_revision_row, note_row, postit_row, theme_row, ticket_row
 
 # -------- Tickets --------
 
+# Couleur des thèmes créés implicitement depuis un ticket (cf. TicketFormDialog)
+DEFAULT_THEME_COLOR = "#cccccc"
+
+# Le nom du thème n'est plus stocké dans tickets : il vient de la jointure.
+# Ordre des colonnes = ordre des champs de Ticket (cf. rows.ticket_row).
+# Alias explicites : ORDER BY created_at, id vaut pour une table comme pour l'union.
+# Descriptions volumineuses stockées compressées : decompress_text() (db/codec.py).
+_TICKET_COLUMNS = """
+    t.id AS id, t.title, decompress_text(t.description) AS description, t.urgency, t.deadline, th.name AS theme,
+    t.created_at AS created_at, t.archived, t.theme_id, t.deadline_day
+"""
+# Projection des listes (table, Kanban) : la description, parfois énorme, n'est
+# lue qu'à la demande (get_description / get_by_id). description = None : non chargée.
+_TICKET_LIST_COLUMNS = """
+    t.id AS id, t.title, NULL AS description, t.urgency, t.deadline, th.name AS theme,
+    t.created_at AS created_at, t.archived, t.theme_id, t.deadline_day
+"""
+# {table} : tickets (actifs) ou tickets_archive (archivés), cf. migration 7
+_TICKET_FROM = "{table} t LEFT JOIN themes th ON th.id = t.theme_id"
+_THEME_ID_BY_NAME = "(SELECT id FROM themes WHERE name = ?)"
+_TICKET_TABLES = ("tickets", "tickets_archive")
+
+def _ticket_select(where: List[str], include_archived: bool,
+                   columns: str = _TICKET_COLUMNS, source: str = _TICKET_FROM) -> Tuple[str, int]:
+    """
+    SELECT over active tickets, UNION ALL archived ones when asked. Both arms
+    share `where`: returns (sql, arms) and the caller repeats its parameters
+    once per arm. An ORDER BY appended by the caller applies to the union and
+    is merged from each table's index.
+    """
+    hot = f"SELECT {columns} FROM {source.format(table='tickets')} WHERE " + " AND ".join(
+        ["t.archived = 0"] + where)
+    if not include_archived:
+        return hot, 1
+    cold = f"SELECT {columns} FROM {source.format(table='tickets_archive')}"
+    if where:
+        cold += " WHERE " + " AND ".join(where)
+    return f"{hot} UNION ALL {cold}", 2
+
+def rehome_archived(cur) -> None:
+    """
+    Move tickets whose archived flag no longer matches their table. Writes
+    set the flag in place, then call this inside the same transaction.
+    """
+    for src, dst, flag in (("tickets", "tickets_archive", 1), ("tickets_archive", "tickets", 0)):
+        cur.execute(f"""
+            INSERT INTO {dst} ({TICKET_MOVE_COLUMNS})
+            SELECT {TICKET_MOVE_COLUMNS} FROM {src} WHERE archived = {flag}
+        """)
+        if cur.rowcount:
+            cur.execute(f"DELETE FROM {src} WHERE archived = {flag}")
+
+def _fold(text: str) -> str:
+    """Case/diacritics folding matching the FTS tokenizer (unicode61 remove_diacritics)."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def _fts_query(cur, text: str) -> Optional[str]:
+    """
+    Turn free user input into an FTS5 query: every word must prefix-match the
+    title/description, or the name of the ticket's theme (indexed as "t<id>").
+    """
+    words = [_fold(w) for w in re.findall(r"\w+", text or "")]
+    if not words:
+        return None
+    cur.execute("SELECT id, name FROM themes")
+    themes = [(tid, re.findall(r"\w+", _fold(name or ""))) for tid, name in cur.fetchall()]
+    terms = []
+    for word in words:
+        term = f'{{title description}} : "{word}"*'
+        refs = [f'"t{tid}"' for tid, tokens in themes if any(tok.startswith(word) for tok in tokens)]
+        if refs:
+            term = f"({term} OR theme_ref : ({' OR '.join(refs)}))"
+        terms.append(term)
+    return " AND ".join(terms)
+
+def _filter_where(filters: TicketFilters, where: List[str], params: list) -> bool:
+    """
+    Append the ids/urgency/theme/deadline conditions of filters (not the search
+    text). False when they cannot match anything.
+    """
+    if filters.ids is not None:
+        ids = list(filters.ids)
+        if not ids:
+            return False
+        where.append(f"t.id IN ({','.join('?' * len(ids))})")
+        params += ids
+    if filters.urgency:
+        where.append("t.urgency = ?")
+        params.append(filters.urgency)
+    if filters.theme_id is not None:
+        where.append("t.theme_id = ?")
+        params.append(filters.theme_id)
+    if filters.deadline != "all":
+        # Comparaisons entières sur la colonne indexée ; NULL (sans échéance) est exclu.
+        low, high = deadline_day_range(filters.deadline)
+        if low is not None:
+            where.append("t.deadline_day >= ?")
+            params.append(low)
+        if high is not None:
+            where.append("t.deadline_day <= ?")
+            params.append(high)
+    return True
+
+def _ensure_themes(cur, names: Iterable[Optional[str]]) -> None:
+    """Create missing themes so tickets can reference them by id."""
+    missing = {n for n in names if n}
+    if missing:
+        cur.executemany(
+            "INSERT OR IGNORE INTO themes (name, color) VALUES (?, ?)",
+            [(name, DEFAULT_THEME_COLOR) for name in missing]
+        )
+
+def _inserted_ids(cur, table: str, count: int) -> List[int]:
+    """
+    Ids of the rows just inserted by executemany() on an AUTOINCREMENT table.
+    Inside the write transaction ids are allocated consecutively from sqlite_sequence.
+    """
+    if count == 0:
+        return []
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    last = cur.fetchone()[0]
+    return list(range(last - count + 1, last + 1))
+
+def _chunks(values: List[int], size: int = 500):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
 class TicketRepository:
 
     def get_all(self, include_archived: bool = False) -> List[Ticket]:
+        """List projection: description is None (see get_description)."""
         conn = get_connection()
         cur = conn.cursor()
-        query = """
-            SELECT id, title, description, urgency, deadline, theme, created_at, archived
-            FROM tickets
-        """
-        if not include_archived:
-            query += " WHERE archived = 0"
-        query += " ORDER BY created_at DESC"
+        cur.row_factory = ticket_row
+        query, _ = _ticket_select([], include_archived, columns=_TICKET_LIST_COLUMNS)
+        query += " ORDER BY created_at DESC, id DESC"
         cur.execute(query)
         rows = cur.fetchall()
-        conn.close()
-        return [
-            Ticket(
-                id=row["id"],
-                title=row["title"],
-                description=row["description"],
-                urgency=row["urgency"],
-                deadline=row["deadline"],
-                theme=row["theme"],
-                created_at=row["created_at"],
-                archived=bool(row["archived"]),
-            )
-            for row in rows
-        ]
+        return rows
 
-    def add(self, ticket: Ticket) -> int:
+    def get_page(self, after_created_at: Optional[str] = None, after_id: Optional[int] = None,
+                 limit: int = 200, filters: Optional[TicketFilters] = None) -> List[Ticket]:
+        """
+        Keyset pagination in list order (created_at DESC, id DESC).
+        Pass the created_at/id of the last ticket of the previous page to get the next one.
+        List projection: description is None.
+        """
+        filters = filters or TicketFilters()
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO tickets (title, description, urgency, deadline, theme, archived)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (ticket.title, ticket.description, ticket.urgency,
-              ticket.deadline, ticket.theme, int(ticket.archived)))
-        conn.commit()
-        ticket_id = cur.lastrowid
-        conn.close()
-        return ticket_id
+        where, params = [], []
+        if after_id is not None:
+            where.append("(t.created_at, t.id) < (?, ?)")
+            params += [after_created_at, after_id]
+        if filters.search:
+            match = _fts_query(cur, filters.search)
+            if not match:
+                return []
+            where.append("t.id IN (SELECT rowid FROM tickets_fts WHERE tickets_fts MATCH ?)")
+            params.append(match)
+        if not _filter_where(filters, where, params):
+            return []
+        sql, arms = _ticket_select(where, filters.include_archived, columns=_TICKET_LIST_COLUMNS)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params = params * arms + [limit]
+        cur.row_factory = ticket_row
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        return rows
 
-    def update(self, ticket: Ticket) -> None:
+    def get_many_by_ids(self, ticket_ids: Iterable[int]) -> List[Ticket]:
+        """List projection of these tickets, archived or not (description is None)."""
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("""
-            UPDATE tickets
-            SET title = ?, description = ?, urgency = ?, deadline = ?, theme = ?, archived = ?
-            WHERE id = ?
-        """, (ticket.title, ticket.description, ticket.urgency,
-              ticket.deadline, ticket.theme, int(ticket.archived), ticket.id))
-        conn.commit()
-        conn.close()
+        cur.row_factory = ticket_row
+        tickets = []
+        for chunk in _chunks(list(ticket_ids)):
+            sql, arms = _ticket_select([f"t.id IN ({','.join('?' * len(chunk))})"], True,
+                                       columns=_TICKET_LIST_COLUMNS)
+            cur.execute(sql, chunk * arms)
+            tickets += cur.fetchall()
+        return tickets
 
-    def set_archived(self, ticket_id: int, archived: bool) -> None:
+    def get_by_id(self, ticket_id: int) -> Optional[Ticket]:
+        """The complete ticket, description included, wherever it is stored."""
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("""
-            UPDATE tickets SET archived = ? WHERE id = ?
-        """, (int(archived), ticket_id))
-        conn.commit()
-        conn.close()
+        cur.row_factory = ticket_row
+        sql, arms = _ticket_select(["t.id = ?"], True)
+        cur.execute(sql, [ticket_id] * arms)
+        return cur.fetchone()
 
-    def delete(self, ticket_id: int) -> None:
+    def get_description(self, ticket_id: int) -> Optional[str]:
+        """Description of one ticket ("" if empty), None if the ticket does not exist."""
+        conn = get_connection()
+        row = conn.execute("""
+            SELECT COALESCE(decompress_text(description), '') FROM tickets WHERE id = ?
+            UNION ALL
+            SELECT COALESCE(decompress_text(description), '') FROM tickets_archive WHERE id = ?
+        """, (ticket_id, ticket_id)).fetchone()
+        return row[0] if row else None
+
+    def current_change_token(self) -> int:
+        conn = get_connection()
+        row = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM ticket_changes").fetchone()
+        return row[0]
+
+    def changes_since(self, token: int) -> TicketChanges:
+        """
+        Tickets inserted/updated/deleted after `token` (see current_change_token()).
+        When nothing changed this is a single MIN/MAX lookup on the log's primary key.
+        """
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
-        conn.commit()
-        conn.close()
+        # deux sous-requêtes : MIN et MAX ensemble désactivent l'optimisation min/max
+        cur.execute("SELECT (SELECT MIN(seq) FROM ticket_changes), (SELECT MAX(seq) FROM ticket_changes)")
+        low, high = cur.fetchone()
+        if high is None or high <= token:
+            return TicketChanges(token=token)
+        if low > token + 1:
+            return TicketChanges(token=high, full_reload=True)
+        cur.execute(
+            "SELECT ticket_id, op FROM ticket_changes WHERE seq > ? AND seq <= ? ORDER BY seq",
+            (token, high)
+        )
+        last_op = {}
+        for ticket_id, op in cur.fetchall():
+            last_op[ticket_id] = op
+        deleted = [tid for tid, op in last_op.items() if op == "D"]
+        upserted = self.get_many_by_ids([tid for tid, op in last_op.items() if op != "D"])
+        return TicketChanges(token=high, upserted=upserted, deleted_ids=deleted)
+
+    def search(self, query: str, limit: int = 50, include_archived: bool = False,
+               filters: Optional[TicketFilters] = None) -> List[Ticket]:
+        """
+        Full-text search on title, theme and description, best matches first.
+        filters (the table's filter bar) narrows the matches further; its
+        include_archived then replaces the argument and its search is ignored.
+        List projection: description is None.
+        """
+        conn = get_connection()
+        cur = conn.cursor()
+        match = _fts_query(cur, query)
+        if not match:
+            return []
+        where, params = ["t.id = f.rowid", "tickets_fts MATCH ?"], [match]
+        if filters is not None:
+            include_archived = filters.include_archived
+            if not _filter_where(filters, where, params):
+                return []
+        # Chaque branche lit l'index déjà trié par rang ; l'union fusionne les deux.
+        sql, arms = _ticket_select(
+            where, include_archived,
+            columns=_TICKET_LIST_COLUMNS + ", f.rank AS rank",
+            source="tickets_fts f JOIN " + _TICKET_FROM,
+        )
+        sql += " ORDER BY rank LIMIT ?"
+        cur.row_factory = ticket_row
+        cur.execute(sql, params * arms + [limit])
+        rows = cur.fetchall()
+        return rows
+
+    def stats(self, today: Optional[date] = None) -> TicketStats:
+        """
+        Counts of active tickets from ticket_stats (migration 10): a few rows per
+        theme and urgency, one per deadline day still carrying tickets. Deadline
+        buckets are summed around today, so they roll over at midnight by themselves.
+        """
+        today = today or date.today()
+        day = epoch_day(today)
+        stats = TicketStats(day=day)
+        conn = get_connection()
+        for dimension, key, count in conn.execute(
+                "SELECT dimension, key, count FROM ticket_stats WHERE dimension IN ('total', 'theme', 'urgency')"):
+            if dimension == "total":
+                stats.total = count
+            elif dimension == "theme":
+                stats.by_theme[key if key != "" else None] = count
+            else:
+                stats.by_urgency[key] = count
+        buckets = {kind: deadline_day_range(kind, today) for kind in ("today", "week", "overdue")}
+        buckets["tomorrow"] = (day + 1, day + 1)
+        # Jours entiers < '' (sans échéance) : la borne haute l'exclut d'office
+        sums, params = [], []
+        for low, high in buckets.values():
+            if low is None:
+                sums.append("COALESCE(SUM(count) FILTER (WHERE key <= ?), 0)")
+                params.append(high)
+            else:
+                sums.append("COALESCE(SUM(count) FILTER (WHERE key BETWEEN ? AND ?), 0)")
+                params += [low, high]
+        row = conn.execute(f"""
+            SELECT {", ".join(sums)} FROM ticket_stats
+            WHERE dimension = 'deadline' AND key <= ?
+        """, params + [max(high for _, high in buckets.values())]).fetchone()
+        stats.by_deadline = dict(zip(buckets, row))
+        return stats
+
+    def deadline_alert_counts(self, today: Optional[date] = None) -> Dict[str, int]:
+        """
+        Active tickets per alert bucket: overdue, due today (day_of) and due
+        tomorrow (one_day_before). Keys match the alert settings.
+        """
+        deadline = self.stats(today).by_deadline
+        return {"overdue": deadline["overdue"], "day_of": deadline["today"],
+                "one_day_before": deadline["tomorrow"]}
+
+    def add(self, ticket: Ticket) -> int:
+        with transaction() as conn:
+            cur = conn.cursor()
+            _ensure_themes(cur, [ticket.theme])
+            cur.execute(f"""
+                INSERT INTO tickets (title, description, urgency, deadline, theme_id, archived, updated_at)
+                VALUES (?, ?, ?, ?, {_THEME_ID_BY_NAME}, ?, CURRENT_TIMESTAMP)
+            """, (ticket.title, encode(ticket.description), ticket.urgency,
+                  ticket.deadline, ticket.theme, int(ticket.archived)))
+            ticket_id = cur.lastrowid
+            fill_search_descriptions(conn, [ticket_id])
+            if ticket.archived:
+                rehome_archived(cur)
+        return ticket_id
+
+    def update(self, ticket: Ticket) -> None:
+        self.update_many([ticket])
+
+    def set_archived(self, ticket_id: int, archived: bool) -> None:
+        self.set_archived_many([ticket_id], archived)
+
+    def delete(self, ticket_id: int) -> None:
+        self.delete_many([ticket_id])
+
+    # -- Opérations groupées : une transaction, un commit --
+    # Les écritures touchent la ligne là où elle vit (tickets ou tickets_archive),
+    # puis rehome_archived() déplace celles dont le drapeau archived a changé.
+
+    def add_many(self, tickets: List[Ticket]) -> List[int]:
+        with transaction() as conn:
+            cur = conn.cursor()
+            _ensure_themes(cur, (t.theme for t in tickets))
+            cur.executemany(f"""
+                INSERT INTO tickets (title, description, urgency, deadline, theme_id, archived, updated_at)
+                VALUES (?, ?, ?, ?, {_THEME_ID_BY_NAME}, ?, CURRENT_TIMESTAMP)
+            """, [(t.title, encode(t.description), t.urgency, t.deadline, t.theme, int(t.archived))
+                  for t in tickets])
+            ids = _inserted_ids(cur, "tickets", len(tickets))
+            fill_search_descriptions(conn, ids)
+            if any(t.archived for t in tickets):
+                rehome_archived(cur)
+            return ids
+
+    def update_many(self, tickets: List[Ticket]) -> None:
+        """Write every field; a None description (list projection) keeps the stored one."""
+        with transaction() as conn:
+            cur = conn.cursor()
+            _ensure_themes(cur, (t.theme for t in tickets))
+            rows = [(t.title, encode(t.description), t.urgency, t.deadline, t.theme,
+                     int(t.archived), t.id)
+                    for t in tickets]
+            for table in _TICKET_TABLES:
+                cur.executemany(f"""
+                    UPDATE {table}
+                    SET title = ?, description = COALESCE(?, description), urgency = ?, deadline = ?,
+                        theme_id = {_THEME_ID_BY_NAME}, archived = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, rows)
+            rehome_archived(cur)
+            fill_search_descriptions(conn, (t.id for t in tickets))
+
+    def set_archived_many(self, ticket_ids: Iterable[int], archived: bool) -> None:
+        rows = [(int(archived), tid) for tid in ticket_ids]
+        with transaction() as conn:
+            cur = conn.cursor()
+            for table in _TICKET_TABLES:
+                cur.executemany(
+                    f"UPDATE {table} SET archived = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", rows
+                )
+            rehome_archived(cur)
+
+    def delete_many(self, ticket_ids: Iterable[int]) -> None:
+        rows = [(tid,) for tid in ticket_ids]
+        with transaction() as conn:
+            for table in _TICKET_TABLES:
+                conn.executemany(f"DELETE FROM {table} WHERE id = ?", rows)
 
 ticket_repository = TicketRepository()
 
-# -------- Notes (bloc-notes simple) --------
+# -------- Notes (bloc-notes, historique par deltas) --------
+
+# Le bloc-notes de l'application : ligne 1 de notes
+NOTE_ID = 1
+# Point de reprise (texte complet) au plus toutes les NOTE_CHECKPOINT_EVERY
+# révisions : relire le texte courant rejoue au plus autant de deltas...
+NOTE_CHECKPOINT_EVERY = 50
+# ... ou dès que les deltas depuis le dernier dépassent cette part du texte
+NOTE_CHECKPOINT_RATIO = 0.5
+# Points de reprise gardés dans l'historique, avec les deltas qui les suivent
+NOTE_HISTORY_CHECKPOINTS = 20
+
+_NOTE_HEAD = "SELECT MAX(id) FROM note_revisions WHERE note_id = ?"
+
 
 class NoteRepository:
+    """
+    The note lives in note_revisions (migration 12): full checkpoints, each
+    followed by single-span deltas (db/delta.py). notes row 1 holds the latest
+    checkpoint; writing it records that checkpoint through a trigger.
+    """
 
     def get_latest(self) -> Optional[Note]:
         conn = get_connection()
+        row = conn.execute(
+            "SELECT id, created_at FROM note_revisions WHERE note_id = ? ORDER BY id DESC LIMIT 1",
+            (NOTE_ID,)).fetchone()
+        if row is not None:
+            return Note(NOTE_ID, self._rebuild(conn, row[0]), row[1])
         cur = conn.cursor()
+        cur.row_factory = note_row
         cur.execute("""
-            SELECT id, content, created_at
+            SELECT id, decompress_text(content), created_at
             FROM notes
             ORDER BY created_at DESC
             LIMIT 1
         """)
-        row = cur.fetchone()
-        conn.close()
-        if not row:
+        return cur.fetchone()
+
+    def get_head_id(self) -> Optional[int]:
+        return get_connection().execute(_NOTE_HEAD, (NOTE_ID,)).fetchone()[0]
+
+    def get_head(self) -> Optional[Tuple[int, str]]:
+        """(revision id, text) of the current note; None before the first save."""
+        conn = get_connection()
+        head = conn.execute(_NOTE_HEAD, (NOTE_ID,)).fetchone()[0]
+        if head is None:
+            return None
+        return head, self._rebuild(conn, head)
+
+    def get_revisions(self, limit: int = 100) -> List[NoteRevision]:
+        """History, newest first."""
+        cur = get_connection().cursor()
+        cur.row_factory = note_revision_row
+        cur.execute("""
+            SELECT id, checkpoint, COALESCE(length(CAST(content AS BLOB)), 0), created_at
+            FROM note_revisions WHERE note_id = ?
+            ORDER BY id DESC LIMIT ?
+        """, (NOTE_ID, limit))
+        return cur.fetchall()
+
+    def get_revision_text(self, revision_id: int) -> Optional[str]:
+        """Text of the note as of revision_id; None if it is not (or no longer) in the history."""
+        conn = get_connection()
+        if conn.execute("SELECT 1 FROM note_revisions WHERE id = ? AND note_id = ?",
+                        (revision_id, NOTE_ID)).fetchone() is None:
+            return None
+        return self._rebuild(conn, revision_id)
+
+    @staticmethod
+    def _rebuild(conn, revision_id: int, note_id: int = NOTE_ID, schema: str = "main") -> Optional[str]:
+        """Nearest checkpoint at or before revision_id, then the deltas up to it."""
+        row = conn.execute(f"""
+            SELECT id, decompress_text(content) FROM {schema}.note_revisions
+            WHERE note_id = ? AND checkpoint = 1 AND id <= ?
+            ORDER BY id DESC LIMIT 1
+        """, (note_id, revision_id)).fetchone()
+        if row is None:
+            return None
+        text = row[1] or ""
+        for pos, cut, inserted in conn.execute(f"""
+            SELECT pos, cut, decompress_text(content) FROM {schema}.note_revisions
+            WHERE note_id = ? AND id > ? AND id <= ?
+            ORDER BY id
+        """, (note_id, row[0], revision_id)):
+            text = patch(text, Delta(pos, cut, inserted or ""))
+        return text
+
+    @classmethod
+    def head_text(cls, conn, schema: str = "main") -> Optional[str]:
+        """
+        Current text of the note in schema ("src" for an ATTACHed import source),
+        checkpoint plus deltas; notes.content alone may lag behind. Falls back to
+        the newest note of a legacy base without row NOTE_ID. None if there is none.
+        """
+        row = conn.execute(f"""
+            SELECT id, note_id FROM {schema}.note_revisions
+            ORDER BY note_id = ? DESC, id DESC LIMIT 1
+        """, (NOTE_ID,)).fetchone()
+        if row is None:
             return None
-        return Note(id=row["id"], content=row["content"], created_at=row["created_at"])
+        return cls._rebuild(conn, row[0], row[1], schema)
 
     def save_new(self, content: str) -> int:
         # Deprecated: kept for backward compatibility.
         return self.save_latest(content)
 
     def save_latest(self, content: str) -> int:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM notes WHERE id != 1")
-        cur.execute("""
+        """Store content as a full checkpoint."""
+        with transaction() as conn:
+            self.checkpoint(conn, content)
+        return NOTE_ID
+
+    def save_revision(self, content: str, base_id: Optional[int], base_text: Optional[str]) -> int:
+        """
+        Record content as the new head and return its revision id. When
+        (base_id, base_text) is still the head, only the changed span is
+        written; otherwise, and periodically, a full checkpoint.
+        """
+        with transaction() as conn:
+            head = conn.execute(_NOTE_HEAD, (NOTE_ID,)).fetchone()[0]
+            if head is None or head != base_id or base_text is None:
+                return self.checkpoint(conn, content)
+            count, size = conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(length(CAST(content AS BLOB))), 0) FROM note_revisions
+                WHERE note_id = ? AND id > (
+                    SELECT MAX(id) FROM note_revisions WHERE note_id = ? AND checkpoint = 1)
+            """, (NOTE_ID, NOTE_ID)).fetchone()
+            delta = diff(base_text, content)
+            if (count + 1 >= NOTE_CHECKPOINT_EVERY
+                    or size + len(delta.inserted) > NOTE_CHECKPOINT_RATIO * len(content)):
+                return self.checkpoint(conn, content)
+            cur = conn.execute("""
+                INSERT INTO note_revisions (note_id, checkpoint, pos, cut, content)
+                VALUES (?, 0, ?, ?, ?)
+            """, (NOTE_ID, delta.pos, delta.cut, encode(delta.inserted)))
+            return cur.lastrowid
+
+    @staticmethod
+    def checkpoint(conn, content: str) -> int:
+        """Write content as a full checkpoint inside the caller's transaction; returns the new head."""
+        conn.execute("DELETE FROM notes WHERE id != ?", (NOTE_ID,))
+        # le trigger note_checkpoint_* ajoute la révision complète
+        conn.execute("""
             INSERT INTO notes (id, content, created_at)
-            VALUES (1, ?, CURRENT_TIMESTAMP)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
             ON CONFLICT(id) DO UPDATE
             SET content = excluded.content,
                 created_at = CURRENT_TIMESTAMP
-        """, (content,))
-        conn.commit()
-        note_id = cur.lastrowid or 1
-        conn.close()
-        return note_id
+        """, (NOTE_ID, encode(content)))
+        conn.execute("""
+            DELETE FROM note_revisions WHERE note_id = ? AND id < (
+                SELECT id FROM note_revisions WHERE note_id = ? AND checkpoint = 1
+                ORDER BY id DESC LIMIT 1 OFFSET ?)
+        """, (NOTE_ID, NOTE_ID, NOTE_HISTORY_CHECKPOINTS - 1))
+        return conn.execute(_NOTE_HEAD, (NOTE_ID,)).fetchone()[0]
 
 note_repository = NoteRepository()
 
@@ -124,77 +568,122 @@ class PostItRepository:
     def get_all(self) -> List[PostIt]:
         conn = get_connection()
         cur = conn.cursor()
+        cur.row_factory = postit_row
         cur.execute("""
-            SELECT id, content, x, y, width, height, color, tags, order_index, created_at
+            SELECT id, content, x, y, width, height, color,
+                   COALESCE(tags, ''), COALESCE(order_index, 0), created_at
             FROM postits
             ORDER BY order_index ASC, created_at ASC
         """)
-        rows = cur.fetchall()
-        conn.close()
-        return [
-            PostIt(
-                id=row["id"],
-                content=row["content"],
-                x=row["x"], y=row["y"],
-                width=row["width"], height=row["height"],
-                color=row["color"],
-                tags=row["tags"] if "tags" in row.keys() else "",
-                order_index=row["order_index"] if "order_index" in row.keys() else 0,
-                created_at=row["created_at"],
-            )
-            for row in rows
-        ]
+        return cur.fetchall()
 
     def add(self, postit: PostIt) -> int:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO postits (content, x, y, width, height, color, tags, order_index)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (postit.content, postit.x, postit.y, postit.width, postit.height,
-              postit.color, postit.tags, postit.order_index))
-        conn.commit()
+        with transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO postits (content, x, y, width, height, color, tags, order_index)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (postit.content, postit.x, postit.y, postit.width, postit.height,
+                  postit.color, postit.tags, postit.order_index))
         pid = cur.lastrowid
-        conn.close()
         return pid
 
     def update(self, postit: PostIt) -> None:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE postits
-            SET content = ?, x = ?, y = ?, width = ?, height = ?, color = ?, tags = ?, order_index = ?
-            WHERE id = ?
-        """, (postit.content, postit.x, postit.y, postit.width, postit.height,
-              postit.color, postit.tags, postit.order_index, postit.id))
-        conn.commit()
-        conn.close()
+        with transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE postits
+                SET content = ?, x = ?, y = ?, width = ?, height = ?, color = ?, tags = ?, order_index = ?
+                WHERE id = ?
+            """, (postit.content, postit.x, postit.y, postit.width, postit.height,
+                  postit.color, postit.tags, postit.order_index, postit.id))
 
     def delete(self, postit_id: int) -> None:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM postits WHERE id = ?", (postit_id,))
-        conn.commit()
-        conn.close()
+        with transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM postits WHERE id = ?", (postit_id,))
 
     def get_max_order_index(self) -> int:
+        # MAX sur la colonne de tête de idx_postits_order : une descente d'index, pas un agrégat
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("SELECT COALESCE(MAX(order_index), 0) AS max_order FROM postits")
+        cur.execute("SELECT COALESCE(MAX(order_index), 0) FROM postits")
         row = cur.fetchone()
-        conn.close()
-        return row["max_order"] if row else 0
+        return row[0] if row else 0
 
     def update_order_indexes(self, ordering: List[int]) -> None:
-        conn = get_connection()
-        cur = conn.cursor()
-        for idx, postit_id in enumerate(ordering):
-            cur.execute(
+        """Rewrite the whole order (keys POSTIT_ORDER_GAP apart). A single drag uses move()."""
+        with transaction() as conn:
+            conn.executemany(
                 "UPDATE postits SET order_index = ? WHERE id = ?",
-                (idx, postit_id)
+                [((i + 1) * POSTIT_ORDER_GAP, pid) for i, pid in enumerate(ordering)]
             )
-        conn.commit()
-        conn.close()
+
+    def move(self, postit_id: int, after_id: Optional[int] = None) -> int:
+        """
+        Place a post-it right after after_id (None: first on the wall) by
+        rewriting its key alone, halfway between its new neighbours. When no
+        integer is left between them, the wall is renumbered first (rebalance).
+        Returns the new key.
+        """
+        with transaction() as conn:
+            key = self._key_after(conn, postit_id, after_id)
+            if key is None:
+                self.rebalance()
+                key = self._key_after(conn, postit_id, after_id)
+            conn.execute("UPDATE postits SET order_index = ? WHERE id = ?", (key, postit_id))
+        return key
+
+    @staticmethod
+    def _key_after(conn, postit_id: int, after_id: Optional[int]) -> Optional[int]:
+        """Free key between after_id and its successor; None if they are adjacent."""
+        low = None
+        if after_id is not None:
+            row = conn.execute("SELECT order_index FROM postits WHERE id = ?", (after_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Post-it inconnu : {after_id}")
+            low = row[0]
+        row = conn.execute(f"""
+            SELECT order_index FROM postits
+            WHERE id <> ? {"" if low is None else "AND order_index > ?"}
+            ORDER BY order_index LIMIT 1
+        """, (postit_id,) if low is None else (postit_id, low)).fetchone()
+        high = row[0] if row else None
+        if low is None:
+            return POSTIT_ORDER_GAP if high is None else high - POSTIT_ORDER_GAP
+        if high is None:
+            return low + POSTIT_ORDER_GAP
+        if high - low < 2:
+            return None
+        return low + (high - low) // 2
+
+    def rebalance(self) -> None:
+        """Renumber the wall in its current order, POSTIT_ORDER_GAP apart."""
+        with transaction() as conn:
+            conn.execute(POSTIT_REBALANCE)
+
+    def add_many(self, postits: List[PostIt]) -> List[int]:
+        with transaction() as conn:
+            cur = conn.cursor()
+            cur.executemany("""
+                INSERT INTO postits (content, x, y, width, height, color, tags, order_index)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(p.content, p.x, p.y, p.width, p.height, p.color, p.tags, p.order_index)
+                  for p in postits])
+            return _inserted_ids(cur, "postits", len(postits))
+
+    def update_many(self, postits: List[PostIt]) -> None:
+        with transaction() as conn:
+            conn.executemany("""
+                UPDATE postits
+                SET content = ?, x = ?, y = ?, width = ?, height = ?, color = ?, tags = ?, order_index = ?
+                WHERE id = ?
+            """, [(p.content, p.x, p.y, p.width, p.height, p.color, p.tags, p.order_index, p.id)
+                  for p in postits])
+
+    def delete_many(self, postit_ids: Iterable[int]) -> None:
+        with transaction() as conn:
+            conn.executemany("DELETE FROM postits WHERE id = ?", [(pid,) for pid in postit_ids])
 
 postit_repository = PostItRepository()
 
@@ -205,52 +694,64 @@ class ThemeRepository:
     def get_all(self) -> List[Theme]:
         conn = get_connection()
         cur = conn.cursor()
+        cur.row_factory = theme_row
         cur.execute("SELECT id, name, color, x, y, width, height FROM themes")
-        rows = cur.fetchall()
-        conn.close()
-        return [
-            Theme(
-                id=row["id"], name=row["name"], color=row["color"],
-                x=row["x"], y=row["y"], width=row["width"], height=row["height"]
-            )
-            for row in rows
-        ]
+        return cur.fetchall()
 
-    def add(self, theme: Theme) -> int:
+    def count_tickets(self, theme_id: int) -> int:
+        """Tickets of the theme, active or archived: deleting it leaves them without one."""
         conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO themes (name, color, x, y, width, height)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (theme.name, theme.color, theme.x, theme.y, theme.width, theme.height))
-        conn.commit()
+        return conn.execute("""
+            SELECT (SELECT COUNT(*) FROM tickets WHERE theme_id = ?)
+                 + (SELECT COUNT(*) FROM tickets_archive WHERE theme_id = ?)
+        """, (theme_id, theme_id)).fetchone()[0]
+
+    def add(self, theme: Theme) -> int:
+        with transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO themes (name, color, x, y, width, height)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (theme.name, theme.color, theme.x, theme.y, theme.width, theme.height))
         tid = cur.lastrowid
-        conn.close()
         return tid
 
     def update(self, theme: Theme) -> None:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE themes
-            SET name = ?, color = ?, x = ?, y = ?, width = ?, height = ?
-            WHERE id = ?
-        """, (theme.name, theme.color, theme.x, theme.y, theme.width, theme.height, theme.id))
-        conn.commit()
-        conn.close()
+        with transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE themes
+                SET name = ?, color = ?, x = ?, y = ?, width = ?, height = ?
+                WHERE id = ?
+            """, (theme.name, theme.color, theme.x, theme.y, theme.width, theme.height, theme.id))
 
     def rename_in_tickets(self, old_name: str, new_name: str) -> None:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("UPDATE tickets SET theme = ? WHERE theme = ?", (new_name, old_name))
-        conn.commit()
-        conn.close()
+        # Deprecated: tickets reference themes by id, a rename no longer touches them.
+        return None
 
     def delete(self, theme_id: int) -> None:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM themes WHERE id = ?", (theme_id,))
-        conn.commit()
-        conn.close()
+        self.delete_many([theme_id])
+
+    def add_many(self, themes: List[Theme]) -> List[int]:
+        with transaction() as conn:
+            cur = conn.cursor()
+            cur.executemany("""
+                INSERT INTO themes (name, color, x, y, width, height)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(t.name, t.color, t.x, t.y, t.width, t.height) for t in themes])
+            return _inserted_ids(cur, "themes", len(themes))
+
+    def update_many(self, themes: List[Theme]) -> None:
+        with transaction() as conn:
+            conn.executemany("""
+                UPDATE themes
+                SET name = ?, color = ?, x = ?, y = ?, width = ?, height = ?
+                WHERE id = ?
+            """, [(t.name, t.color, t.x, t.y, t.width, t.height, t.id) for t in themes])
+
+    def delete_many(self, theme_ids: Iterable[int]) -> None:
+        rows = [(tid,) for tid in theme_ids]
+        with transaction() as conn:
+            conn.executemany("DELETE FROM themes WHERE id = ?", rows)
 
 theme_repository = ThemeRepository()
@@ -0,0 +1,30 @@
+"""
+Row factories building model objects straight from SQLite's positional tuples.
+
+Install one on a cursor (``cur.row_factory = ticket_row``) and fetchall()
+returns models. Each factory expects the SELECT to list the columns in the
+model's field order (see the *_COLUMNS constants in repositories.py).
+"""
+
+from .models import Note, NoteRevision, PostIt, Theme, Ticket
+
+
+def ticket_row(cursor, row) -> Ticket:
+    # id, title, description, urgency, deadline, theme, created_at, archived, theme_id, deadline_day
+    return Ticket(row[0], row[1], row[2], row[3], row[4], row[5], row[6], bool(row[7]), row[8], row[9])
+
+
+def postit_row(cursor, row) -> PostIt:
+    return PostIt(*row)
+
+
+def theme_row(cursor, row) -> Theme:
+    return Theme(*row)
+
+
+def note_row(cursor, row) -> Note:
+    return Note(*row)
+
+
+def note_revision_row(cursor, row) -> NoteRevision:
+    return NoteRevision(row[0], bool(row[1]), row[2], row[3])
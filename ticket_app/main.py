@@ -1,4 +1,6 @@
+import logging
 import sys
+import time
 from pathlib import Path
 
 # Permet l'exécution directe du fichier ou depuis un binaire PyInstaller
@@ -11,27 +13,35 @@ if __package__ in (None, ""):
     __package__ = "ticket_app"
 
 from PySide6.QtWidgets import QApplication
-from ticket_app.db.database import init_db
+from ticket_app.db.database import init_db, close_connections
+from ticket_app.services.db_worker import db_worker
 from ticket_app.ui.main_window import MainWindow
 from ticket_app.utils.logging_utils import setup_logging
-from ticket_app.utils.settings_store import load_settings
+from ticket_app.utils.settings_store import get_settings
 from ticket_app.utils import i18n
 from ticket_app.utils.theme_manager import apply_theme
 
 def main():
+    start = time.perf_counter()
     setup_logging()
     init_db()
 
-    settings = load_settings()
+    settings = get_settings()
     i18n.set_language(settings.get("language", "fr"))
 
     app = QApplication(sys.argv)
+    # le worker termine sa requête en cours avant la fermeture des connexions
+    app.aboutToQuit.connect(db_worker.shutdown)
+    app.aboutToQuit.connect(lambda: close_connections(optimize=True))
 
     # feuille de style (thème)
     apply_theme(app, settings)
 
     window = MainWindow()
     window.show()
+    logging.getLogger(__name__).info(
+        "Démarrage en %.1f ms", (time.perf_counter() - start) * 1000
+    )
 
     sys.exit(app.exec())
 
@@ -0,0 +1,91 @@
+"""
+Background database worker.
+
+Service calls submitted here run on a single dedicated thread, which gets its
+own pooled connection (see ConnectionManager); WAL lets it read while the GUI
+thread writes. Results come back as concurrent.futures.Future objects - the
+Qt views consume them through ui.async_loader.AsyncLoader.
+
+A request submitted with a ``key`` supersedes the previous one with the same
+key: if that one has not started yet it is cancelled, otherwise its result is
+discarded (the future fails with Superseded).
+"""
+
+import logging
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Superseded(CancelledError):
+    """A newer request with the same key was submitted while this one ran."""
+
+
+class DbWorker:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._latest: Dict[Hashable, Future] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Créé à la demande : relancé après shutdown() (tests, réinitialisation)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-worker")
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args, key: Optional[Hashable] = None, **kwargs) -> Future:
+        """Run fn(*args, **kwargs) on the worker thread."""
+        holder = {}
+
+        def run():
+            if key is not None and not self._is_latest(key, holder):
+                raise Superseded(key)
+            result = fn(*args, **kwargs)
+            if key is not None and not self._is_latest(key, holder):
+                raise Superseded(key)
+            return result
+
+        with self._lock:
+            future = self._get_executor().submit(run)
+            holder["future"] = future
+            if key is not None:
+                previous = self._latest.get(key)
+                self._latest[key] = future
+                future.add_done_callback(lambda f: self._forget(key, f))
+            else:
+                previous = None
+        if previous is not None:
+            previous.cancel()
+        return future
+
+    def _is_latest(self, key: Hashable, holder: dict) -> bool:
+        # holder est rempli sous le verrou par submit()
+        with self._lock:
+            return self._latest.get(key) is holder["future"]
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._latest.get(key) is future:
+                del self._latest[key]
+
+    def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait until every request submitted so far has finished (FIFO queue)."""
+        with self._lock:
+            if self._executor is None:
+                return
+            marker = self._executor.submit(lambda: None)
+        marker.result(timeout)
+
+    def shutdown(self) -> None:
+        """Cancel queued requests and wait for the running one."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._latest.clear()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+db_worker = DbWorker()
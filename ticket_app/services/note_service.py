@@ -1,12 +1,63 @@
+import threading
+from typing import List, Optional, Tuple
+from ..db import database
+from ..db.models import NoteRevision
 from ..db.repositories import note_repository
 
 class NoteService:
+    """
+    The note and its history. The current revision's text is kept in memory:
+    it is the base the next save is diffed against, so an autosave writes the
+    edited span, not the whole note.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (base, révision, texte) ; la base change dans les tests et après une réinitialisation
+        self._head: Optional[Tuple[str, Optional[int], str]] = None
+
+    def _current(self) -> Tuple[Optional[int], str]:
+        key = str(database.DB_PATH)
+        head_id = note_repository.get_head_id()
+        # Une autre instance (ou le serveur d'API) a pu écrire : on relit sa révision
+        if self._head is None or self._head[:2] != (key, head_id):
+            if head_id is None:
+                note = note_repository.get_latest()
+                self._head = (key, None, note.content if note else "")
+            else:
+                head_id, text = note_repository.get_head()
+                self._head = (key, head_id, text)
+        return self._head[1], self._head[2]
 
     def get_current_content(self) -> str:
-        note = note_repository.get_latest()
-        return note.content if note else ""
+        with self._lock:
+            return self._current()[1]
 
     def save_content(self, content: str) -> None:
-        note_repository.save_latest(content)
+        """Autosave target: a no-op when nothing changed, a delta otherwise."""
+        with self._lock:
+            head_id, text = self._current()
+            if head_id is not None and content == text:
+                return
+            revision_id = note_repository.save_revision(content, head_id, text)
+            self._head = (str(database.DB_PATH), revision_id, content)
+
+    def get_history(self, limit: int = 100) -> List[NoteRevision]:
+        return note_repository.get_revisions(limit)
+
+    def get_revision_content(self, revision_id: int) -> Optional[str]:
+        return note_repository.get_revision_text(revision_id)
+
+    def restore_revision(self, revision_id: int) -> str:
+        """Make an old revision current again (as a new revision). Returns its text."""
+        content = note_repository.get_revision_text(revision_id)
+        if content is None:
+            raise ValueError(f"Révision inconnue : {revision_id}")
+        self.save_content(content)
+        return content
+
+    def clear_caches(self) -> None:
+        with self._lock:
+            self._head = None
 
 note_service = NoteService()
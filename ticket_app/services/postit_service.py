@@ -1,5 +1,7 @@
-from typing import List
+from typing import Iterable, List, Optional
 from ..db.models import PostIt
+from ..db.database import transaction
+from ..db.migrations import POSTIT_ORDER_GAP
 from ..db.repositories import postit_repository
 
 class PostItService:
@@ -17,19 +19,20 @@ class PostItService:
         height: int = 150,
         color: str = "yellow"
     ) -> PostIt:
-        next_order = postit_repository.get_max_order_index() + 1
-        p = PostIt(
-            id=None,
-            content=content,
-            x=x,
-            y=y,
-            width=width,
-            height=height,
-            color=color,
-            tags=tags,
-            order_index=next_order
-        )
-        p.id = postit_repository.add(p)
+        with transaction():
+            next_order = postit_repository.get_max_order_index() + POSTIT_ORDER_GAP
+            p = PostIt(
+                id=None,
+                content=content,
+                x=x,
+                y=y,
+                width=width,
+                height=height,
+                color=color,
+                tags=tags,
+                order_index=next_order
+            )
+            p.id = postit_repository.add(p)
         return p
 
     def update_postit(self, postit: PostIt) -> None:
@@ -41,4 +44,26 @@ class PostItService:
     def reorder_postits(self, ordering: List[int]) -> None:
         postit_repository.update_order_indexes(ordering)
 
+    def move_postit(self, postit_id: int, after_id: Optional[int] = None) -> int:
+        """Drag and drop: one row written. Returns the post-it's new order_index."""
+        return postit_repository.move(postit_id, after_id)
+
+    # -- Opérations groupées (un seul commit) --
+
+    def create_postits(self, postits: List[PostIt]) -> List[PostIt]:
+        """Insert post-its at the end of the wall, keeping their relative order."""
+        with transaction():
+            next_order = postit_repository.get_max_order_index() + POSTIT_ORDER_GAP
+            for offset, p in enumerate(postits):
+                p.order_index = next_order + offset * POSTIT_ORDER_GAP
+            for p, pid in zip(postits, postit_repository.add_many(postits)):
+                p.id = pid
+        return postits
+
+    def update_postits(self, postits: List[PostIt]) -> None:
+        postit_repository.update_many(postits)
+
+    def delete_postits(self, postit_ids: Iterable[int]) -> None:
+        postit_repository.delete_many(postit_ids)
+
 postit_service = PostItService()
@@ -27,6 +27,9 @@ class ThemeService:
     def get_theme_colors(self) -> Dict[str, str]:
         return {name: theme.color for name, theme in self._cache.items()}
 
+    def get_theme_colors_by_id(self) -> Dict[int, str]:
+        return {theme.id: theme.color for theme in self._cache.values()}
+
     def create(self, name: str, color: str, x=0, y=0, width=0, height=0) -> Theme:
         t = Theme(id=None, name=name, color=color, x=x, y=y, width=width, height=height)
         t.id = theme_repository.add(t)
@@ -34,11 +37,13 @@ class ThemeService:
         return t
 
     def update(self, theme: Theme, old_name: str | None = None) -> None:
+        # les tickets référencent le thème par id : renommer = une seule ligne
         theme_repository.update(theme)
-        if old_name and old_name != theme.name:
-            theme_repository.rename_in_tickets(old_name, theme.name)
         self.refresh_cache()
 
+    def count_tickets(self, theme_id: int) -> int:
+        return theme_repository.count_tickets(theme_id)
+
     def delete(self, theme_id: int) -> None:
         theme_repository.delete(theme_id)
         self.refresh_cache()
@@ -1,11 +1,149 @@
-from typing import List
-from ..db.models import Ticket
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..db.models import Ticket, TicketChanges, TicketFilters, TicketStats
 from ..db.repositories import ticket_repository
 
+# Descriptions gardées en mémoire (panneau de détail, formulaire d'édition)
+DESCRIPTION_CACHE_SIZE = 64
+# Tickets partagés entre les vues (table, détail, Kanban) : un objet par id
+TICKET_CACHE_SIZE = 5000
+
+_TICKET_FIELDS = tuple(f.name for f in fields(Ticket))
+
+
 class TicketService:
+    """
+    Ticket use cases. Every ticket handed out goes through an identity map:
+    the table, the detail panel and the Kanban share one object per id,
+    refreshed in place by later reads. Writes made through the service, and
+    those reported by the change feed, evict the tickets they touch.
+    """
+
+    def __init__(self):
+        # appelé depuis le thread GUI et le worker : accès sous verrou
+        self._lock = threading.Lock()
+        self._descriptions: "OrderedDict[int, str]" = OrderedDict()
+        self._tickets: "OrderedDict[int, Ticket]" = OrderedDict()
+
+    def _intern(self, tickets: List[Ticket]) -> List[Ticket]:
+        """Swap fetched tickets for the shared instance of their id, updated with the fetched values."""
+        shared_tickets = []
+        with self._lock:
+            for ticket in tickets:
+                shared = self._tickets.get(ticket.id)
+                if shared is None:
+                    self._tickets[ticket.id] = shared = ticket
+                else:
+                    self._tickets.move_to_end(ticket.id)
+                    for name in _TICKET_FIELDS:
+                        value = getattr(ticket, name)
+                        # projection de liste : garder une description déjà chargée
+                        if value is not None or name != "description":
+                            setattr(shared, name, value)
+                shared_tickets.append(shared)
+            while len(self._tickets) > TICKET_CACHE_SIZE:
+                self._tickets.popitem(last=False)
+        return shared_tickets
+
+    def get_ticket(self, ticket_id: int) -> Optional[Ticket]:
+        """The shared ticket for this id (list projection), None if it does not exist."""
+        tickets = self.get_tickets([ticket_id])
+        return tickets[0] if tickets else None
+
+    def get_tickets(self, ticket_ids: Iterable[int]) -> List[Ticket]:
+        """Shared tickets in the order of ticket_ids; unknown ids are skipped. One query for the misses."""
+        ticket_ids = list(ticket_ids)
+        with self._lock:
+            found = {tid: self._tickets[tid] for tid in ticket_ids if tid in self._tickets}
+            for tid in found:
+                self._tickets.move_to_end(tid)
+        missing = [tid for tid in ticket_ids if tid not in found]
+        if missing:
+            found.update((t.id, t) for t in self._intern(ticket_repository.get_many_by_ids(missing)))
+        return [found[tid] for tid in ticket_ids if tid in found]
 
     def get_all_tickets(self, include_archived: bool = False) -> List[Ticket]:
-        return ticket_repository.get_all(include_archived=include_archived)
+        return self._intern(ticket_repository.get_all(include_archived=include_archived))
+
+    def get_ticket_page(self, after_created_at: Optional[str] = None, after_id: Optional[int] = None,
+                        limit: int = 200, filters: Optional[TicketFilters] = None) -> List[Ticket]:
+        return self._intern(
+            ticket_repository.get_page(after_created_at, after_id, limit=limit, filters=filters)
+        )
+
+    # -- Descriptions : chargées à la demande, les listes ne les lisent pas --
+
+    def get_description(self, ticket_id: int) -> str:
+        with self._lock:
+            if ticket_id in self._descriptions:
+                self._descriptions.move_to_end(ticket_id)
+                return self._descriptions[ticket_id]
+        description = ticket_repository.get_description(ticket_id)
+        if description is None:
+            return ""
+        with self._lock:
+            self._descriptions[ticket_id] = description
+            if len(self._descriptions) > DESCRIPTION_CACHE_SIZE:
+                self._descriptions.popitem(last=False)
+        return description
+
+    def cached_description(self, ticket_id: int) -> Optional[str]:
+        """The description if it is cached, without touching the database."""
+        with self._lock:
+            return self._descriptions.get(ticket_id)
+
+    def clear_caches(self) -> None:
+        """Drop cached data, e.g. after the database file was replaced or merged."""
+        with self._lock:
+            self._descriptions.clear()
+            self._tickets.clear()
+
+    def _forget(self, ticket_ids: Iterable[int]) -> None:
+        with self._lock:
+            for ticket_id in ticket_ids:
+                self._descriptions.pop(ticket_id, None)
+                self._tickets.pop(ticket_id, None)
+
+    def current_change_token(self) -> int:
+        return ticket_repository.current_change_token()
+
+    def changes_since(self, token: int) -> TicketChanges:
+        changes = ticket_repository.changes_since(token)
+        # écritures d'une autre instance : le journal dit quelles entrées périment
+        if changes.full_reload:
+            self.clear_caches()
+        elif changes:
+            self._forget(changes.changed_ids)
+            changes.upserted = self._intern(changes.upserted)
+        return changes
+
+    def poll_changes(self, token: int, filters: TicketFilters) -> Tuple[TicketChanges, List[Ticket]]:
+        """
+        Changes since token, plus the changed tickets that match filters
+        (empty on full_reload). One call for the background auto-refresh.
+        """
+        changes = self.changes_since(token)
+        if not changes or changes.full_reload:
+            return changes, []
+        filters.ids = changes.changed_ids
+        matching = self._intern(ticket_repository.get_page(limit=len(filters.ids), filters=filters))
+        return changes, matching
+
+    def search_tickets(self, query: str, limit: int = 50, include_archived: bool = False,
+                       filters: Optional[TicketFilters] = None) -> List[Ticket]:
+        """Best matches first (bm25), see TicketRepository.search."""
+        return self._intern(ticket_repository.search(query, limit=limit, include_archived=include_archived,
+                                                      filters=filters))
+
+    def stats(self, today: Optional[date] = None) -> TicketStats:
+        """Active ticket counts (filter combos, alerts): read from counters, no ticket scan."""
+        return ticket_repository.stats(today)
+
+    def deadline_alert_counts(self) -> Dict[str, int]:
+        return ticket_repository.deadline_alert_counts()
 
     def create_ticket(self, title, description, urgency, deadline, theme) -> Ticket:
         t = Ticket(
@@ -22,14 +160,44 @@ class TicketService:
 
     def update_ticket(self, ticket: Ticket) -> None:
         ticket_repository.update(ticket)
+        self._forget([ticket.id])
 
     def archive_ticket(self, ticket_id: int) -> None:
         ticket_repository.set_archived(ticket_id, True)
+        self._forget([ticket_id])
 
     def unarchive_ticket(self, ticket_id: int) -> None:
         ticket_repository.set_archived(ticket_id, False)
+        self._forget([ticket_id])
 
     def delete_ticket(self, ticket_id: int) -> None:
         ticket_repository.delete(ticket_id)
+        self._forget([ticket_id])
+
+    # -- Opérations groupées (un seul commit) --
+
+    def create_tickets(self, tickets: List[Ticket]) -> List[Ticket]:
+        for t, tid in zip(tickets, ticket_repository.add_many(tickets)):
+            t.id = tid
+        return tickets
+
+    def update_tickets(self, tickets: List[Ticket]) -> None:
+        ticket_repository.update_many(tickets)
+        self._forget(t.id for t in tickets)
+
+    def archive_tickets(self, ticket_ids: Iterable[int]) -> None:
+        ticket_ids = list(ticket_ids)
+        ticket_repository.set_archived_many(ticket_ids, True)
+        self._forget(ticket_ids)
+
+    def unarchive_tickets(self, ticket_ids: Iterable[int]) -> None:
+        ticket_ids = list(ticket_ids)
+        ticket_repository.set_archived_many(ticket_ids, False)
+        self._forget(ticket_ids)
+
+    def delete_tickets(self, ticket_ids: Iterable[int]) -> None:
+        ticket_ids = list(ticket_ids)
+        ticket_repository.delete_many(ticket_ids)
+        self._forget(ticket_ids)
 
 ticket_service = TicketService()
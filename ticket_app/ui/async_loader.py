@@ -0,0 +1,62 @@
+import logging
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable, Hashable, Optional
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtWidgets import QMessageBox
+
+from ..db.database import DatabaseBusyError
+from ..services.db_worker import db_worker
+from ..utils.i18n import tr
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLoader(QObject):
+    """
+    Runs service calls on the database worker and hands their results back
+    on the GUI thread. Keys are scoped to this loader: a new run() with the
+    same key supersedes the pending one, whose callbacks are never called.
+    """
+
+    # (callback, value) émis depuis le thread du worker, reçu dans le thread GUI
+    _delivered = Signal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._delivered.connect(self._deliver)
+
+    def run(self, key: Hashable, fn: Callable[..., Any], *args,
+            on_result: Callable[[Any], None],
+            on_error: Optional[Callable[[BaseException], None]] = None,
+            **kwargs) -> Future:
+        future = db_worker.submit(fn, *args, key=(id(self), key), **kwargs)
+        future.add_done_callback(lambda f: self._on_done(f, on_result, on_error))
+        return future
+
+    def _on_done(self, future: Future, on_result, on_error) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if isinstance(error, CancelledError):
+            return  # remplacée par une requête plus récente
+        try:
+            if error is None:
+                self._delivered.emit(on_result, future.result())
+            elif on_error is not None:
+                self._delivered.emit(on_error, error)
+            else:
+                logger.error("Requête en arrière-plan échouée", exc_info=error)
+        except RuntimeError:
+            pass  # widget détruit avant la fin de la requête
+
+    def _deliver(self, callback, value) -> None:
+        callback(value)
+
+
+def show_write_error(parent, error: BaseException) -> None:
+    """Tell the user a write run through an AsyncLoader was not saved."""
+    if isinstance(error, DatabaseBusyError):
+        QMessageBox.warning(parent, tr("dlg.db.title"), tr("db.busy"))
+    else:
+        QMessageBox.critical(parent, tr("dlg.db.title"), str(error))
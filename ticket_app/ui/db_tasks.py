@@ -0,0 +1,64 @@
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+from ..db.backup import BackupCancelled, backup_to
+from ..db.database import release_connection
+from ..db.importer import import_database
+
+
+class BackupTask(QObject):
+    """Exports the database on a background thread, reporting through Qt signals."""
+
+    progress = Signal(int, int)  # pages copiées, pages au total
+    finished = Signal()
+    failed = Signal(object)      # exception
+    cancelled = Signal()
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._cancel = threading.Event()
+
+    def start(self) -> None:
+        # Thread à part, pas le worker de lecture : l'export peut durer
+        threading.Thread(target=self._run, name="db-backup", daemon=True).start()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _run(self) -> None:
+        try:
+            backup_to(self.path, progress=self.progress.emit, cancel=self._cancel)
+        except BackupCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(e)
+        else:
+            self.finished.emit()
+
+
+class ImportTask(QObject):
+    """Merges another database into the live one on a background thread."""
+
+    progress = Signal(str, int, int)  # table importée, étape, nombre d'étapes
+    finished = Signal(object)         # ImportReport
+    failed = Signal(object)           # exception
+
+    def __init__(self, path, policy: str, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.policy = policy
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="db-import", daemon=True).start()
+
+    def _run(self) -> None:
+        try:
+            report = import_database(self.path, self.policy, progress=self.progress.emit)
+        except Exception as e:
+            self.failed.emit(e)
+        else:
+            self.finished.emit(report)
+        finally:
+            release_connection()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from itertools import count
 from typing import List
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel,
@@ -9,6 +10,7 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor
 
 from ..services.ticket_service import ticket_service
+from .async_loader import AsyncLoader
 from ..db.models import Ticket
 from ..utils.i18n import tr
 
@@ -44,6 +46,8 @@ class KanbanDialog(QDialog):
         self.setWindowTitle(tr("kanban.title"))
         self.tickets: List[Ticket] = []
         self.column_widgets: List[KanbanList] = []
+        self.loader = AsyncLoader(self)
+        self._drops = count()
         self._init_ui()
         self._load_tickets()
 
@@ -57,6 +61,9 @@ class KanbanDialog(QDialog):
         self.group_by_combo.currentIndexChanged.connect(self._refresh_columns)
         top.addWidget(self.group_by_combo)
         top.addStretch()
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: #a33;")
+        top.addWidget(self.status_label)
         layout.addLayout(top)
 
         self.scroll = QScrollArea()
@@ -69,9 +76,11 @@ class KanbanDialog(QDialog):
         layout.addWidget(self.scroll)
 
     def _load_tickets(self):
-        self.tickets = [
-            t for t in ticket_service.get_all_tickets(include_archived=False)
-        ]
+        self.loader.run("tickets", ticket_service.get_all_tickets,
+                        include_archived=False, on_result=self._on_tickets_loaded)
+
+    def _on_tickets_loaded(self, tickets: List[Ticket]):
+        self.tickets = tickets
         self._refresh_columns()
 
     def _group_keys(self):
@@ -143,16 +152,28 @@ class KanbanDialog(QDialog):
         """After a drop, update ticket attribute to match target column."""
         mode = column.key  # "theme" or "urgency"
         new_value = column.value
-        # For each real item in this column, update the ticket
-        for i in range(column.count()):
-            item = column.item(i)
-            ticket_id = item.data(Qt.UserRole)
-            if ticket_id is None:
-                continue
-            t = next((x for x in self.tickets if x.id == ticket_id), None)
-            if not t:
+        # Tickets partagés avec la fenêtre principale (identity map du service),
+        # déjà chargés par la vue : aucune lecture de la base ici
+        by_id = {t.id: t for t in self.tickets}
+        ticket_ids = [column.item(i).data(Qt.UserRole) for i in range(column.count())]
+        # For each real item in this column, update the ticket (one commit for all)
+        changed = []
+        for t in (by_id[tid] for tid in ticket_ids if tid in by_id):
+            if (getattr(t, mode) or "") == new_value:
                 continue
             setattr(t, mode, new_value)
-            ticket_service.update_ticket(t)
-        # Refresh to maintain placeholders
+            changed.append(t)
+        if changed:
+            # Écriture sur le worker (file FIFO, une clé par dépôt pour n'en perdre
+            # aucun) : une base verrouillée fait attendre la file, pas l'interface.
+            self.loader.run(("drop", next(self._drops)), ticket_service.update_tickets, changed,
+                            on_result=lambda _: self.status_label.clear(),
+                            on_error=self._on_drop_failed)
+        # Refresh to maintain placeholders (queued after the write)
+        self._load_tickets()
+
+    def _on_drop_failed(self, error):
+        # Les objets partagés ont été modifiés avant l'échec : on relit la base
+        ticket_service.clear_caches()
+        self.status_label.setText(tr("db.busy"))
         self._load_tickets()
@@ -1,38 +1,68 @@
+from itertools import count
+
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QToolBar,
     QTableView, QSplitter, QTabWidget, QMessageBox, QCheckBox,
-    QLineEdit, QComboBox, QHBoxLayout, QLabel, QFileDialog, QAbstractItemView, QApplication, QMenu
+    QLineEdit, QComboBox, QHBoxLayout, QLabel, QFileDialog, QAbstractItemView, QApplication, QMenu,
+    QProgressDialog, QInputDialog
 )
 from PySide6.QtGui import QAction, QShortcut, QKeySequence
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, Signal
 
 from ..services.ticket_service import ticket_service
 from ..services.theme_service import theme_service
+from ..db.models import TicketFilters
+from ..db.maintenance import idle_maintenance
 from .ticket_table_model import TicketTableModel
 from .ticket_form_dialog import TicketFormDialog
 from .notes_panel import NotesPanel
 from .postit_board import PostItBoard
 from .ticket_detail_panel import TicketDetailPanel
-from .ticket_filter_proxy import TicketFilterProxy
 from .settings_dialog import SettingsDialog
 from .command_palette import CommandPalette
 from .kanban_dialog import KanbanDialog
-from ..config import DB_PATH
+from .async_loader import AsyncLoader, show_write_error
+from .db_tasks import BackupTask, ImportTask
 from ..utils.i18n import tr
-from ..utils import i18n
+from ..utils import i18n, settings_store
 from ..utils.theme_manager import apply_theme
 
+SEARCH_DEBOUNCE_MS = 200
+# Passe d'entretien du stockage (rendu de pages libres), sur le worker
+MAINTENANCE_INTERVAL_MS = 5 * 60 * 1000
+TICKET_PAGE_SIZE = 200
+# Libellé d'un filtre sans son compteur "(n)", réécrit à chaque lecture des statistiques
+LABEL_ROLE = Qt.UserRole + 1
+
+
 class MainWindow(QMainWindow):
 
+    # réglages modifiés, livrés dans le thread GUI quel que soit le thread qui a écrit
+    _settings_changed = Signal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle(tr("app.title"))
         self._alerts_shown = False
+        # lectures sur le thread du worker, résultats livrés dans le thread GUI
+        self.loader = AsyncLoader(self)
+        # écritures aussi sur le worker : une clé unique chacune, jamais remplacées
+        self._writes = count()
+        self._change_token = None
+        self._pending_selection = None
+        self._stats = None
+        self._backup_task = None
+        # vue en lecture seule tenue à jour par abonnement, pas relue à chaque passage
+        self._settings = settings_store.get_settings()
+        self._settings_changed.connect(self._on_settings_changed)
+        self._settings_listener = self._settings_changed.emit
+        settings_store.subscribe(self._settings_listener)
 
         self._init_ui()
         self._load_tickets()
         self._init_shortcuts()
         self._init_auto_refresh()
+        self._init_maintenance()
 
     def _init_ui(self):
         toolbar = QToolBar("Actions")
@@ -69,13 +99,14 @@ class MainWindow(QMainWindow):
         toolbar.addAction(act_kanban)
 
         self.show_archived = QCheckBox(tr("menu.show_archived"))
-        self.show_archived.stateChanged.connect(self._load_tickets)
+        # l'argument du signal (état, checked) n'est pas un select_id
+        self.show_archived.stateChanged.connect(lambda *_: self._load_tickets())
         toolbar.addWidget(self.show_archived)
 
         act_new.triggered.connect(self._new_ticket)
         act_edit.triggered.connect(self._edit_ticket)
         act_delete.triggered.connect(self._delete_ticket)
-        act_refresh.triggered.connect(self._load_tickets)
+        act_refresh.triggered.connect(lambda *_: self._load_tickets())
         self.act_archive.triggered.connect(self._toggle_archive)
         act_settings.triggered.connect(self._open_settings)
         act_db.triggered.connect(self._open_db_menu)
@@ -88,10 +119,10 @@ class MainWindow(QMainWindow):
 
         # Tableau des tickets
         self.table_view = QTableView()
-        self.model = TicketTableModel([])
-        self.proxy = TicketFilterProxy(self)
-        self.proxy.setSourceModel(self.model)
-        self.table_view.setModel(self.proxy)
+        # chargement paginé : les filtres sont appliqués en SQL
+        self.model = TicketTableModel(fetch_page=self._fetch_ticket_page, page_size=TICKET_PAGE_SIZE)
+        self.model.reloaded.connect(self._on_tickets_reloaded)
+        self.table_view.setModel(self.model)
         self.table_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.table_view.selectionModel().selectionChanged.connect(
@@ -125,7 +156,12 @@ class MainWindow(QMainWindow):
         filter_bar = QHBoxLayout()
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText(tr("filter.search"))
-        self.search_edit.textChanged.connect(self._apply_filters)
+        # recherche FTS déclenchée après une courte pause de frappe
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._apply_filters)
+        self.search_edit.textChanged.connect(self._search_timer.start)
         self.cmb_urgency = QComboBox()
         self._populate_urgency_combo()
         self.cmb_urgency.currentTextChanged.connect(self._apply_filters)
@@ -133,7 +169,7 @@ class MainWindow(QMainWindow):
         self._populate_deadline_combo()
         self.cmb_deadline.currentTextChanged.connect(self._apply_filters)
         self.cmb_theme = QComboBox()
-        self.cmb_theme.addItem(tr("filter.all"))
+        self.cmb_theme.addItem(tr("filter.all"), None)
         self.cmb_theme.currentTextChanged.connect(self._apply_filters)
 
         self.lbl_search = QLabel(tr("filter.search"))
@@ -153,8 +189,7 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(central)
 
     def _init_shortcuts(self):
-        from ..utils.settings_store import load_settings
-        settings = load_settings()
+        settings = self._settings
         self._shortcuts_map = {}
         for sc in getattr(self, "_shortcuts_objs", []):
             sc.deleteLater()
@@ -192,6 +227,7 @@ class MainWindow(QMainWindow):
             if idx >= 0:
                 self.cmb_urgency.setCurrentIndex(idx)
         self.cmb_urgency.blockSignals(False)
+        self._show_filter_counts()
 
     def _populate_deadline_combo(self):
         current = self.cmb_deadline.currentData()
@@ -206,44 +242,120 @@ class MainWindow(QMainWindow):
             if idx >= 0:
                 self.cmb_deadline.setCurrentIndex(idx)
         self.cmb_deadline.blockSignals(False)
+        self._show_filter_counts()
+
+    def _load_tickets(self, select_id=None):
+        """Reload the list in the background; select_id defaults to the current ticket."""
+        if select_id is None:
+            current = self._get_selected_ticket()
+            select_id = current.id if current else None
+        self._pending_selection = select_id
+        # jeton lu avant la première page, dans la même file du worker :
+        # une écriture concurrente sera rejouée, pas perdue
+        self.loader.run("change_token", ticket_service.current_change_token,
+                        on_result=self._set_change_token)
+        self.model.reload()
+        self.loader.run("themes", theme_service.refresh_cache,
+                        on_result=lambda _: self._on_themes_loaded())
+        self._load_stats()
+        if hasattr(self.postit_board, "_refresh_wall"):
+            self.postit_board._refresh_wall()
 
-    def _load_tickets(self):
-        current = self._get_selected_ticket()
-        current_id = current.id if current else None
-        tickets = ticket_service.get_all_tickets(
-            include_archived=self.show_archived.isChecked()
-        )
-        self.model.set_tickets(tickets)
-        self.model.set_theme_colors(theme_service.get_theme_colors())
-        self._refresh_theme_filter(tickets)
-        self._restore_selection(current_id)
+    def _set_change_token(self, token):
+        self._change_token = token
+
+    def _on_tickets_reloaded(self):
+        self._restore_selection(self._pending_selection)
+        self._pending_selection = None
         self._update_archive_action_label()
         self.detail_panel.set_ticket(self._get_selected_ticket())
-        self._show_deadline_alerts()
-        if hasattr(self.postit_board, "_refresh_wall"):
-            self.postit_board._refresh_wall()
+
+    def _on_themes_loaded(self):
+        self.model.set_theme_colors(theme_service.get_theme_colors_by_id())
+        self._refresh_theme_filter()
+
+    def _current_filters(self) -> TicketFilters:
+        return TicketFilters(
+            include_archived=self.show_archived.isChecked(),
+            search=self.search_edit.text().strip() or None,
+            urgency=self.cmb_urgency.currentData(),
+            theme_id=self.cmb_theme.currentData(),
+            deadline=self.cmb_deadline.currentData() or "all",
+        )
+
+    def _fetch_ticket_page(self, after_created_at, after_id, limit, on_page):
+        filters = self._current_filters()
+        if filters.search:
+            # recherche : meilleurs résultats d'abord (bm25), une seule page,
+            # le rang ne se prête pas à la pagination par clé
+            if after_id is not None:
+                on_page([])
+                return
+            self.loader.run(
+                "ticket_page", ticket_service.search_tickets,
+                filters.search, limit=limit, filters=filters,
+                on_result=on_page,
+            )
+            return
+        # une nouvelle page (ou un reload) remplace la requête encore en attente
+        self.loader.run(
+            "ticket_page", ticket_service.get_ticket_page,
+            after_created_at, after_id, limit=limit, filters=filters,
+            on_result=on_page,
+        )
+
+    def _refresh_changes(self):
+        """Auto-refresh tick: apply only the tickets changed since the last load."""
+        # un stat() : une modification externe de settings.json est notifiée ici
+        settings_store.get_settings()
+        if self._change_token is None:
+            return
+        self.loader.run("changes", ticket_service.poll_changes,
+                        self._change_token, self._current_filters(),
+                        on_result=self._apply_changes)
+
+    def _apply_changes(self, result):
+        changes, matching = result
+        if not changes:
+            return
+        if changes.full_reload:
+            self._load_tickets()
+            return
+        self._change_token = changes.token
+        self.model.apply_changes(changes.changed_ids, matching)
+        self._update_archive_action_label()
+        self._load_stats()
 
     def _get_selected_ticket(self):
         indexes = self.table_view.selectionModel().selectedRows()
         if not indexes:
             return None
-        proxy_index = indexes[0]
-        source_index = self.proxy.mapToSource(proxy_index)
-        return self.model.get_ticket_at(source_index.row())
+        return self.model.get_ticket_at(indexes[0].row())
 
     def _new_ticket(self):
         dlg = TicketFormDialog(self)
         if dlg.exec():
             data = dlg.get_ticket_data()
-            ticket_service.create_ticket(**data)
-            self._load_tickets()
-            self._select_first_row()
+            self._write(ticket_service.create_ticket, **data,
+                        on_result=lambda ticket: self._load_tickets(select_id=ticket.id))
 
     def _edit_ticket(self):
         ticket = self._get_selected_ticket()
         if not ticket:
             QMessageBox.information(self, "Info", tr("dlg.info.select_ticket"))
             return
+        if ticket.description is None:
+            ticket.description = ticket_service.cached_description(ticket.id)
+        if ticket.description is None:
+            # les lignes de la table n'ont pas la description (projection de liste) :
+            # lue sur le worker, le formulaire s'ouvre à son arrivée
+            self.loader.run("edit_description", ticket_service.get_description, ticket.id,
+                            on_result=lambda text: self._open_edit_dialog(ticket, text))
+            return
+        self._open_edit_dialog(ticket, ticket.description)
+
+    def _open_edit_dialog(self, ticket, description):
+        ticket.description = description
         dlg = TicketFormDialog(self, ticket=ticket)
         if dlg.exec():
             data = dlg.get_ticket_data()
@@ -252,8 +364,7 @@ class MainWindow(QMainWindow):
             ticket.deadline = data["deadline"]
             ticket.theme = data["theme"]
             ticket.description = data["description"]
-            ticket_service.update_ticket(ticket)
-            self._load_tickets()
+            self._write(ticket_service.update_ticket, ticket)
 
     def _toggle_archive(self):
         ticket = self._get_selected_ticket()
@@ -263,12 +374,9 @@ class MainWindow(QMainWindow):
         if ticket.id is None:
             return
         if ticket.archived:
-            if ticket.id is not None:
-                ticket_service.unarchive_ticket(ticket.id)
+            self._write(ticket_service.unarchive_ticket, ticket.id)
         else:
-            if ticket.id is not None:
-                ticket_service.archive_ticket(ticket.id)
-        self._load_tickets()
+            self._write(ticket_service.archive_ticket, ticket.id)
 
     def _delete_ticket(self):
         ticket = self._get_selected_ticket()
@@ -283,8 +391,19 @@ class MainWindow(QMainWindow):
             tr("dlg.confirm.delete_ticket", id=ticket.id),
         )
         if reply == QMessageBox.StandardButton.Yes:
-            ticket_service.delete_ticket(ticket.id)
-            self._load_tickets()
+            self._write(ticket_service.delete_ticket, ticket.id)
+
+    def _write(self, fn, *args, on_result=None, **kwargs):
+        """Run a ticket write on the database worker, then reload the list."""
+        self.loader.run(("write", next(self._writes)), fn, *args,
+                        on_result=on_result or (lambda _: self._load_tickets()),
+                        on_error=self._on_write_failed, **kwargs)
+
+    def _on_write_failed(self, error):
+        # Les objets partagés ont pu être modifiés avant l'échec : on relit la base
+        ticket_service.clear_caches()
+        show_write_error(self, error)
+        self._load_tickets()
 
     def _update_archive_action_label(self, *args):
         ticket = self._get_selected_ticket()
@@ -295,9 +414,8 @@ class MainWindow(QMainWindow):
         self.detail_panel.set_ticket(ticket)
 
     def _select_first_row(self):
-        if self.proxy.rowCount() > 0:
-            index = self.proxy.index(0, 0)
-            self.table_view.selectRow(index.row())
+        if self.model.rowCount() > 0:
+            self.table_view.selectRow(0)
         else:
             self.detail_panel.set_ticket(None)
         self._update_archive_action_label()
@@ -310,52 +428,85 @@ class MainWindow(QMainWindow):
         for row in range(self.model.rowCount()):
             t = self.model.get_ticket_at(row)
             if t.id == ticket_id:
-                proxy_index = self.proxy.mapFromSource(self.model.index(row, 0))
-                if proxy_index.isValid():
-                    self.table_view.selectRow(proxy_index.row())
-                    self.detail_panel.set_ticket(t)
-                    return
+                self.table_view.selectRow(row)
+                self.detail_panel.set_ticket(t)
+                return
         self._select_first_row()
 
     def _apply_filters(self):
-        theme_value = None
-        if self.cmb_theme.currentIndex() > 0:
-            theme_value = self.cmb_theme.currentText()
-        self.proxy.set_filters(
-            search_text=self.search_edit.text(),
-            urgency=self.cmb_urgency.currentData(),
-            deadline_filter=self.cmb_deadline.currentData(),
-            theme=theme_value,
-        )
-        self._select_first_row()
+        self._pending_selection = None  # première ligne une fois la page reçue
+        self.model.reload()
 
-    def _refresh_theme_filter(self, tickets):
-        themes = sorted({t.theme for t in tickets if t.theme})
-        current = self.cmb_theme.currentText()
+    def _refresh_theme_filter(self):
+        themes = sorted((t for t in theme_service.get_all() if t.name), key=lambda t: t.name)
+        current = self.cmb_theme.currentData()
         self.cmb_theme.blockSignals(True)
         self.cmb_theme.clear()
-        self.cmb_theme.addItem(tr("filter.all"))
+        self.cmb_theme.addItem(tr("filter.all"), None)
         for th in themes:
-            self.cmb_theme.addItem(th)
-        if current in [tr("filter.all")] + themes:
-            self.cmb_theme.setCurrentText(current)
+            self.cmb_theme.addItem(th.name, th.id)
+        idx = self.cmb_theme.findData(current)
+        if current is not None and idx >= 0:
+            self.cmb_theme.setCurrentIndex(idx)
         self.cmb_theme.blockSignals(False)
+        self._show_filter_counts()
+
+    def _load_stats(self):
+        self.loader.run("stats", ticket_service.stats, on_result=self._on_stats)
+
+    def _on_stats(self, stats):
+        self._stats = stats
+        self._show_filter_counts()
+        self._show_deadline_alerts()
+
+    def _show_filter_counts(self):
+        """Suffix every filter entry with its "(n)" active ticket count."""
+        stats = self._stats
+        if stats is None or not hasattr(self, "cmb_theme"):
+            return
+        for combo, counts in ((self.cmb_urgency, stats.by_urgency),
+                              (self.cmb_deadline, stats.by_deadline),
+                              (self.cmb_theme, stats.by_theme)):
+            # currentTextChanged relancerait le filtrage : seul le libellé change
+            combo.blockSignals(True)
+            for i in range(combo.count()):
+                label = combo.itemData(i, LABEL_ROLE)
+                if label is None:
+                    label = combo.itemText(i)
+                    combo.setItemData(i, label, LABEL_ROLE)
+                # entrée 0 : "Tous"
+                count = stats.total if i == 0 else counts.get(combo.itemData(i), 0)
+                combo.setItemText(i, f"{label} ({count})")
+            combo.blockSignals(False)
 
     def _open_settings(self):
         dlg = SettingsDialog(self)
         if dlg.exec():
-            theme_service.refresh_cache()
+            # le cache des thèmes est relu sur le worker avec la liste
             self._load_tickets()
-            if getattr(dlg, "language_changed", False):
-                i18n.set_language(dlg.settings.get("language", "fr"))
-                self._retranslate_ui()
+            # langue, raccourcis et thème suivent via _on_settings_changed
             if getattr(dlg, "data_reset", False):
                 self._load_tickets()
                 if hasattr(self.notes_panel, "_load_note"):
                     self.notes_panel._load_note()
                 if hasattr(self.postit_board, "_load_postits"):
                     self.postit_board._load_postits()
-            apply_theme(QApplication.instance(), dlg.settings)
+                # réglages supprimés avec les données : retour aux valeurs par défaut
+                settings_store.get_settings()
+
+    def _on_settings_changed(self, settings):
+        self._settings = settings
+        language = settings.get("language", "fr")
+        if language != i18n.get_language():
+            i18n.set_language(language)
+            self._retranslate_ui()
+        else:
+            self._init_shortcuts()
+        apply_theme(QApplication.instance(), settings)
+
+    def closeEvent(self, event):
+        settings_store.unsubscribe(self._settings_listener)
+        super().closeEvent(event)
 
     def _open_command_palette(self):
         actions = [
@@ -422,6 +573,9 @@ class MainWindow(QMainWindow):
         menu.exec(self.table_view.viewport().mapToGlobal(pos))
 
     def _export_db(self):
+        if self._backup_task is not None:
+            QMessageBox.information(self, "Export", tr("dlg.db.export.running"))
+            return
         path, _ = QFileDialog.getSaveFileName(
             self,
             tr("dlg.db.export.title"),
@@ -430,12 +584,36 @@ class MainWindow(QMainWindow):
         )
         if not path:
             return
-        try:
-            import shutil
-            shutil.copyfile(DB_PATH, path)
-            QMessageBox.information(self, "Export", tr("dlg.db.export.success", path=path))
-        except Exception as e:
-            QMessageBox.critical(self, "Export", tr("dlg.db.export.error", err=e))
+        # copie en ligne sur un thread dédié : la fenêtre reste utilisable
+        progress = QProgressDialog(tr("dlg.db.export.progress"), tr("dlg.cancel"), 0, 100, self)
+        progress.setWindowTitle(tr("dlg.db.export.title"))
+        progress.setWindowModality(Qt.WindowModality.NonModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+
+        task = BackupTask(path, self)
+        task.progress.connect(
+            lambda copied, total: progress.setValue(copied * 100 // total if total else 100)
+        )
+        progress.canceled.connect(task.cancel)
+
+        def done():
+            progress.close()
+            self._backup_task = None
+            task.deleteLater()
+
+        task.finished.connect(done)
+        task.finished.connect(
+            lambda: QMessageBox.information(self, "Export", tr("dlg.db.export.success", path=path))
+        )
+        task.failed.connect(done)
+        task.failed.connect(
+            lambda err: QMessageBox.critical(self, "Export", tr("dlg.db.export.error", err=err))
+        )
+        task.cancelled.connect(done)
+        self._backup_task = task
+        task.start()
 
     def _import_db(self):
         path, _ = QFileDialog.getOpenFileName(
@@ -446,46 +624,67 @@ class MainWindow(QMainWindow):
         )
         if not path:
             return
-        try:
-            import shutil
-            shutil.copyfile(path, DB_PATH)
-            QMessageBox.information(self, "Import", tr("dlg.db.import.success"))
-        except Exception as e:
-            QMessageBox.critical(self, "Import", tr("dlg.db.import.error", err=e))
+        # fusion dans la base ouverte (ATTACH + INSERT ... SELECT), pas de copie du fichier
+        policies = ("renumber", "skip", "replace")
+        labels = [tr(f"dlg.db.import.policy.{p}") for p in policies]
+        label, ok = QInputDialog.getItem(
+            self, tr("dlg.db.import.title"), tr("dlg.db.import.policy"), labels, 0, False
+        )
+        if not ok:
+            return
+        policy = policies[labels.index(label)]
+
+        progress = QProgressDialog(tr("dlg.db.import.title"), None, 0, 4, self)
+        progress.setWindowTitle(tr("dlg.db.import.title"))
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+
+        task = ImportTask(path, policy, self)
+
+        def step(stage, done, total):
+            progress.setLabelText(tr("dlg.db.import.progress", stage=stage))
+            progress.setValue(done)
+
+        def finished(report):
+            progress.close()
+            task.deleteLater()
+            ticket_service.clear_caches()
+            self._load_tickets()
+            self.notes_panel._load_note()
+            self.postit_board._load_postits()
+            QMessageBox.information(self, "Import", tr(
+                "dlg.db.import.success", tickets=report.tickets, notes=report.notes,
+                postits=report.postits, themes=report.themes,
+            ))
+
+        def failed(err):
+            progress.close()
+            task.deleteLater()
+            QMessageBox.critical(self, "Import", tr("dlg.db.import.error", err=err))
+
+        task.progress.connect(step)
+        task.finished.connect(finished)
+        task.failed.connect(failed)
+        task.start()
 
     def _show_deadline_alerts(self):
-        if self._alerts_shown:
+        # Compteurs déjà lus avec les statistiques des filtres : aucun parcours des tickets
+        if self._alerts_shown or self._stats is None:
             return
-        from ..utils.settings_store import get_alert_settings
-        settings = get_alert_settings()
+        settings = self._settings.get("alerts", {})
         if not any(settings.values()):
             return
-        tickets = ticket_service.get_all_tickets(include_archived=False)
-        from datetime import datetime, date, timedelta
-        today = date.today()
-        overdue = []
-        dayof = []
-        before = []
-        for t in tickets:
-            if not t.deadline:
-                continue
-            try:
-                d = datetime.strptime(t.deadline, "%Y-%m-%d").date()
-            except Exception:
-                continue
-            if settings.get("overdue") and d < today:
-                overdue.append(t)
-            elif settings.get("day_of") and d == today:
-                dayof.append(t)
-            elif settings.get("one_day_before") and d == today + timedelta(days=1):
-                before.append(t)
+        counts = self._stats.by_deadline
+        before = counts["tomorrow"] if settings.get("one_day_before") else 0
+        dayof = counts["today"] if settings.get("day_of") else 0
+        overdue = counts["overdue"] if settings.get("overdue") else 0
         msgs = []
         if before:
-            msgs.append(tr("alerts.before", n=len(before)))
+            msgs.append(tr("alerts.before", n=before))
         if dayof:
-            msgs.append(tr("alerts.dayof", n=len(dayof)))
+            msgs.append(tr("alerts.dayof", n=dayof))
         if overdue:
-            msgs.append(tr("alerts.overdue", n=len(overdue)))
+            msgs.append(tr("alerts.overdue", n=overdue))
         if msgs:
             QMessageBox.warning(self, tr("alerts.title"), "\n".join(msgs))
             self._alerts_shown = True
@@ -513,11 +712,8 @@ class MainWindow(QMainWindow):
 
         self._populate_urgency_combo()
         self._populate_deadline_combo()
-        tickets = ticket_service.get_all_tickets(
-            include_archived=self.show_archived.isChecked()
-        )
-        self.model.set_theme_colors(theme_service.get_theme_colors())
-        self._refresh_theme_filter(tickets)
+        self.model.set_theme_colors(theme_service.get_theme_colors_by_id())
+        self._refresh_theme_filter()
         self._apply_filters()
         self._update_archive_action_label()
         if hasattr(self.detail_panel, "retranslate"):
@@ -540,5 +736,17 @@ class MainWindow(QMainWindow):
             self._refresh_timer.stop()
         self._refresh_timer = QTimer(self)
         self._refresh_timer.setInterval(30000)  # 30s
-        self._refresh_timer.timeout.connect(self._load_tickets)
+        self._refresh_timer.timeout.connect(self._refresh_changes)
         self._refresh_timer.start()
+
+    def _init_maintenance(self):
+        self._maintenance_timer = QTimer(self)
+        self._maintenance_timer.setInterval(MAINTENANCE_INTERVAL_MS)
+        self._maintenance_timer.timeout.connect(self._run_idle_maintenance)
+        self._maintenance_timer.start()
+
+    def _run_idle_maintenance(self):
+        # pas pendant un dialogue modal : il peut écrire et attendrait le verrou
+        if QApplication.activeModalWidget() is not None:
+            return
+        self.loader.run("maintenance", idle_maintenance, on_result=lambda freed: None)
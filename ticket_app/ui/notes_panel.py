@@ -1,20 +1,34 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QPushButton
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QTextEdit, QPushButton
 from ..utils.i18n import tr
 
 from ..services.note_service import note_service
+from .async_loader import AsyncLoader
+
+# Sauvegarde automatique après ce délai sans frappe (ms)
+NOTE_AUTOSAVE_MS = 1500
 
 
 class NotesPanel(QWidget):
-    """Simple note-taking area persisted in the database."""
+    """Note-taking area, autosaved to the database a moment after typing stops."""
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.loader = AsyncLoader(self)
+        self._autosave_timer = QTimer(self)
+        self._autosave_timer.setSingleShot(True)
+        self._autosave_timer.setInterval(NOTE_AUTOSAVE_MS)
+        self._autosave_timer.timeout.connect(self._save_note)
         self._init_ui()
         self._load_note()
+        # À la fermeture, le worker abandonne les requêtes en file : dernière
+        # sauvegarde en direct (sans écriture si le texte n'a pas changé)
+        QApplication.instance().aboutToQuit.connect(self._flush)
 
     def _init_ui(self):
         layout = QVBoxLayout(self)
         self.text_edit = QTextEdit()
+        self.text_edit.textChanged.connect(self._autosave_timer.start)
         save_btn = QPushButton(tr("notes.save"))
         save_btn.clicked.connect(self._save_note)
         layout.addWidget(self.text_edit)
@@ -22,9 +36,24 @@ class NotesPanel(QWidget):
         self._save_btn = save_btn
 
     def _load_note(self):
-        self.text_edit.setPlainText(note_service.get_current_content())
+        self._autosave_timer.stop()
+        # relu sur le worker, derrière les sauvegardes déjà en file
+        self.loader.run("load", note_service.get_current_content, on_result=self._on_note_loaded)
+
+    def _on_note_loaded(self, content):
+        self.text_edit.blockSignals(True)
+        self.text_edit.setPlainText(content)
+        self.text_edit.blockSignals(False)
 
     def _save_note(self):
+        self._autosave_timer.stop()
+        # Sur le worker : le service n'écrit que l'écart avec la révision courante.
+        # Une sauvegarde pas encore commencée est remplacée par la plus récente.
+        self.loader.run("save", note_service.save_content, self.text_edit.toPlainText(),
+                        on_result=lambda _: None)
+
+    def _flush(self):
+        self._autosave_timer.stop()
         note_service.save_content(self.text_edit.toPlainText())
 
     def retranslate(self):
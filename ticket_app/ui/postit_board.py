@@ -1,3 +1,5 @@
+from itertools import count
+
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout, QMessageBox,
     QLineEdit, QComboBox, QListWidgetItem, QFrame, QListWidget
@@ -6,6 +8,7 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QColor, QPalette
 
 from ..services.postit_service import postit_service
+from .async_loader import AsyncLoader, show_write_error
 from .postit_edit_dialog import PostItEditDialog
 from ..utils.i18n import tr
 
@@ -45,12 +48,15 @@ class PostItCard(QFrame):
 
 
 class PostItListWidget(QListWidget):
-    """List widget supporting drag and drop, emitting when order changes."""
-    orderChanged = Signal()
+    """List widget supporting drag and drop, emitting the moved post-it's id."""
+    orderChanged = Signal(object)
 
     def dropEvent(self, event):
+        # L'élément glissé reste l'élément courant
+        item = self.currentItem()
+        moved_id = item.data(Qt.UserRole) if item is not None else None
         super().dropEvent(event)
-        self.orderChanged.emit()
+        self.orderChanged.emit(moved_id)
 
 
 class PostItBoard(QWidget):
@@ -58,6 +64,10 @@ class PostItBoard(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._postits = []
+        self.loader = AsyncLoader(self)
+        self._moves = count()
+        self._writes = count()
         self._init_ui()
         self._load_postits()
 
@@ -110,7 +120,10 @@ class PostItBoard(QWidget):
         self.list_widget.orderChanged.connect(self._persist_order)
 
     def _load_postits(self):
-        self._postits = postit_service.get_all_postits()
+        self.loader.run("postits", postit_service.get_all_postits, on_result=self._on_postits_loaded)
+
+    def _on_postits_loaded(self, postits):
+        self._postits = postits
         self._refresh_color_filter()
         self._refresh_wall()
 
@@ -165,12 +178,12 @@ class PostItBoard(QWidget):
             content = data["content"].strip()
             if not content:
                 return
-            postit_service.create_postit(
+            self._write(
+                postit_service.create_postit,
                 content=content,
                 tags=data["tags"].strip(),
                 color=data["color"].strip() or "yellow"
             )
-            self._load_postits()
 
     def _edit_postit(self):
         postit = self._get_selected()
@@ -186,26 +199,52 @@ class PostItBoard(QWidget):
             postit.content = content
             postit.tags = data["tags"].strip()
             postit.color = data["color"].strip() or postit.color
-            postit_service.update_postit(postit)
-            self._load_postits()
+            self._write(postit_service.update_postit, postit)
 
     def _delete_postit(self):
         postit = self._get_selected()
         if not postit:
             QMessageBox.information(self, "Info", tr("postit.select"))
             return
-        postit_service.delete_postit(postit.id)
-        self._load_postits()
+        self._write(postit_service.delete_postit, postit.id)
+
+    def _write(self, fn, *args, **kwargs):
+        """Run a post-it write on the database worker, then reload the wall."""
+        self.loader.run(("write", next(self._writes)), fn, *args,
+                        on_result=lambda _: self._load_postits(),
+                        on_error=self._on_write_failed, **kwargs)
 
-    def _persist_order(self):
+    def _persist_order(self, moved_id):
         visible_ids = []
         for i in range(self.list_widget.count()):
             item = self.list_widget.item(i)
             pid = item.data(Qt.UserRole)
             if pid is not None:
                 visible_ids.append(pid)
-        hidden_ids = [p.id for p in self._postits if p.id not in visible_ids]
-        postit_service.reorder_postits(visible_ids + hidden_ids)
+        moved = next((p for p in self._postits if p.id == moved_id), None)
+        if moved is None or moved_id not in visible_ids:
+            self._refresh_wall()
+            return
+        row = visible_ids.index(moved_id)
+        after_id = visible_ids[row - 1] if row else None
+        # Mur en mémoire corrigé sur place, comme move() le fait en base :
+        # juste après le voisin de gauche (ou en tête), sans relire les post-its.
+        self._postits.remove(moved)
+        index = 0 if after_id is None else next(
+            i for i, p in enumerate(self._postits) if p.id == after_id) + 1
+        self._postits.insert(index, moved)
+        self._refresh_wall()
+        # Une clé par déplacement : chacun est un delta, aucun ne doit en remplacer un autre
+        self.loader.run(("move", next(self._moves)), postit_service.move_postit, moved_id, after_id,
+                        on_result=lambda key: self._on_moved(moved, key),
+                        on_error=self._on_write_failed)
+
+    def _on_moved(self, postit, order_index):
+        postit.order_index = order_index
+
+    def _on_write_failed(self, error):
+        # le post-it modifié en mémoire est remplacé par la relecture
+        show_write_error(self, error)
         self._load_postits()
 
     def retranslate(self):
@@ -3,13 +3,19 @@ from PySide6.QtWidgets import (
     QLabel, QColorDialog, QLineEdit, QSpinBox, QFormLayout, QMessageBox, QCheckBox, QGroupBox, QComboBox
 )
 import shutil
+from itertools import count
 from pathlib import Path
 
+from ..services.note_service import note_service
 from ..services.theme_service import theme_service
+from ..services.ticket_service import ticket_service
 from ..utils.settings_store import load_settings, save_settings
 from ..utils.i18n import tr, available_languages
 from ..config import DB_PATH, DATA_DIR, LOG_DIR
-from ..db.database import init_db
+from ..db.database import init_db, close_connections
+from ..db.maintenance import compact, integrity_check, storage_stats
+from .async_loader import AsyncLoader, show_write_error
+from ..services.db_worker import db_worker
 from ..utils.settings_store import SETTINGS_PATH
 from ..utils.theme_manager import get_appearance_settings
 
@@ -82,11 +88,14 @@ class SettingsDialog(QDialog):
         self._initial_language = self.settings.get("language", "fr")
         self.language_changed = False
         self.data_reset = False
+        self.loader = AsyncLoader(self)
+        self._theme_writes = count()
         self._init_ui()
         self._load_alerts()
         self._load_themes()
         self._load_shortcuts()
         self._load_appearance()
+        self._load_storage()
 
     def _init_ui(self):
         layout = QVBoxLayout(self)
@@ -171,6 +180,21 @@ class SettingsDialog(QDialog):
         appearance_layout.addLayout(app_form)
         layout.addWidget(appearance_group)
 
+        # Storage maintenance (sur le worker : VACUUM peut durer)
+        storage_group = QGroupBox(tr("settings.storage.title"))
+        storage_layout = QVBoxLayout(storage_group)
+        self.storage_label = QLabel(tr("settings.storage.loading"))
+        storage_layout.addWidget(self.storage_label)
+        storage_row = QHBoxLayout()
+        self.compact_btn = QPushButton(tr("settings.storage.compact"))
+        self.compact_btn.clicked.connect(self._compact_storage)
+        self.integrity_btn = QPushButton(tr("settings.storage.integrity"))
+        self.integrity_btn.clicked.connect(self._check_integrity)
+        storage_row.addWidget(self.compact_btn)
+        storage_row.addWidget(self.integrity_btn)
+        storage_layout.addLayout(storage_row)
+        layout.addWidget(storage_group)
+
         # Reset data
         reset_group = QGroupBox(tr("settings.reset.title"))
         reset_layout = QVBoxLayout(reset_group)
@@ -216,6 +240,53 @@ class SettingsDialog(QDialog):
             self.mode_combo.setCurrentIndex(idx)
         self.kanban_bg_edit.setText(appearance.get("kanban_column", ""))
 
+    def _load_storage(self):
+        self.loader.run("storage", storage_stats, on_result=self._show_storage,
+                        on_error=self._storage_failed)
+
+    def _show_storage(self, stats):
+        mb = 1024 * 1024
+        frag = "—" if stats.fragmentation is None else f"{stats.fragmentation * 100:.0f} %"
+        self.storage_label.setText(tr(
+            "settings.storage.stats",
+            size=f"{stats.file_bytes / mb:.1f}",
+            free=f"{stats.free_bytes / mb:.1f}",
+            ratio=f"{stats.free_ratio * 100:.0f}",
+            frag=frag,
+        ))
+        self._set_storage_busy(False)
+
+    def _set_storage_busy(self, busy: bool):
+        self.compact_btn.setEnabled(not busy)
+        self.integrity_btn.setEnabled(not busy)
+        if busy:
+            self.storage_label.setText(tr("settings.storage.running"))
+
+    def _storage_failed(self, error):
+        self._set_storage_busy(False)
+        QMessageBox.critical(self, tr("settings.storage.title"), tr("settings.storage.error", err=error))
+
+    def _compact_storage(self):
+        self._set_storage_busy(True)
+        self.loader.run("storage", compact, on_result=self._show_storage,
+                        on_error=self._storage_failed)
+
+    def _check_integrity(self):
+        self._set_storage_busy(True)
+        self.loader.run("integrity", integrity_check, on_result=self._on_integrity_checked,
+                        on_error=self._storage_failed)
+
+    def _on_integrity_checked(self, problems):
+        self._load_storage()
+        if problems:
+            QMessageBox.warning(self, tr("settings.storage.title"), tr(
+                "settings.storage.integrity.problems",
+                count=len(problems), details="\n".join(problems[:20]),
+            ))
+        else:
+            QMessageBox.information(self, tr("settings.storage.title"),
+                                    tr("settings.storage.integrity.ok"))
+
     def _pick_color(self, target_edit: QLineEdit):
         color = QColorDialog.getColor()
         if color.isValid():
@@ -234,8 +305,7 @@ class SettingsDialog(QDialog):
             if not data["name"]:
                 QMessageBox.warning(self, tr("settings.title"), tr("validation.name_required"))
                 return
-            theme_service.create(**data)
-            self._load_themes()
+            self._write_theme(theme_service.create, **data)
 
     def _edit_theme(self):
         theme = self._selected_theme()
@@ -252,15 +322,36 @@ class SettingsDialog(QDialog):
             theme.color = data["color"]
             theme.x = data["x"]; theme.y = data["y"]
             theme.width = data["width"]; theme.height = data["height"]
-            theme_service.update(theme, old_name=old_name)
-            self._load_themes()
+            self._write_theme(theme_service.update, theme, old_name=old_name)
 
     def _delete_theme(self):
         theme = self._selected_theme()
         if not theme:
             return
-        theme_service.delete(theme.id)
-        self._load_themes()
+        # les tickets du thème perdent leur thème (ON DELETE SET NULL) : compte d'abord
+        self.loader.run("theme_usage", theme_service.count_tickets, theme.id,
+                        on_result=lambda count: self._confirm_delete_theme(theme, count))
+
+    def _confirm_delete_theme(self, theme, count):
+        reply = QMessageBox.question(
+            self,
+            tr("dlg.confirmation"),
+            tr("settings.theme.delete.confirm", name=theme.name, count=count),
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self._write_theme(theme_service.delete, theme.id)
+
+    def _write_theme(self, fn, *args, **kwargs):
+        # sur le worker : derrière le verrou d'écriture, l'attente ne fige pas la fenêtre
+        self.loader.run(("theme", next(self._theme_writes)), fn, *args,
+                        on_result=lambda _: self._load_themes(),
+                        on_error=self._theme_write_failed, **kwargs)
+
+    def _theme_write_failed(self, error):
+        show_write_error(self, error)
+        # le thème modifié en mémoire vient du cache : relu depuis la base
+        self.loader.run("themes", theme_service.refresh_cache,
+                        on_result=lambda _: self._load_themes())
 
     def accept(self):
         self.settings["alerts"] = {
@@ -295,6 +386,8 @@ class SettingsDialog(QDialog):
             return
         try:
             # Remove DB and settings
+            db_worker.drain()
+            close_connections()
             if DB_PATH.exists():
                 DB_PATH.unlink()
             if SETTINGS_PATH.exists():
@@ -307,6 +400,9 @@ class SettingsDialog(QDialog):
                 shutil.rmtree(LOG_DIR)
             LOG_DIR.mkdir(parents=True, exist_ok=True)
             init_db()
+            ticket_service.clear_caches()
+            note_service.clear_caches()
+            self._load_storage()
             QMessageBox.information(self, tr("settings.reset.title"), tr("settings.reset.success"))
             self.data_reset = True
         except Exception as e:
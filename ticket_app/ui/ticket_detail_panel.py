@@ -1,5 +1,7 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QFormLayout, QTextEdit
+from ..services.ticket_service import ticket_service
 from ..utils.i18n import tr
+from .async_loader import AsyncLoader
 
 
 class TicketDetailPanel(QWidget):
@@ -9,6 +11,7 @@ class TicketDetailPanel(QWidget):
         super().__init__(parent)
         self._ticket = None
         self._on_toggle_resolved = on_toggle_resolved
+        self.loader = AsyncLoader(self)
         self._init_ui()
 
     def _init_ui(self):
@@ -55,13 +58,29 @@ class TicketDetailPanel(QWidget):
         self.lbl_urgency.setText(ticket.urgency or "-")
         self.lbl_deadline.setText(ticket.deadline or "-")
         self.lbl_created.setText(ticket.created_at or "-")
-        self.txt_description.setPlainText(ticket.description or "")
+        self._show_description(ticket)
         self.btn_toggle.setEnabled(True)
         if ticket.archived:
             self.btn_toggle.setText(tr("detail.reopen"))
         else:
             self.btn_toggle.setText(tr("detail.resolve"))
 
+    def _show_description(self, ticket):
+        # Les tickets des listes arrivent sans description : lue à la demande
+        description = ticket.description
+        if description is None:
+            description = ticket_service.cached_description(ticket.id)
+        if description is not None:
+            self.txt_description.setPlainText(description)
+            return
+        self.txt_description.setPlainText("")
+        self.loader.run("description", ticket_service.get_description, ticket.id,
+                        on_result=lambda text, ticket_id=ticket.id: self._on_description(ticket_id, text))
+
+    def _on_description(self, ticket_id, description):
+        if self._ticket is not None and self._ticket.id == ticket_id:
+            self.txt_description.setPlainText(description)
+
     def _handle_toggle(self):
         if self._ticket and self._on_toggle_resolved:
             self._on_toggle_resolved()
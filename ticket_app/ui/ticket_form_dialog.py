@@ -71,11 +71,8 @@ class TicketFormDialog(QDialog):
         self.description_edit.setPlainText(ticket.description)
 
     def get_ticket_data(self) -> dict:
+        # un thème inconnu est créé (couleur par défaut) par l'écriture du ticket, sur le worker
         theme_text = self.theme_combo.currentText().strip()
-        if theme_text and theme_text not in [self.theme_combo.itemText(i) for i in range(self.theme_combo.count())]:
-            # create new theme with default color if not existing
-            theme_service.create(theme_text, color="#cccccc")
-            self._load_themes(select=theme_text)
         return {
             "title": self.title_edit.text().strip(),
             "theme": theme_text,
@@ -1,15 +1,36 @@
-from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex
+from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex, Signal
 from PySide6.QtGui import QColor
-from typing import List
+from typing import Callable, List, Optional
 from ..db.models import Ticket
 from ..utils.i18n import tr
 
+# fetch_page(after_created_at, after_id, limit, on_page) demande une page ;
+# elle est livrée plus tard, dans le thread GUI, par on_page(List[Ticket]).
+PageFetcher = Callable[[Optional[str], Optional[int], int, Callable[[List[Ticket]], None]], None]
+
+
 class TicketTableModel(QAbstractTableModel):
+    """
+    Table of tickets. Either fed a full list with set_tickets(), or lazy:
+    given fetch_page, rows are loaded page by page as the view scrolls
+    (canFetchMore/fetchMore), using keyset pagination. Pages are requested
+    asynchronously; at most one request is in flight.
+    """
 
-    def __init__(self, tickets: List[Ticket] | None = None):
+    # première page reçue après reload()
+    reloaded = Signal()
+
+    def __init__(self, tickets: List[Ticket] | None = None,
+                 fetch_page: PageFetcher | None = None, page_size: int = 200):
         super().__init__()
         self._tickets: List[Ticket] = tickets or []
-        self._theme_colors: dict[str, str] = {}
+        self._fetch_page = fetch_page
+        self._page_size = page_size
+        self._exhausted = fetch_page is None
+        self._loading = False
+        self._generation = 0  # incrémenté par reload() : les pages en retard sont ignorées
+        # theme_id -> QColor, résolu une fois par set_theme_colors()
+        self._theme_colors: dict[int, QColor] = {}
         self._headers = [
             "ID",
             tr("ticket.table.title"),
@@ -22,8 +43,102 @@ class TicketTableModel(QAbstractTableModel):
     def set_tickets(self, tickets: List[Ticket]):
         self.beginResetModel()
         self._tickets = tickets
+        self._exhausted = True
         self.endResetModel()
 
+    def reload(self):
+        """Lazy mode: drop loaded rows and request the first page again."""
+        self.beginResetModel()
+        self._tickets = []
+        self._exhausted = self._fetch_page is None
+        self._loading = False
+        self._generation += 1
+        self.endResetModel()
+        if self._exhausted:
+            self.reloaded.emit()
+        else:
+            self._request_page()
+
+    def _request_page(self):
+        last = self._tickets[-1] if self._tickets else None
+        generation = self._generation
+        self._loading = True
+        self._fetch_page(
+            last.created_at if last else None,
+            last.id if last else None,
+            self._page_size,
+            lambda page: self._on_page(generation, page),
+        )
+
+    def _on_page(self, generation: int, page: List[Ticket]):
+        if generation != self._generation:
+            return
+        first_page = not self._tickets
+        self._loading = False
+        if len(page) < self._page_size:
+            self._exhausted = True
+        # apply_changes() a pu insérer certaines lignes pendant la requête
+        loaded = {t.id for t in self._tickets}
+        page = [t for t in page if t.id not in loaded]
+        if page:
+            first = len(self._tickets)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._tickets.extend(page)
+            self.endInsertRows()
+        if first_page:
+            self.reloaded.emit()
+
+    def apply_changes(self, changed_ids, matching: List[Ticket]):
+        """
+        Patch loaded rows in place after an incremental refresh.
+        changed_ids: every ticket id touched since the last refresh;
+        matching: those of them that (still) match the current filters.
+        """
+        matching_by_id = {t.id: t for t in matching}
+        for row in reversed(range(len(self._tickets))):
+            tid = self._tickets[row].id
+            if tid in changed_ids and tid not in matching_by_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._tickets[row]
+                self.endRemoveRows()
+
+        rows_by_id = {t.id: row for row, t in enumerate(self._tickets)}
+        last_col = self.columnCount() - 1
+        for ticket in matching:
+            row = rows_by_id.get(ticket.id)
+            if row is not None and self._tickets[row].created_at == ticket.created_at:
+                self._tickets[row] = ticket
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_col))
+                continue
+            if row is not None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._tickets[row]
+                self.endRemoveRows()
+            pos = self._insert_position(ticket)
+            if pos is None:
+                continue  # au-delà des pages chargées : viendra avec fetchMore
+            self.beginInsertRows(QModelIndex(), pos, pos)
+            self._tickets.insert(pos, ticket)
+            self.endInsertRows()
+            rows_by_id = {t.id: row for row, t in enumerate(self._tickets)}
+
+    def _insert_position(self, ticket: Ticket) -> Optional[int]:
+        key = (ticket.created_at or "", ticket.id)
+        for row, t in enumerate(self._tickets):
+            if (t.created_at or "", t.id) < key:
+                return row
+        return len(self._tickets) if self._exhausted else None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        self._request_page()
+
     def rowCount(self, parent=QModelIndex()) -> int:
         return len(self._tickets)
 
@@ -53,20 +168,14 @@ class TicketTableModel(QAbstractTableModel):
         elif role == Qt.ForegroundRole and ticket.archived:
             return QColor("red")
         elif col == 4 and role == Qt.BackgroundRole:
-            color = self._theme_colors.get(ticket.theme)
-            if color:
-                qc = QColor(color)
-                if qc.isValid():
-                    return qc
+            return self._theme_colors.get(ticket.theme_id)
         elif col == 4 and role == Qt.DecorationRole:
-            color = self._theme_colors.get(ticket.theme)
-            if color:
-                qc = QColor(color)
-                if qc.isValid():
-                    from PySide6.QtGui import QPixmap
-                    pix = QPixmap(12, 12)
-                    pix.fill(qc)
-                    return pix
+            qc = self._theme_colors.get(ticket.theme_id)
+            if qc is not None:
+                from PySide6.QtGui import QPixmap
+                pix = QPixmap(12, 12)
+                pix.fill(qc)
+                return pix
         return None
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
@@ -79,8 +188,12 @@ class TicketTableModel(QAbstractTableModel):
     def get_ticket_at(self, row: int) -> Ticket:
         return self._tickets[row]
 
-    def set_theme_colors(self, mapping: dict[str, str]):
-        self._theme_colors = mapping or {}
+    def set_theme_colors(self, mapping: dict[int, str]):
+        self._theme_colors = {}
+        for theme_id, color in (mapping or {}).items():
+            qc = QColor(color) if color else QColor()
+            if qc.isValid():
+                self._theme_colors[theme_id] = qc
         if self.rowCount() > 0:
             top_left = self.index(0, 0)
             bottom_right = self.index(self.rowCount() - 1, self.columnCount() - 1)
@@ -0,0 +1,31 @@
+"""
+Deadline day numbers.
+
+Deadlines are stored as ``YYYY-MM-DD`` text; the database also exposes them
+as ``tickets.deadline_day``, the number of days since 1970-01-01 (indexed).
+Filters and alerts compare these integers instead of parsing strings.
+"""
+
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def epoch_day(d: date) -> int:
+    """Days since 1970-01-01, the unit of ``tickets.deadline_day``."""
+    return d.toordinal() - _EPOCH_ORDINAL
+
+
+def deadline_day_range(kind: str, today: Optional[date] = None) -> Tuple[Optional[int], Optional[int]]:
+    """Inclusive (from, to) epoch-day bounds of a deadline quick filter."""
+    today = today or date.today()
+    if kind == "today":
+        day = epoch_day(today)
+        return day, day
+    if kind == "week":
+        start = epoch_day(today - timedelta(days=today.weekday()))
+        return start, start + 6
+    if kind == "overdue":
+        return None, epoch_day(today) - 1
+    return None, None
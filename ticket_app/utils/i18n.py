@@ -45,8 +45,18 @@ _T = {
     "dlg.db.export.title": {"fr": "Exporter la base", "en": "Export database"},
     "dlg.db.export.success": {"fr": "Base exportée vers :\n{path}", "en": "Database exported to:\n{path}"},
     "dlg.db.export.error": {"fr": "Échec de l'export : {err}", "en": "Export failed: {err}"},
+    "dlg.db.export.progress": {"fr": "Export de la base en cours…", "en": "Exporting database…"},
+    "dlg.db.export.running": {"fr": "Un export est déjà en cours.", "en": "An export is already running."},
     "dlg.db.import.title": {"fr": "Importer une base", "en": "Import database"},
-    "dlg.db.import.success": {"fr": "Base importée.\nRedémarre l'application pour prendre en compte.", "en": "Database imported.\nRestart the app to apply."},
+    "dlg.db.import.success": {
+        "fr": "Base importée : {tickets} ticket(s), {notes} note(s), {postits} post-it(s), {themes} thème(s).",
+        "en": "Database imported: {tickets} ticket(s), {notes} note(s), {postits} post-it(s), {themes} theme(s).",
+    },
+    "dlg.db.import.policy": {"fr": "En cas d'identifiant déjà présent :", "en": "When an id already exists:"},
+    "dlg.db.import.policy.renumber": {"fr": "Importer sous un nouvel identifiant", "en": "Import under a new id"},
+    "dlg.db.import.policy.skip": {"fr": "Garder nos données", "en": "Keep ours"},
+    "dlg.db.import.policy.replace": {"fr": "Remplacer par les leurs", "en": "Replace with theirs"},
+    "dlg.db.import.progress": {"fr": "Import : {stage}…", "en": "Importing: {stage}…"},
     "dlg.db.import.error": {"fr": "Échec de l'import : {err}", "en": "Import failed: {err}"},
     "alerts.title": {"fr": "Alertes échéances", "en": "Deadline alerts"},
     "alerts.before": {"fr": "1 jour avant : {n} ticket(s)", "en": "1 day before: {n} ticket(s)"},
@@ -90,6 +100,10 @@ _T = {
     "settings.new": {"fr": "Nouveau", "en": "New"},
     "settings.edit": {"fr": "Modifier", "en": "Edit"},
     "settings.delete": {"fr": "Supprimer", "en": "Delete"},
+    "settings.theme.delete.confirm": {
+        "fr": "Supprimer le thème « {name} » ?\n\n{count} ticket(s) n'auront plus de thème.",
+        "en": "Delete theme \"{name}\"?\n\n{count} ticket(s) will no longer have a theme.",
+    },
     "settings.close": {"fr": "Fermer", "en": "Close"},
     "settings.language": {"fr": "Langue", "en": "Language"},
     "settings.reset.title": {"fr": "Réinitialiser les données", "en": "Reset data"},
@@ -97,6 +111,21 @@ _T = {
     "settings.reset.confirm": {"fr": "Supprimer toutes les données (tickets, thèmes, post-it, bloc-notes, paramètres) ? Cette action est irréversible.", "en": "Delete all data (tickets, themes, sticky notes, notebook, settings)? This cannot be undone."},
     "settings.reset.success": {"fr": "Données supprimées. Une base vide a été recréée.", "en": "Data deleted. A fresh database was recreated."},
     "settings.reset.error": {"fr": "Échec de la suppression : {err}", "en": "Failed to delete data: {err}"},
+    "settings.storage.title": {"fr": "Stockage", "en": "Storage"},
+    "settings.storage.loading": {"fr": "Analyse de la base…", "en": "Analysing database…"},
+    "settings.storage.stats": {
+        "fr": "Taille : {size} Mo — pages libres : {free} Mo ({ratio} %) — fragmentation : {frag}",
+        "en": "Size: {size} MB — free pages: {free} MB ({ratio}%) — fragmentation: {frag}",
+    },
+    "settings.storage.compact": {"fr": "Compacter maintenant", "en": "Compact now"},
+    "settings.storage.integrity": {"fr": "Vérifier l'intégrité", "en": "Check integrity"},
+    "settings.storage.running": {"fr": "Opération en cours…", "en": "Working…"},
+    "settings.storage.integrity.ok": {"fr": "Aucun problème détecté.", "en": "No problem found."},
+    "settings.storage.integrity.problems": {
+        "fr": "{count} problème(s) détecté(s) :\n{details}",
+        "en": "{count} problem(s) found:\n{details}",
+    },
+    "settings.storage.error": {"fr": "Échec de l'opération : {err}", "en": "Operation failed: {err}"},
     "palette.title": {"fr": "Palette de commandes", "en": "Command palette"},
     "palette.search": {"fr": "Tape une commande...", "en": "Type a command..."},
     "palette.action.new": {"fr": "Nouveau ticket", "en": "New ticket"},
@@ -128,6 +157,10 @@ _T = {
     "kanban.group.urgency": {"fr": "Urgence", "en": "Urgency"},
     "kanban.no_tickets": {"fr": "Aucun ticket", "en": "No tickets"},
     "kanban.column.empty": {"fr": "Aucun ticket ici", "en": "No tickets here"},
+    "db.busy": {
+        "fr": "Base occupée par une autre application : modification non enregistrée",
+        "en": "Database busy in another application: change not saved",
+    },
     "palette.action.kanban": {"fr": "Ouvrir la vue Kanban", "en": "Open Kanban view"},
     "dlg.select_ticket": {"fr": "Sélectionne un ticket.", "en": "Select a ticket."},
     "dlg.confirmation": {"fr": "Confirmation", "en": "Confirmation"},
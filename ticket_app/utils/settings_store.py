@@ -1,6 +1,10 @@
 import copy
 import json
+import os
+import threading
 from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Tuple
 from ..config import DATA_DIR
 
 SETTINGS_PATH = DATA_DIR / "settings.json"
@@ -46,23 +50,114 @@ def _deep_merge(base: dict, override: dict | None) -> dict:
     return result
 
 
-def load_settings() -> dict:
-    if not SETTINGS_PATH.exists():
+# (chemin, mtime_ns, taille) du fichier lu et vue figée des réglages fusionnés
+_cache: Optional[Tuple[tuple, Mapping]] = None
+_lock = threading.Lock()
+_subscribers: List[Callable[[Mapping], None]] = []
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(val) for key, val in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(val) for val in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {key: _thaw(val) for key, val in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(val) for val in value]
+    return value
+
+
+def _file_key(path: Path) -> tuple:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (str(path), None, None)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def _read(path: Path) -> dict:
+    if not path.exists():
         return copy.deepcopy(DEFAULT_SETTINGS)
     try:
-        with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
     except Exception:
         data = {}
     return _deep_merge(DEFAULT_SETTINGS, data)
 
 
+def _store(key: tuple, settings: Mapping) -> Mapping:
+    """Replace the cached view; subscribers hear about it if the values changed."""
+    global _cache
+    with _lock:
+        previous = _cache
+        # un autre chemin (tests) n'est pas un changement des réglages
+        if previous is None or previous[0][0] != key[0]:
+            _cache = (key, settings)
+            return settings
+        if previous[1] == settings:
+            # fichier réécrit à l'identique : la vue déjà distribuée reste valable
+            _cache = (key, previous[1])
+            return previous[1]
+        _cache = (key, settings)
+        callbacks = list(_subscribers)
+    for callback in callbacks:
+        callback(settings)
+    return settings
+
+
+def get_settings() -> Mapping:
+    """
+    Read-only view of the merged settings. The file is parsed again only when
+    its mtime or size changed, so calling this on every refresh costs a stat().
+    """
+    path = SETTINGS_PATH
+    key = _file_key(path)
+    cached = _cache
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    return _store(key, _freeze(_read(path)))
+
+
+def load_settings() -> dict:
+    """Mutable copy of the settings, for editing before save_settings()."""
+    return _thaw(get_settings())
+
+
 def save_settings(data: dict):
-    SETTINGS_PATH.parent.mkdir(exist_ok=True)
-    with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
+    path = SETTINGS_PATH
+    get_settings()  # valeurs précédentes, pour ne notifier que d'un vrai changement
+    path.parent.mkdir(exist_ok=True)
+    # fichier temporaire puis remplacement : un lecteur ne voit jamais un JSON tronqué
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    # la résolution du mtime peut masquer deux écritures rapprochées : on n'attend pas la relecture
+    _store(_file_key(path), _freeze(_deep_merge(DEFAULT_SETTINGS, data)))
+
+
+def subscribe(callback: Callable[[Mapping], None]) -> None:
+    """
+    Call callback(settings) whenever the settings change: on save_settings(),
+    or when get_settings() notices the file was edited from outside. It runs
+    on the thread that made the change.
+    """
+    with _lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[Mapping], None]) -> None:
+    with _lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
 
 
 def get_alert_settings() -> dict:
-    settings = load_settings()
-    return settings.get("alerts", DEFAULT_SETTINGS["alerts"]).copy()
+    return dict(get_settings().get("alerts", DEFAULT_SETTINGS["alerts"]))